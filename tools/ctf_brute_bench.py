@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ctf_brute_v6 性能基准
+
+在本地起一个模拟靶机, 用 BruteEngine 对它发请求, 比较不同实现的吞吐。
+
+使用示例:
+    python tools/ctf_brute_bench.py scheduler -n 20000 -c 200 --stall-rate 0.01
+    python tools/ctf_brute_bench.py e2e --json v6.json --compare v5.json
+"""
+
+import asyncio
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import tracemalloc
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ctf_brute_v6 import (  # noqa: E402
+    BruteConfig, BruteEngine, RequestPacer, RequestTemplate, ShardedEngine, P, S,
+    apply_processors, compile_batch, describe_processors, make_transport, process_chunk,
+)
+from ctf_brute_target import TargetConfig, running_target  # noqa: E402
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🎯 模拟靶机
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@contextlib.contextmanager
+def target(port: int, latency: float = 0.0, stall_rate: float = 0.0, stall_time: float = 0.0,
+           procs: int = 1):
+    """模拟靶机: 固定延迟, stall_rate 比例的请求卡顿 stall_time 秒; procs > 1 时多进程共享端口"""
+    config = TargetConfig(port=port, procs=procs, latency=latency,
+                          error_rate=stall_rate, errors=["stall"], stall_time=stall_time)
+    with running_target(config) as url:
+        yield url
+
+def bench_config(url: str, n: int, concurrency: int, **kwargs) -> BruteConfig:
+    """n 个 Payload, 永远不会命中的配置"""
+    return BruteConfig(
+        url=url,
+        data={"username": "admin", "password": "{PASS}"},
+        payloads={"PASS": {"type": "range", "start": 1, "end": n}},
+        concurrency=concurrency,
+        fail_keywords=["错误"],
+        smart_mode=False,
+        output_file=None,
+        **kwargs,
+    )
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              ⏱️ 调度器对比
+# ═══════════════════════════════════════════════════════════════════════════════
+
+async def run_batched(engine: BruteEngine):
+    """旧版调度: 每批 gather 完再发下一批 (仅用于对比)"""
+    engine.stats.total = engine.count_payloads()
+    payloads = engine.iter_payloads()
+    engine.stats.start_time = time.time()
+    engine.transport = make_transport(engine.config, engine.template)
+    await engine.transport.open()
+    engine.semaphore = asyncio.Semaphore(engine.config.concurrency)
+    engine.pacer = RequestPacer(engine.config)
+    try:
+        while not engine.stop_flag:
+            batch = list(itertools.islice(payloads, engine.config.batch_size))
+            if not batch:
+                break
+            await asyncio.gather(*[engine.try_one(index, values) for index, values in batch], return_exceptions=True)
+    finally:
+        await engine.transport.close()
+
+async def run_pool(engine: BruteEngine):
+    """当前调度: 工作协程池 + 有界队列"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        await engine.run()
+
+def bench_scheduler(args):
+    with target(args.port, args.latency, args.stall_rate, args.stall_time) as url:
+        print(f"{'调度器':<10}{'请求数':>10}{'耗时':>10}{'req/s':>10}")
+        for name, runner in [("batch", run_batched), ("pool", run_pool)]:
+            # 两种调度都用固定并发, 对比的只是调度方式
+            engine = BruteEngine(bench_config(url, args.n, args.concurrency, adaptive=False,
+                                              timeout=args.stall_time + 5))
+            start = time.perf_counter()
+            asyncio.run(runner(engine))
+            elapsed = time.perf_counter() - start
+            print(f"{name:<10}{engine.stats.completed:>10}{elapsed:>9.2f}s{engine.stats.completed / elapsed:>10.0f}")
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🧩 多进程扩展性
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def bench_workers(args):
+    with target(args.port, args.latency, procs=args.server_procs) as url:
+        print(f"{'进程数':<10}{'请求数':>10}{'耗时':>10}{'req/s':>10}")
+        for workers in args.workers:
+            config = bench_config(url, args.n, args.concurrency, adaptive=False)
+            engine = ShardedEngine(config, workers) if workers > 1 else BruteEngine(config)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                asyncio.run(engine.run())
+            elapsed = time.perf_counter() - start
+            print(f"{workers:<10}{engine.stats.completed:>10}{elapsed:>9.2f}s{engine.stats.completed / elapsed:>10.0f}")
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🔧 处理器链
+# ═══════════════════════════════════════════════════════════════════════════════
+
+PROCESSOR_CHAINS = [
+    [P.md5()],
+    [P.md5_16()],
+    [P.sha1()],
+    [P.sha256()],
+    [P.base64_encode()],
+    [P.prefix("admin:"), P.md5()],
+    [P.prefix("admin:"), P.sha256()],
+]
+
+def bench_processors(args):
+    values = [f"password{i}" for i in range(args.n)]
+    chunk = args.chunk
+    print(f"{'处理器链':<28}{'逐个(s)':>10}{'批量(s)':>10}{'进程池(s)':>11}{'加速':>8}")
+    with concurrent.futures.ProcessPoolExecutor(args.workers) as pool:
+        for chain in PROCESSOR_CHAINS:
+            start = time.perf_counter()
+            expected = [apply_processors(v, chain) for v in values]
+            t_loop = time.perf_counter() - start
+
+            start = time.perf_counter()
+            batch = compile_batch(chain)
+            got = [r for i in range(0, len(values), chunk) for r in batch(values[i:i + chunk])]
+            t_batch = time.perf_counter() - start
+            assert got == expected
+
+            start = time.perf_counter()
+            futures = [pool.submit(process_chunk, values[i:i + chunk], chain)
+                       for i in range(0, len(values), chunk)]
+            got = [r for f in futures for r in f.result()]
+            t_pool = time.perf_counter() - start
+            assert got == expected
+
+            best = min(t_batch, t_pool)
+            print(f"{describe_processors(chain):<26}{t_loop:>10.3f}{t_batch:>10.3f}{t_pool:>11.3f}{t_loop / best:>7.1f}x")
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🔌 传输层
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def bench_transport(args):
+    """aiohttp vs raw (不同流水线深度): 吞吐和客户端 CPU 时间 (靶机在子进程, 不计入)"""
+    variants = [("aiohttp", 1)] + [("raw", depth) for depth in args.pipeline]
+    with target(args.port, args.latency, procs=args.server_procs) as url:
+        print(f"{'传输层':<14}{'请求数':>10}{'耗时':>10}{'req/s':>10}{'CPU(s)':>10}{'μs/请求':>10}")
+        for transport, depth in variants:
+            config = bench_config(url, args.n, args.concurrency, adaptive=False,
+                                  transport=transport, pipeline_depth=depth)
+            engine = BruteEngine(config)
+            start, cpu = time.perf_counter(), _cpu_time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                asyncio.run(engine.run())
+            elapsed, cpu = time.perf_counter() - start, _cpu_time() - cpu
+            name = transport if transport == "aiohttp" else f"raw x{depth}"
+            done = engine.stats.completed
+            # 一个请求都没完成 (靶机没起来等) 时没有单请求开销可算
+            per_request = f"{cpu / done * 1e6:>10.0f}" if done else f"{'-':>10}"
+            print(f"{name:<14}{done:>10}{elapsed:>9.2f}s{done / elapsed:>10.0f}{cpu:>10.2f}{per_request}")
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              📨 请求模板
+# ═══════════════════════════════════════════════════════════════════════════════
+
+TEMPLATE_DATA = {
+    "username": "{USER}",
+    "password": "{PASS}",
+    "captcha": "0000",
+    "remember": "on",
+}
+
+def bench_templates(args):
+    """build_request_data + 编码 (urlencode / json.dumps) vs 预编译模板渲染"""
+    payloads = [("admin", f"password{i}") for i in range(args.n)]
+    encoders = {
+        "POST": lambda d: urllib.parse.urlencode(d).encode(),
+        "JSON": lambda d: json.dumps(d).encode(),
+        "GET": lambda d: urllib.parse.urlencode(d),
+    }
+    print(f"{'方法':<8}{'旧版(s)':>10}{'模板(s)':>10}{'加速':>8}")
+    for method, encode in encoders.items():
+        config = BruteConfig(url="http://127.0.0.1/login", method=method, data=TEMPLATE_DATA,
+                             payloads={"USER": {}, "PASS": {}}, cache_dir=None)
+        engine = BruteEngine(config)
+        template = RequestTemplate(config)
+        
+        start = time.perf_counter()
+        for payload in payloads:
+            encode(engine.build_request_data(payload))
+        t_old = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for payload in payloads:
+            template.render(payload)
+        t_new = time.perf_counter() - start
+        
+        if method != "GET":
+            assert template.render(payloads[-1])[1] == encode(engine.build_request_data(payloads[-1]))
+        print(f"{method:<8}{t_old:>10.3f}{t_new:>10.3f}{t_old / t_new:>7.1f}x")
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              📦 Payload 表示
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def bench_payloads(args):
+    """在途 Payload 的内存占用 (tracemalloc, 含值字符串) 和生成速度"""
+    cases = [
+        ("1 位置", {"PASS": {"type": "range", "start": 0, "end": args.n - 1, "format": "password{}"}}),
+        ("2 位置", {"USER": {"type": "list", "values": ["admin", "root", "guest"]},
+                    "PASS": {"type": "range", "start": 0, "end": args.n // 3, "format": "password{}"}}),
+        ("2 位置+md5", {"USER": {"type": "list", "values": ["admin", "root", "guest"]},
+                       "PASS": {"type": "range", "start": 0, "end": args.n // 3, "format": "password{}",
+                                "processors": [P.md5()]}}),
+    ]
+    print(f"{'场景':<14}{'数量':>10}{'字节/个':>10}{'生成(万/s)':>12}")
+    for name, payloads in cases:
+        engine = BruteEngine(BruteConfig(payloads=payloads, data={}, cache_dir=None, output_file=None))
+        start = time.perf_counter()
+        count = sum(1 for _ in engine.iter_payloads(0, args.n))
+        rate = count / (time.perf_counter() - start)
+        
+        tracemalloc.start()
+        held = list(engine.iter_payloads(0, args.n))
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{name:<14}{len(held):>10}{size / len(held):>10.0f}{rate / 1e4:>12.1f}")
+        del held
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🏁 端到端基准
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# (名称, 靶机参数, 引擎参数); 正确密码总是字典里的最后一个, 每个场景都要跑完整个字典才能命中
+E2E_CASES = [
+    ("form", {"mode": "form"}, {"method": "POST"}),
+    ("form/raw", {"mode": "form"}, {"method": "POST", "transport": "raw"}),
+    ("json/md5", {"mode": "json", "check": "md5"}, {"method": "JSON", "processors": [P.md5()]}),
+    ("get/base64", {"mode": "get", "check": "base64"},
+     {"method": "GET", "processors": [P.prefix("admin:"), P.base64_encode()]}),
+    ("form/jitter+err", {"mode": "form", "latency": 0.002, "jitter": 0.01,
+                         "error_rate": 0.01, "errors": ["503", "drop"]}, {"method": "POST"}),
+    ("smart/dynamic", {"mode": "form", "dynamic": True, "body_size": 4096},
+     {"method": "POST", "smart_mode": True, "fail_keywords": []}),
+]
+
+class _TimedRequest:
+    """包一层请求上下文, 记录 发出 → 响应处理完 的耗时"""
+    
+    __slots__ = ("ctx", "samples", "start")
+    
+    def __init__(self, ctx, samples: list):
+        self.ctx = ctx
+        self.samples = samples
+    
+    async def __aenter__(self):
+        self.start = time.perf_counter()
+        return await self.ctx.__aenter__()
+    
+    async def __aexit__(self, *exc):
+        try:
+            return await self.ctx.__aexit__(*exc)
+        finally:
+            self.samples.append(time.perf_counter() - self.start)
+
+class TimedEngine(BruteEngine):
+    """记录每个请求延迟的 BruteEngine"""
+    
+    def __init__(self, config: BruteConfig):
+        super().__init__(config)
+        self.latencies: list = []
+    
+    def _request(self, request, trace=None):
+        return _TimedRequest(super()._request(request, trace), self.latencies)
+
+def _percentile(values: list, q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+def _e2e_child(url: str, secret: str, engine_kw: dict, args, queue):
+    """子进程: 跑一个场景, 上报指标 (CPU/峰值内存只算这个进程)"""
+    engine_kw = dict(engine_kw)
+    processors = engine_kw.pop("processors", [])
+    config = BruteConfig(
+        url=url,
+        data={"username": "admin", "password": "{PASS}"},
+        payloads={"PASS": {"type": "range", "start": 0, "end": args.n - 1, "format": "pass{}",
+                           "processors": processors}},
+        concurrency=args.concurrency,
+        fail_keywords=engine_kw.pop("fail_keywords", ["错误"]),
+        success_keywords=["flag{"],
+        smart_mode=engine_kw.pop("smart_mode", False),
+        checkpoint_file=None,
+        cache_dir=None,
+        output_file=None,
+        **engine_kw,
+    )
+    engine = TimedEngine(config)
+    start, cpu = time.perf_counter(), _cpu_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(engine.run())
+    elapsed, cpu = time.perf_counter() - start, _cpu_time() - cpu
+    latencies = sorted(engine.latencies)
+    requests = len(latencies)
+    queue.put({
+        "requests": requests,
+        "elapsed": elapsed,
+        "rps": requests / elapsed,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "cpu_s": cpu,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "errors": engine.stats.errors,
+        "found": [r.payload["PASS"]["original"] for r in engine.stats.results] == [secret],
+    })
+
+def bench_e2e(args):
+    """每个场景: 新起模拟靶机, 在独立子进程里跑 BruteEngine, 报告吞吐/延迟/CPU/峰值内存"""
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["cases"]
+    
+    ctx = multiprocessing.get_context("fork")
+    secret = f"pass{args.n - 1}"
+    report = {}
+    print(f"{'场景':<18}{'请求数':>8}{'req/s':>9}{'p50(ms)':>9}{'p99(ms)':>9}{'CPU(s)':>8}"
+          f"{'RSS(MB)':>9}{'错误':>6}{'命中':>6}" + ("  对比" if baseline else ""))
+    for name, target_kw, engine_kw in E2E_CASES:
+        if args.cases and name not in args.cases:
+            continue
+        target_config = TargetConfig(port=args.port, procs=args.server_procs, secret=secret, **target_kw)
+        with running_target(target_config) as url:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_e2e_child, args=(url, secret, engine_kw, args, queue))
+            proc.start()
+            m = queue.get()
+            proc.join()
+        report[name] = m
+        
+        delta = ""
+        if name in baseline:
+            old = baseline[name]
+            delta = (f"  req/s {(m['rps'] / old['rps'] - 1) * 100:+.0f}%"
+                     f"  p99 {(m['p99_ms'] / old['p99_ms'] - 1) * 100 if old['p99_ms'] else 0:+.0f}%")
+        print(f"{name:<18}{m['requests']:>8}{m['rps']:>9.0f}{m['p50_ms']:>9.2f}{m['p99_ms']:>9.2f}"
+              f"{m['cpu_s']:>8.2f}{m['rss_mb']:>9.1f}{m['errors']:>6}{'✓' if m['found'] else '✗':>6}{delta}")
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"n": args.n, "concurrency": args.concurrency, "cases": report}, f, indent=2)
+        print(f"{S.CYAN}[*] 结果已保存: {args.json}{S.RESET}")
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🎯 主程序
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='ctf_brute_v6 性能基准')
+    sub = parser.add_subparsers(dest='bench', required=True)
+
+    p = sub.add_parser('scheduler', help='批次 gather vs 工作协程池')
+    p.add_argument('-n', type=int, default=20000, help='请求数')
+    p.add_argument('-c', '--concurrency', type=int, default=200, help='并发数')
+    p.add_argument('--port', type=int, default=18080)
+    p.add_argument('--latency', type=float, default=0.005, help='正常响应延迟(秒)')
+    p.add_argument('--stall-rate', type=float, default=0.005, help='卡顿请求比例')
+    p.add_argument('--stall-time', type=float, default=1.0, help='卡顿时长(秒)')
+    p.set_defaults(func=bench_scheduler)
+
+    p = sub.add_parser('workers', help='--workers 进程数扩展性')
+    p.add_argument('-n', type=int, default=50000, help='请求数')
+    p.add_argument('-c', '--concurrency', type=int, default=256, help='总并发数')
+    p.add_argument('-w', '--workers', type=int, nargs='+', default=[1, 2, 4], help='要测的进程数')
+    p.add_argument('--port', type=int, default=18080)
+    p.add_argument('--latency', type=float, default=0.0, help='响应延迟(秒)')
+    p.add_argument('--server-procs', type=int, default=os.cpu_count() or 4, help='靶机进程数')
+    p.set_defaults(func=bench_workers)
+
+    p = sub.add_parser('processors', help='apply_processors 逐个处理 vs 批量/进程池')
+    p.add_argument('-n', type=int, default=1000000, help='值数量')
+    p.add_argument('--chunk', type=int, default=8192, help='每批数量')
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 4, help='进程池大小')
+    p.set_defaults(func=bench_processors)
+
+    p = sub.add_parser('transport', help='aiohttp vs raw HTTP/1.1 传输 (含流水线)')
+    p.add_argument('-n', type=int, default=30000, help='请求数')
+    p.add_argument('-c', '--concurrency', type=int, default=64, help='并发数')
+    p.add_argument('--pipeline', type=int, nargs='+', default=[1, 4, 16], help='要测的 raw 流水线深度')
+    p.add_argument('--port', type=int, default=18080)
+    p.add_argument('--latency', type=float, default=0.0, help='响应延迟(秒)')
+    p.add_argument('--server-procs', type=int, default=os.cpu_count() or 4, help='靶机进程数')
+    p.set_defaults(func=bench_transport)
+
+    p = sub.add_parser('e2e', help='端到端: 各场景的 req/s / p50 / p99 / CPU / 峰值内存')
+    p.add_argument('-n', type=int, default=20000, help='字典大小 (正确密码在最后)')
+    p.add_argument('-c', '--concurrency', type=int, default=200, help='并发数')
+    p.add_argument('--cases', nargs='+', choices=[case[0] for case in E2E_CASES], help='只跑这些场景')
+    p.add_argument('--port', type=int, default=18080)
+    p.add_argument('--server-procs', type=int, default=os.cpu_count() or 4, help='靶机进程数')
+    p.add_argument('--json', help='把结果保存为 JSON')
+    p.add_argument('--compare', help='与之前保存的 JSON 结果对比')
+    p.set_defaults(func=bench_e2e)
+
+    p = sub.add_parser('payloads', help='在途 Payload 表示的内存占用和生成速度')
+    p.add_argument('-n', type=int, default=300000, help='组合数量')
+    p.set_defaults(func=bench_payloads)
+
+    p = sub.add_parser('templates', help='build_request_data vs 预编译请求模板')
+    p.add_argument('-n', type=int, default=200000, help='Payload 数量')
+    p.set_defaults(func=bench_templates)
+
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"{S.CYAN}[*] bench: {args.bench}{S.RESET}")
+    args.func(args)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ctf_brute_v6 本地模拟靶机
+
+纯 asyncio 实现的登录题替身, 不依赖真实 CTF 环境就能测爆破工具本身的速度和正确性:
+  - 表单 / JSON / GET 三种提交方式
+  - 固定延迟 + 随机抖动, 可调失败页大小, 可选每次变化的 token (测智能模式)
+  - 隐藏的正确凭据, 密码可按 明文 / md5 / base64("user:pass") 校验
+  - 错误注入: 500 / 503 / 429 / 断开连接 / 卡顿
+  - 多进程共享端口 (SO_REUSEPORT), 避免靶机先于工具成为瓶颈
+
+使用示例:
+    python tools/ctf_brute_target.py --port 8000 --mode form --check md5 --secret hunter2
+    python tools/ctf_brute_target.py --port 8000 --latency 0.01 --jitter 0.005 --error-rate 0.01 --errors 500,drop
+"""
+
+import asyncio
+import argparse
+import base64
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import random
+import secrets
+import socket
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              ⚙️ 靶机配置
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class TargetConfig:
+    """模拟靶机配置"""
+
+    host: str = "127.0.0.1"
+    port: int = 8000
+    procs: int = 1              # 进程数 (>1 时共享端口)
+
+    # ═══════════ 题目 ═══════════
+    mode: str = "form"          # form / json / get
+    username: str = "admin"
+    secret: str = "hunter2"     # 正确密码 (明文)
+    check: str = "plain"        # plain / md5 / base64 (password 字段为 base64("username:secret"))
+    flag: str = "flag{local_target_ok}"
+
+    # ═══════════ 响应 ═══════════
+    latency: float = 0.0        # 固定延迟(秒)
+    jitter: float = 0.0         # 额外随机延迟 [0, jitter)
+    body_size: int = 512        # 失败页大小(字节)
+    dynamic: bool = False       # 失败页带每次不同的 token 并回显用户名
+    enum_users: bool = False    # 用户名不对时提示"用户不存在" (可枚举用户名)
+
+    # ═══════════ 错误注入 ═══════════
+    error_rate: float = 0.0     # 注入错误的请求比例
+    errors: List[str] = field(default_factory=lambda: ["500"])  # 500 / 503 / 429 / drop / stall
+    stall_time: float = 1.0     # stall 错误的卡顿时长(秒)
+
+    def expected_password(self) -> str:
+        """password 字段应提交的值"""
+        if self.check == "md5":
+            return hashlib.md5(self.secret.encode()).hexdigest()
+        if self.check == "base64":
+            return base64.b64encode(f"{self.username}:{self.secret}".encode()).decode()
+        return self.secret
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🎯 模拟靶机
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_REASONS = {200: "OK", 400: "Bad Request", 429: "Too Many Requests",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+
+class LoginTarget:
+    """
+    HTTP/1.1 登录题替身
+
+    每条连接顺序处理请求 (keep-alive, 客户端流水线也按顺序应答);
+    只解析请求行和 Content-Length, 够爆破工具用即可。
+    """
+
+    def __init__(self, config: TargetConfig):
+        self.config = config
+        self.expected = config.expected_password()
+        pad = max(0, config.body_size - 160)
+        self._fail_tail = ("<!-- " + "x" * max(0, pad - 9) + " -->" if pad else "") + "</body></html>"
+
+    def _respond(self, status: int, body: bytes, extra: str = "") -> bytes:
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+                f"Content-Type: text/html; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n{extra}\r\n")
+        return head.encode() + body
+
+    def _fields(self, target: str, body: bytes) -> Dict[str, str]:
+        """按靶机模式取出提交的字段"""
+        mode = self.config.mode
+        if mode == "get":
+            return dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(target).query, keep_blank_values=True))
+        if mode == "json":
+            data = json.loads(body or b"{}")
+            return {k: str(v) for k, v in data.items()} if isinstance(data, dict) else {}
+        return dict(urllib.parse.parse_qsl(body.decode("utf-8", "replace"), keep_blank_values=True))
+
+    def login(self, fields: Dict[str, str]) -> bytes:
+        """校验凭据, 返回完整响应"""
+        user = fields.get("username", "")
+        if user == self.config.username and fields.get("password") == self.expected:
+            body = f"<html><body><h1>登录成功</h1><p>{self.config.flag}</p></body></html>"
+            return self._respond(200, body.encode())
+        if self.config.enum_users and user != self.config.username:
+            body = f"<html><body><h1>登录</h1><p>用户不存在</p>{self._fail_tail}"
+            return self._respond(200, body.encode())
+        extra = ""
+        if self.config.dynamic:
+            extra = f'<input type="hidden" name="token" value="{secrets.token_hex(16)}"><p>{user}</p>'
+        body = f"<html><body><h1>登录</h1><p>用户名或密码错误</p>{extra}{self._fail_tail}"
+        return self._respond(200, body.encode())
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """一条连接: 顺序读请求 → 注入错误/延迟 → 应答"""
+        config = self.config
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                target = (lines[0].split(" ") + ["", ""])[1]
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+
+                error = random.choice(config.errors) if random.random() < config.error_rate else None
+                if error == "drop":
+                    writer.transport.abort()
+                    return
+                delay = config.latency + (random.random() * config.jitter if config.jitter else 0.0)
+                if error == "stall":
+                    delay = config.stall_time
+                if delay:
+                    await asyncio.sleep(delay)
+
+                if error in ("500", "503", "429"):
+                    status = int(error)
+                    extra = "Retry-After: 1\r\n" if status != 500 else ""
+                    response = self._respond(status, _REASONS[status].encode(), extra)
+                else:
+                    try:
+                        response = self.login(self._fields(target, body))
+                    except ValueError:
+                        response = self._respond(400, b"bad request")
+                writer.write(response)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        """运行直到被取消"""
+        server = await asyncio.start_server(self.handle, self.config.host, self.config.port,
+                                            reuse_port=self.config.procs > 1, limit=1 << 18)
+        async with server:
+            await server.serve_forever()
+
+def _serve_process(config: TargetConfig):
+    """子进程入口"""
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(LoginTarget(config).serve())
+
+def _wait_port(host: str, port: int, timeout: float = 10.0):
+    """等靶机开始监听"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with contextlib.suppress(OSError), socket.create_connection((host, port), timeout=0.2):
+            return
+        time.sleep(0.05)
+    raise TimeoutError(f"模拟靶机没有在 {timeout:g}s 内启动: {host}:{port}")
+
+@contextlib.contextmanager
+def running_target(config: TargetConfig):
+    """在子进程中运行模拟靶机, 产出 URL; procs > 1 时多个进程共享端口"""
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_serve_process, args=(config,), daemon=True)
+             for _ in range(max(1, config.procs))]
+    for proc in procs:
+        proc.start()
+    try:
+        _wait_port(config.host, config.port)
+        yield f"http://{config.host}:{config.port}/login"
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.join()
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🎯 主程序
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def parse_args() -> TargetConfig:
+    parser = argparse.ArgumentParser(description='ctf_brute_v6 本地模拟靶机')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--procs', type=int, default=1, help='进程数 (共享端口)')
+    parser.add_argument('--mode', choices=['form', 'json', 'get'], default='form', help='提交方式')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--secret', default='hunter2', help='正确密码 (明文)')
+    parser.add_argument('--check', choices=['plain', 'md5', 'base64'], default='plain',
+                        help='password 字段的校验方式 (base64 为 base64("username:secret"))')
+    parser.add_argument('--flag', default='flag{local_target_ok}')
+    parser.add_argument('--latency', type=float, default=0.0, help='固定延迟(秒)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='额外随机延迟上限(秒)')
+    parser.add_argument('--body-size', type=int, default=512, help='失败页大小(字节)')
+    parser.add_argument('--dynamic', action='store_true', help='失败页带随机 token 并回显用户名')
+    parser.add_argument('--enum-users', action='store_true', help='用户名不对时提示"用户不存在"')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='注入错误的请求比例')
+    parser.add_argument('--errors', default='500', help='注入的错误类型, 逗号分隔: 500,503,429,drop,stall')
+    parser.add_argument('--stall-time', type=float, default=1.0, help='stall 错误的卡顿时长(秒)')
+    args = parser.parse_args()
+    return TargetConfig(
+        host=args.host, port=args.port, procs=args.procs, mode=args.mode,
+        username=args.username, secret=args.secret, check=args.check, flag=args.flag,
+        latency=args.latency, jitter=args.jitter, body_size=args.body_size, dynamic=args.dynamic,
+        enum_users=args.enum_users,
+        error_rate=args.error_rate, errors=args.errors.split(','), stall_time=args.stall_time,
+    )
+
+if __name__ == "__main__":
+    config = parse_args()
+    print(f"[*] 模拟靶机 http://{config.host}:{config.port}/  mode={config.mode} check={config.check} "
+          f"user={config.username} procs={config.procs}")
+    if config.procs > 1:
+        with running_target(config):
+            with contextlib.suppress(KeyboardInterrupt):
+                while True:
+                    time.sleep(3600)
+    else:
+        _serve_process(config)
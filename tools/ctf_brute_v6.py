@@ -30,6 +30,7 @@ GitHub: https://github.com/YOUR_USERNAME/ctf-web-solver
 
 import asyncio
 import aiohttp
+import yarl
 import time
 import sys
 import os
@@ -39,11 +40,35 @@ import base64
 import hashlib
 import urllib.parse
 import argparse
-from typing import List, Dict, Optional, Callable, Tuple, Any
+import dataclasses
+import multiprocessing
+import concurrent.futures
+from typing import List, Dict, Optional, Callable, Tuple, Any, Iterator, Iterable, Sequence
 from dataclasses import dataclass, field
 from datetime import datetime
 from collections import deque
 import itertools
+import heapq
+import math
+import random
+import statistics
+import string
+import contextlib
+import mmap
+import array
+import atexit
+import bisect
+import bz2
+import gzip
+import lzma
+import queue
+import tempfile
+import threading
+import shutil
+import signal
+import struct
+import ssl
+import zlib
 
 # ═══════════════════════════════════════════════════════════════════════════════
 #                              🎨 终端样式系统
@@ -96,6 +121,42 @@ def clear_line():
 #                           🔧 Payload 处理器系统
 # ═══════════════════════════════════════════════════════════════════════════════
 
+class Processor:
+    """
+    单个处理器: 可调用对象 + 稳定标识
+    
+    name/args 唯一确定处理逻辑, 用于:
+    - 描述 (desc)
+    - 缓存键 (key), 自定义函数无法保证稳定, 不参与缓存
+    - pickle (按 name/args 重新构造, 不序列化 lambda)
+    """
+    
+    __slots__ = ('name', 'args', 'func', 'desc', 'cacheable')
+    
+    def __init__(self, name: str, args: tuple, func: Callable[[str], str], desc: str,
+                 cacheable: bool = True):
+        self.name = name
+        self.args = args
+        self.func = func
+        self.desc = desc
+        self.cacheable = cacheable
+    
+    def __call__(self, value: str) -> str:
+        return self.func(value)
+    
+    def __repr__(self) -> str:
+        return f"P.{self.name}{self.args!r}"
+    
+    def __reduce__(self):
+        if self.name == "custom":
+            return (PayloadProcessor.custom, (self.func,))
+        return (getattr(PayloadProcessor, self.name), self.args)
+    
+    @property
+    def key(self) -> Optional[list]:
+        """可 JSON 序列化的稳定标识"""
+        return [self.name, list(self.args)] if self.cacheable else None
+
 class PayloadProcessor:
     """
     Payload 处理器
@@ -117,104 +178,110 @@ class PayloadProcessor:
     """
     
     @staticmethod
-    def prefix(text: str) -> Callable[[str], str]:
+    def prefix(text: str) -> "Processor":
         """添加前缀: prefix("admin:") -> "admin:password" """
-        return lambda x: f"{text}{x}"
+        return Processor("prefix", (text,), lambda x: f"{text}{x}", f"添加'{text}'")
     
     @staticmethod
-    def suffix(text: str) -> Callable[[str], str]:
+    def suffix(text: str) -> "Processor":
         """添加后缀: suffix("@123") -> "password@123" """
-        return lambda x: f"{x}{text}"
+        return Processor("suffix", (text,), lambda x: f"{x}{text}", f"添加'{text}'")
     
     @staticmethod
-    def base64_encode() -> Callable[[str], str]:
+    def base64_encode() -> "Processor":
         """Base64 编码"""
-        return lambda x: base64.b64encode(x.encode()).decode()
+        return Processor("base64_encode", (), lambda x: base64.b64encode(x.encode()).decode(),
+                         'Base64编码')
     
     @staticmethod
-    def base64_decode() -> Callable[[str], str]:
+    def base64_decode() -> "Processor":
         """Base64 解码"""
-        return lambda x: base64.b64decode(x.encode()).decode()
+        return Processor("base64_decode", (), lambda x: base64.b64decode(x.encode()).decode(),
+                         'Base64解码')
     
     @staticmethod
-    def md5() -> Callable[[str], str]:
+    def md5() -> "Processor":
         """MD5 哈希 (32位)"""
-        return lambda x: hashlib.md5(x.encode()).hexdigest()
+        return Processor("md5", (), lambda x: hashlib.md5(x.encode()).hexdigest(), 'MD5')
     
     @staticmethod
-    def md5_16() -> Callable[[str], str]:
+    def md5_16() -> "Processor":
         """MD5 哈希 (16位)"""
-        return lambda x: hashlib.md5(x.encode()).hexdigest()[8:24]
+        return Processor("md5_16", (), lambda x: hashlib.md5(x.encode()).hexdigest()[8:24],
+                         'MD5(16位)')
     
     @staticmethod
-    def sha1() -> Callable[[str], str]:
+    def sha1() -> "Processor":
         """SHA1 哈希"""
-        return lambda x: hashlib.sha1(x.encode()).hexdigest()
+        return Processor("sha1", (), lambda x: hashlib.sha1(x.encode()).hexdigest(), 'SHA1')
     
     @staticmethod
-    def sha256() -> Callable[[str], str]:
+    def sha256() -> "Processor":
         """SHA256 哈希"""
-        return lambda x: hashlib.sha256(x.encode()).hexdigest()
+        return Processor("sha256", (), lambda x: hashlib.sha256(x.encode()).hexdigest(), 'SHA256')
     
     @staticmethod
-    def url_encode() -> Callable[[str], str]:
+    def url_encode() -> "Processor":
         """URL 编码"""
-        return lambda x: urllib.parse.quote(x)
+        return Processor("url_encode", (), lambda x: urllib.parse.quote(x), 'URL编码')
     
     @staticmethod
-    def url_encode_all() -> Callable[[str], str]:
+    def url_encode_all() -> "Processor":
         """URL 编码 (全部字符)"""
-        return lambda x: urllib.parse.quote(x, safe='')
+        return Processor("url_encode_all", (), lambda x: urllib.parse.quote(x, safe=''), 'URL编码(全部)')
     
     @staticmethod
-    def url_decode() -> Callable[[str], str]:
+    def url_decode() -> "Processor":
         """URL 解码"""
-        return lambda x: urllib.parse.unquote(x)
+        return Processor("url_decode", (), lambda x: urllib.parse.unquote(x), 'URL解码')
     
     @staticmethod
-    def upper() -> Callable[[str], str]:
+    def upper() -> "Processor":
         """转大写"""
-        return lambda x: x.upper()
+        return Processor("upper", (), lambda x: x.upper(), '大写')
     
     @staticmethod
-    def lower() -> Callable[[str], str]:
+    def lower() -> "Processor":
         """转小写"""
-        return lambda x: x.lower()
+        return Processor("lower", (), lambda x: x.lower(), '小写')
     
     @staticmethod
-    def reverse() -> Callable[[str], str]:
+    def reverse() -> "Processor":
         """反转字符串"""
-        return lambda x: x[::-1]
+        return Processor("reverse", (), lambda x: x[::-1], '反转')
     
     @staticmethod
-    def repeat(n: int) -> Callable[[str], str]:
+    def repeat(n: int) -> "Processor":
         """重复 n 次"""
-        return lambda x: x * n
+        return Processor("repeat", (n,), lambda x: x * n, f'重复{n}次')
     
     @staticmethod
-    def replace(old: str, new: str) -> Callable[[str], str]:
+    def replace(old: str, new: str) -> "Processor":
         """替换字符串"""
-        return lambda x: x.replace(old, new)
+        return Processor("replace", (old, new), lambda x: x.replace(old, new), f"替换'{old}'")
     
     @staticmethod
-    def substring(start: int, end: int = None) -> Callable[[str], str]:
+    def substring(start: int, end: int = None) -> "Processor":
         """截取子串"""
-        return lambda x: x[start:end]
+        return Processor("substring", (start, end), lambda x: x[start:end], f'截取[{start}:{end}]')
     
     @staticmethod
-    def pad_left(length: int, char: str = '0') -> Callable[[str], str]:
+    def pad_left(length: int, char: str = '0') -> "Processor":
         """左填充: pad_left(4, '0') -> "0001" """
-        return lambda x: x.zfill(length) if char == '0' else x.rjust(length, char)
+        return Processor("pad_left", (length, char),
+                         lambda x: x.zfill(length) if char == '0' else x.rjust(length, char),
+                         f'左填充{length}')
     
     @staticmethod
-    def pad_right(length: int, char: str = ' ') -> Callable[[str], str]:
+    def pad_right(length: int, char: str = ' ') -> "Processor":
         """右填充"""
-        return lambda x: x.ljust(length, char)
+        return Processor("pad_right", (length, char), lambda x: x.ljust(length, char), f'右填充{length}')
     
     @staticmethod
-    def custom(func: Callable[[str], str]) -> Callable[[str], str]:
+    def custom(func: Callable[[str], str]) -> "Processor":
         """自定义处理函数"""
-        return func
+        name = getattr(func, '__qualname__', repr(func))
+        return Processor("custom", (name,), func, "自定义", cacheable=False)
 
 # 简写
 P = PayloadProcessor
@@ -228,45 +295,976 @@ def apply_processors(value: str, processors: List[Callable]) -> str:
 
 def describe_processors(processors: List[Callable]) -> str:
     """获取处理器描述"""
-    names = []
-    for p in processors:
-        # 尝试从闭包获取信息
-        closure = getattr(p, '__closure__', None)
-        if closure and len(closure) > 0:
-            val = closure[0].cell_contents
-            if isinstance(val, str):
-                if 'prefix' in p.__qualname__ or 'suffix' in p.__qualname__:
-                    names.append(f"添加'{val}'")
+    names = [p.desc if isinstance(p, Processor) else '处理' for p in processors]
+    return ' → '.join(names) if names else '无'
+
+def processors_key(processors: List[Callable]) -> Optional[str]:
+    """处理器链的稳定序列化, 链中有自定义函数时返回 None"""
+    keys = [p.key if isinstance(p, Processor) else None for p in processors]
+    if any(k is None for k in keys):
+        return None
+    return json.dumps(keys, ensure_ascii=False, separators=(',', ':'))
+
+# 可合并前缀状态的哈希处理器: 名称 -> (hashlib 构造函数, 截取范围)
+_HASH_PROCESSORS = {
+    "md5": (hashlib.md5, None),
+    "md5_16": (hashlib.md5, slice(8, 24)),
+    "sha1": (hashlib.sha1, None),
+    "sha256": (hashlib.sha256, None),
+}
+
+def compile_batch(processors: List[Callable]) -> Callable[[List[str]], List[Optional[str]]]:
+    """
+    把处理器链编译成批处理函数 (list in, list out, 失败的值为 None)
+    
+    链开头的 prefix/suffix + 哈希会合并: 前缀只喂给 hashlib 一次,
+    每个值从 .copy() 出来的状态继续, 不必对每个候选重复哈希前缀。
+    """
+    procs = list(processors)
+    head = 0
+    pre, suf = "", ""
+    while head < len(procs) and isinstance(procs[head], Processor) and procs[head].name in ("prefix", "suffix"):
+        if procs[head].name == "prefix":
+            pre = procs[head].args[0] + pre
+        else:
+            suf = suf + procs[head].args[0]
+        head += 1
+    
+    if not (head < len(procs) and isinstance(procs[head], Processor) and procs[head].name in _HASH_PROCESSORS):
+        def run_chain(values: List[str]) -> List[Optional[str]]:
+            out = []
+            for val in values:
+                try:
+                    out.append(apply_processors(val, procs))
+                except Exception:
+                    out.append(None)
+            return out
+        return run_chain
+    
+    constructor, cut = _HASH_PROCESSORS[procs[head].name]
+    base = constructor(pre.encode())
+    suf_bytes = suf.encode()
+    rest = procs[head + 1:]
+    
+    def run_hash(values: List[str]) -> List[Optional[str]]:
+        out = []
+        for val in values:
+            try:
+                h = base.copy()
+                h.update(val.encode())
+                if suf_bytes:
+                    h.update(suf_bytes)
+                digest = h.hexdigest()
+                if cut is not None:
+                    digest = digest[cut]
+                if rest:
+                    digest = apply_processors(digest, rest)
+            except Exception:
+                digest = None
+            out.append(digest)
+        return out
+    return run_hash
+
+def process_chunk(values: List[str], processors: List[Callable]) -> List[Optional[str]]:
+    """进程池任务: 对一块值批量应用处理器链"""
+    return compile_batch(processors)(values)
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              📚 Payload 来源
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class PayloadSource:
+    """
+    单个爆破位置的值来源
+    
+    只保存生成规则, 不物化全部值:
+    - len()  : 值的数量 (用于计算总组合数)
+    - iter() : 按顺序惰性产出原始值, 可重复迭代
+    """
+    
+    def __len__(self) -> int:
+        raise NotImplementedError
+    
+    def __iter__(self) -> Iterator[str]:
+        raise NotImplementedError
+    
+    def iter_from(self, start: int) -> Iterator[str]:
+        """从第 start 个值开始迭代"""
+        return itertools.islice(iter(self), start, None)
+    
+    def __getitem__(self, index: int) -> str:
+        for val in self.iter_from(index):
+            return val
+        raise IndexError(index)
+
+class ListSource(PayloadSource):
+    """固定列表: {"type": "list", "values": [...]}"""
+    
+    def __init__(self, values: List):
+        self.values = [str(v) for v in values]
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.values)
+    
+    def __getitem__(self, index: int) -> str:
+        return self.values[index]
+
+class RangeSource(PayloadSource):
+    """数字范围: {"type": "range", "start": 0, "end": 100, "step": 1, "format": "{}"}"""
+    
+    def __init__(self, start: int = 0, end: int = 100, step: int = 1, fmt: str = "{}"):
+        self.range = range(start, end + 1, step)
+        self.fmt = fmt
+    
+    def __len__(self) -> int:
+        return len(self.range)
+    
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_from(0)
+    
+    def iter_from(self, start: int) -> Iterator[str]:
+        fmt = self.fmt
+        return (fmt.format(i) for i in self.range[start:])
+    
+    def __getitem__(self, index: int) -> str:
+        return self.fmt.format(self.range[index])
+
+class WordlistIndex:
+    """
+    mmap 字典 + 行偏移索引
+    
+    索引是 (起始, 结束) 字节偏移数组, 只记录非空行 (与原来逐行 strip() 跳过空行一致),
+    保存在字典旁边的 .idx 文件里 (目录不可写时只留在内存)。
+    - len()          O(1)
+    - [i]            O(1) 随机访问, 用于分片/续跑
+    - iter_from(a,b) 按区间顺序读取, 不物化列表
+    """
+    
+    MAGIC = b"CTFWI001"
+    HEADER = struct.Struct("=8sQQQ")  # magic, 文件大小, mtime_ns, 行数
+    
+    _memo: Dict[Tuple[str, int, int], "WordlistIndex"] = {}
+    
+    def __init__(self, path: str, mm: Optional[mmap.mmap], offsets):
+        self.path = path
+        self._mm = mm
+        self._offsets = offsets  # array('Q') 或 memoryview.cast('Q'), 交替存放起止偏移
+        self.count = len(offsets) // 2
+    
+    @classmethod
+    def open(cls, path: str) -> "WordlistIndex":
+        """打开字典, 优先复用内存/磁盘上的索引"""
+        st = os.stat(path)
+        ident = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        index = cls._memo.get(ident)
+        if index is None:
+            index = cls._load(path, st) or cls._build(path, st)
+            cls._memo[ident] = index
+        return index
+    
+    @staticmethod
+    def _map(path: str) -> Optional[mmap.mmap]:
+        if os.path.getsize(path) == 0:
+            return None  # 空文件无法 mmap
+        with open(path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    @classmethod
+    def _load(cls, path: str, st: os.stat_result) -> Optional["WordlistIndex"]:
+        """读取磁盘索引, 文件大小/mtime 不符时视为失效"""
+        try:
+            with open(path + ".idx", 'rb') as f:
+                idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        magic, size, mtime, count = cls.HEADER.unpack_from(idx, 0)
+        if (magic, size, mtime) != (cls.MAGIC, st.st_size, st.st_mtime_ns) or \
+                len(idx) != cls.HEADER.size + 16 * count:
+            idx.close()
+            return None
+        offsets = memoryview(idx)[cls.HEADER.size:].cast('Q')
+        return cls(path, cls._map(path), offsets)
+    
+    @classmethod
+    def _build(cls, path: str, st: os.stat_result) -> "WordlistIndex":
+        """扫描一遍字典建立索引, 并尽量写到字典旁边"""
+        mm = cls._map(path)
+        offsets = array.array('Q')
+        if mm is not None:
+            append, find, size, pos = offsets.append, mm.find, len(mm), 0
+            while pos < size:
+                end = find(b'\n', pos)
+                if end < 0:
+                    end = size
+                stripped = mm[pos:end].strip()
+                # 非 ASCII 行要按 errors='ignore' 解码后再判断是否为空
+                if stripped and (stripped.isascii() or stripped.decode('utf-8', 'ignore').strip()):
+                    append(pos)
+                    append(end)
+                pos = end + 1
+        cls.save(path, st, offsets)
+        return cls(path, mm, offsets)
+    
+    @classmethod
+    def save(cls, path: str, st: os.stat_result, offsets: array.array):
+        """把索引写到字典旁边 (也供已知行偏移的生成方直接使用, 省去重新扫描)"""
+        tmp = f"{path}.idx.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(cls.HEADER.pack(cls.MAGIC, st.st_size, st.st_mtime_ns, len(offsets) // 2))
+                offsets.tofile(f)
+            os.replace(tmp, path + ".idx")
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __getitem__(self, i: int) -> str:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return self._mm[self._offsets[2 * i]:self._offsets[2 * i + 1]].decode('utf-8', 'ignore').strip()
+    
+    def iter_from(self, start: int, stop: Optional[int] = None) -> Iterator[str]:
+        stop = self.count if stop is None else min(stop, self.count)
+        mm, offsets = self._mm, self._offsets
+        for i in range(2 * start, 2 * stop, 2):
+            yield mm[offsets[i]:offsets[i + 1]].decode('utf-8', 'ignore').strip()
+
+class FileSource(PayloadSource):
+    """字典文件: {"type": "file", "path": "rockyou.txt"}, 跳过空行"""
+    
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"字典文件不存在: {path}")
+        self.path = path
+        self.index = WordlistIndex.open(path)
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def __iter__(self) -> Iterator[str]:
+        return self.index.iter_from(0)
+    
+    def iter_from(self, start: int) -> Iterator[str]:
+        return self.index.iter_from(start)
+    
+    def __getitem__(self, index: int) -> str:
+        return self.index[index]
+
+_MASK_CHARSETS = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "h": "0123456789abcdef",
+    "H": "0123456789ABCDEF",
+    "s": " " + string.punctuation,
+    # ?b 是 U+0000..U+00FF 这 256 个 Latin-1 码位, 不是原始字节: 载荷一律按 UTF-8 编码发送,
+    # 0x80 以上的码位会变成两个字节 (如 "\xff" -> C3 BF)
+    "b": "".join(map(chr, range(256))),
+}
+_MASK_CHARSETS["a"] = _MASK_CHARSETS["l"] + _MASK_CHARSETS["u"] + _MASK_CHARSETS["d"] + _MASK_CHARSETS["s"]
+
+def _mask_tokens(text: str, custom: Dict[str, str]) -> Iterator[str]:
+    """逐个位置产出字符集: ?X 查内置/自定义字符集, ?? 为问号, 其它字符原样"""
+    chars = iter(text)
+    for ch in chars:
+        if ch != "?":
+            yield ch
+            continue
+        key = next(chars, None)
+        if key == "?":
+            yield "?"
+        elif key in _MASK_CHARSETS:
+            yield _MASK_CHARSETS[key]
+        elif key in custom:
+            yield custom[key]
+        else:
+            raise ValueError(f"未知的掩码字符集: ?{key or ''} (in {text!r})")
+
+class MaskSource(PayloadSource):
+    """
+    掩码 (hashcat 语法): {"type": "mask", "mask": "?u?l?l?d?d", "charsets": {"1": "?l?d_"}, "min_length": 3}
+    
+    ?l ?u ?d ?h ?H ?s ?a ?b 为内置字符集, ?1 ?2 … 为 charsets 里的自定义字符集, ?? 为问号;
+    ?b 为 Latin-1 码位 0-255, 和其它载荷一样按 UTF-8 编码, 0x80 以上每位会发出两个字节。
+    min_length / max_length 按掩码位数计, 小于全长时为递增模式, 依次跑各长度的前缀。
+    总数按各位置字符集大小相乘求和; 第 i 个值按混合进制直接算出, 不用枚举前面的值。
+    """
+    
+    TAIL_CACHE = 1 << 16
+    
+    def __init__(self, mask: str, charsets: Optional[Dict[str, str]] = None,
+                 min_length: Optional[int] = None, max_length: Optional[int] = None):
+        custom = {str(key): "".join(dict.fromkeys("".join(_mask_tokens(value, {}))))
+                  for key, value in (charsets or {}).items()}
+        self.mask = mask
+        self.positions = ["".join(dict.fromkeys(token)) for token in _mask_tokens(mask, custom)]
+        if not self.positions or not all(self.positions):
+            raise ValueError(f"掩码为空或含空字符集: {mask!r}")
+        n = len(self.positions)
+        hi = n if max_length is None else max(1, min(max_length, n))
+        lo = hi if min_length is None else max(1, min(min_length, hi))
+        # 每个长度一段, 段内按混合进制排列 (最后一位变化最快)
+        self._lengths = list(range(lo, hi + 1))
+        self._starts: List[int] = []
+        count = 0
+        for length in self._lengths:
+            self._starts.append(count)
+            count += math.prod(len(charset) for charset in self.positions[:length])
+        self._count = count
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_from(0)
+    
+    def iter_from(self, start: int) -> Iterator[str]:
+        if start >= self._count:
+            return iter(())
+        block = bisect.bisect_right(self._starts, start) - 1
+        offsets = [start - self._starts[block]] + [0] * (len(self._lengths) - block - 1)
+        return itertools.chain.from_iterable(
+            self._iter_length(length, offset) for length, offset in zip(self._lengths[block:], offsets))
+    
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        block = bisect.bisect_right(self._starts, index) - 1
+        length = self._lengths[block]
+        digits = self._digits(length, index - self._starts[block])
+        return "".join(charset[d] for charset, d in zip(self.positions, digits))
+    
+    def _digits(self, length: int, offset: int) -> List[int]:
+        """段内序号 → 各位置的字符下标"""
+        digits = [0] * length
+        for i in range(length - 1, -1, -1):
+            offset, digits[i] = divmod(offset, len(self.positions[i]))
+        return digits
+    
+    def _iter_length(self, length: int, offset: int) -> Iterator[str]:
+        """从段内第 offset 个值开始: 先补完起点各位之后的部分, 再整块交给 itertools.product"""
+        charsets = self.positions[:length]
+        digits = self._digits(length, offset)
+        last = length - 1
+        for depth in range(last, -1, -1):
+            head = "".join(charset[d] for charset, d in zip(charsets[:depth], digits))
+            first = digits[depth] + (depth < last)
+            if depth == last:
+                yield from map(head.__add__, charsets[depth][first:])
+                continue
+            rest = charsets[depth + 1:]
+            # 尾部组合不多时只拼一次, 后面每个前缀复用; 否则每个前缀惰性重新生成
+            small = math.prod(map(len, rest)) <= self.TAIL_CACHE
+            tails = list(map("".join, itertools.product(*rest))) if small and first < len(charsets[depth]) else None
+            for ch in charsets[depth][first:]:
+                yield from map((head + ch).__add__, tails if small else map("".join, itertools.product(*rest)))
+
+def _rule_position(ch: str) -> int:
+    """规则位置参数: 0-9, A-Z 表示 10-35"""
+    if ch.isdigit():
+        return int(ch)
+    if "A" <= ch <= "Z":
+        return ord(ch) - ord("A") + 10
+    raise ValueError(f"规则位置参数无效: {ch!r}")
+
+# 规则函数: 名称 → (参数类型, 构造函数); 参数类型 N 为位置, X 为字符
+_RULE_FUNCS: Dict[str, Tuple[str, Callable[..., Callable[[str], str]]]] = {
+    ":": ("", lambda: None),
+    "l": ("", lambda: str.lower),
+    "u": ("", lambda: str.upper),
+    "c": ("", lambda: str.capitalize),
+    "C": ("", lambda: lambda w: w[:1].lower() + w[1:].upper()),
+    "t": ("", lambda: str.swapcase),
+    "T": ("N", lambda n: lambda w: w[:n] + w[n:n + 1].swapcase() + w[n + 1:]),
+    "r": ("", lambda: lambda w: w[::-1]),
+    "d": ("", lambda: lambda w: w + w),
+    "p": ("N", lambda n: lambda w: w * (n + 1)),
+    "f": ("", lambda: lambda w: w + w[::-1]),
+    "{": ("", lambda: lambda w: w[1:] + w[:1]),
+    "}": ("", lambda: lambda w: w[-1:] + w[:-1]),
+    "$": ("X", lambda x: lambda w: w + x),
+    "^": ("X", lambda x: lambda w: x + w),
+    "[": ("", lambda: lambda w: w[1:]),
+    "]": ("", lambda: lambda w: w[:-1]),
+    "D": ("N", lambda n: lambda w: w[:n] + w[n + 1:]),
+    "'": ("N", lambda n: lambda w: w[:n]),
+    "s": ("XX", lambda x, y: lambda w: w.replace(x, y)),
+    "@": ("X", lambda x: lambda w: w.replace(x, "")),
+    "z": ("N", lambda n: lambda w: w[:1] * n + w),
+    "Z": ("N", lambda n: lambda w: w + w[-1:] * n),
+}
+
+def _identity(word: str) -> str:
+    return word
+
+def compile_rule(text: str) -> Callable[[str], str]:
+    """
+    编译一条规则 (hashcat 规则语法的常用子集), 返回 word → 变形后的 word
+    
+    大小写: l u c C t TN | 追加/前插: $X ^X | 替换/删除: sXY @X [ ] DN 'N
+    其它: : r d pN f { } zN ZN; 函数之间的空格忽略。leet 写成替换链, 如 "sa@se3so0"
+    """
+    funcs = []
+    i = 0
+    while i < len(text):
+        name = text[i]
+        i += 1
+        if name == " ":
+            continue
+        if name not in _RULE_FUNCS:
+            raise ValueError(f"不支持的规则函数 {name!r}: {text!r}")
+        kinds, factory = _RULE_FUNCS[name]
+        args = text[i:i + len(kinds)]
+        if len(args) < len(kinds):
+            raise ValueError(f"规则函数 {name!r} 缺少参数: {text!r}")
+        i += len(kinds)
+        func = factory(*(_rule_position(a) if kind == "N" else a for kind, a in zip(kinds, args)))
+        if func is not None:
+            funcs.append(func)
+    if not funcs:
+        return _identity
+    if len(funcs) == 1:
+        return funcs[0]
+    
+    def apply(word: str) -> str:
+        for func in funcs:
+            word = func(word)
+        return word
+    return apply
+
+class RulesSource(PayloadSource):
+    """
+    字典 + 规则: {"type": "rules", "path": "top1k.txt", "rules": [":", "c", "$1", "c$1$2$3", "sa@so0"]}
+    
+    基础词也可用 "values" 给出, 规则也可放在 "rules_file" (.rule 文件, # 开头为注释)。
+    总数 = 词数 × 规则数, 每个词依次套全部规则; 第 i 个值是第 i // 规则数 个词套第 i % 规则数 条规则。
+    """
+    
+    def __init__(self, words: PayloadSource, rules: List[str]):
+        if not rules:
+            raise ValueError("规则列表为空")
+        self.words = words
+        self.rules = list(rules)
+        self._funcs = [compile_rule(rule) for rule in rules]
+    
+    @staticmethod
+    def read_rules(path: str) -> List[str]:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"规则文件不存在: {path}")
+        with open(path, encoding="utf-8", errors="replace") as f:
+            lines = (line.rstrip("\r\n") for line in f)
+            return [line for line in lines if line.strip() and not line.startswith("#")]
+    
+    def __len__(self) -> int:
+        return len(self.words) * len(self._funcs)
+    
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_from(0)
+    
+    def iter_from(self, start: int) -> Iterator[str]:
+        funcs = self._funcs
+        word_index, rule_index = divmod(start, len(funcs))
+        words = self.words.iter_from(word_index)
+        for word in words:
+            for func in funcs[rule_index:]:
+                yield func(word)
+            break
+        for word in words:
+            for func in funcs:
+                yield func(word)
+    
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        word_index, rule_index = divmod(index, len(self._funcs))
+        return self._funcs[rule_index](self.words[word_index])
+
+_DECOMPRESSORS: Dict[str, Callable] = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open, ".lzma": lzma.open}
+
+def is_compressed(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in _DECOMPRESSORS
+
+def _read_blocks(paths: List[str], out: "queue.Queue", stop: threading.Event, consumed: List[int],
+                 block_size: int = 1 << 20):
+    """
+    后台线程: 按顺序读取 (并解压) 各字典, 以整行为边界切块放进有界队列, 结束放 None, 出错放异常
+    consumed[0] 随时更新为已读的输入文件字节数 (压缩文件按压缩后大小), 用于显示合并进度
+    """
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    try:
+        done = 0
+        for path in paths:
+            decompress = _DECOMPRESSORS.get(os.path.splitext(path)[1].lower())
+            with open(path, 'rb') as raw, (decompress(raw, 'rb') if decompress else raw) as f:
+                tail = b""
+                for chunk in iter(lambda: f.read(block_size), b""):
+                    consumed[0] = done + raw.tell()
+                    chunk = tail + chunk
+                    cut = chunk.rfind(b"\n") + 1
+                    tail = chunk[cut:]
+                    if cut and not put(chunk[:cut]):
+                        return
+                if tail and not put(tail):
+                    return
+            done += os.path.getsize(path)
+            consumed[0] = done
+        put(None)
+    except BaseException as e:
+        put(e)
+
+class DedupFilter:
+    """
+    内存有上限的去重集合
+    
+    先用精确集合存值的 64 位哈希; 超过 exact_max 条后整体转入分块 Bloom 过滤器
+    (k 个位落在同一个 64 位字里, 掩码查表得到, 每个值只读写一次内存),
+    之后内存固定为 bloom_bytes, 代价是极少量新值被误判为重复 (k 按预估总数选)。
+    """
+    
+    MASKS = 1 << 16             # 掩码表大小, 取哈希低 16 位查表
+    
+    _mask_tables: Dict[int, List[int]] = {}
+    
+    def __init__(self, exact_max: int, bloom_bytes: int, expected: int):
+        self.exact_max = max(1, exact_max)
+        self.expected = max(expected, 2 * self.exact_max)
+        self._exact: Optional[set] = set()
+        self._words: Optional[array.array] = None
+        self._masks: List[int] = []
+        self._nwords = max(1, bloom_bytes // 8)
+        self._k = max(1, min(8, round(self._nwords * 64 / self.expected * math.log(2))))
+    
+    @property
+    def bloom(self) -> bool:
+        return self._words is not None
+    
+    def select(self, values: List[str], keys: List[Optional[str]]) -> List[str]:
+        """按 keys 去重, 返回第一次出现的 values (key 为 None 即处理失败的值照常保留)"""
+        out = []
+        append = out.append
+        for value, key in zip(values, keys):
+            if key is None:
+                append(value)
+                continue
+            h = hash(key) & 0xFFFFFFFFFFFFFFFF
+            exact = self._exact
+            if exact is not None:
+                if h in exact:
                     continue
+                exact.add(h)
+                if len(exact) > self.exact_max:
+                    self._to_bloom()
+                append(value)
+                continue
+            # Bloom 阶段, 与 _bloom_add 相同, 内联省一次调用
+            words = self._words
+            i = (h >> 16) % self._nwords
+            mask = self._masks[h & 0xFFFF]
+            word = words[i]
+            if word & mask != mask:
+                words[i] = word | mask
+                append(value)
+        return out
+    
+    def _to_bloom(self):
+        self._words = array.array('Q', bytes(8 * self._nwords))
+        self._masks = self._mask_table(self._k)
+        for h in self._exact:
+            self._bloom_add(h)
+        self._exact = None
+    
+    def _bloom_add(self, h: int):
+        """低 16 位选掩码, 其余位选字"""
+        i = (h >> 16) % self._nwords
+        self._words[i] |= self._masks[h & 0xFFFF]
+    
+    @classmethod
+    def _mask_table(cls, k: int) -> List[int]:
+        """每个掩码是 64 位中随机选的 k 位"""
+        if k not in cls._mask_tables:
+            rng = random.Random(k)
+            bits = range(64)
+            cls._mask_tables[k] = [sum(1 << b for b in rng.sample(bits, k)) for _ in range(cls.MASKS)]
+        return cls._mask_tables[k]
+
+class MergedSource(FileSource):
+    """
+    多字典合并去重: {"type": "file", "path": ["top50k.txt", "rockyou.txt.gz", "ctf.txt"], "dedup": True}
+    
+    按给出的顺序 (优先级) 流式读取, .gz/.bz2/.xz 在后台线程解压; 按处理后的值去重
+    (P.lower() 等处理器把不同原始值变成同一个时只发一次), 保留第一次出现的原始值。
+    合并结果写成普通字典放在缓存目录, 之后与单个字典一样 mmap + 行索引: 总数精确,
+    支持 O(1) 随机访问; 输入文件和处理器链不变时直接复用, 不再重新合并。
+    """
+    
+    SUFFIX = ".merged"
+    BYTES_PER_ENTRY = 64    # 精确集合每条约占内存 (int + 哈希表槽位)
+    PROGRESS_INTERVAL = 0.2
+    
+    _memo: Dict[str, Tuple[str, Dict]] = {}
+    _scratch: Optional[str] = None
+    
+    def __init__(self, paths: List[str], processors: List[Callable], dedup: bool = True,
+                 memory_mb: int = 64, cache_dir: Optional[str] = None,
+                 progress: Optional[Callable[[Dict], None]] = None):
+        for path in paths:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"字典文件不存在: {path}")
+        self.paths = list(paths)
+        self.progress = progress
+        merged, self.info = self._open(processors, dedup, memory_mb, cache_dir or self._scratch_dir())
+        super().__init__(merged)
+    
+    @classmethod
+    def _scratch_dir(cls) -> str:
+        """不用缓存 (--no-cache) 时的合并目录: 本进程私有的临时目录, 退出时删除"""
+        if cls._scratch is None:
+            cls._scratch = tempfile.mkdtemp(prefix="ctf_brute_merge_")
+            atexit.register(shutil.rmtree, cls._scratch, True)
+        return cls._scratch
+    
+    @property
+    def raw_count(self) -> int:
+        """去重前的非空行数"""
+        return self.info["read"]
+    
+    @property
+    def dropped(self) -> int:
+        return self.info["read"] - self.info["unique"]
+    
+    def _open(self, processors: List[Callable], dedup: bool, memory_mb: int,
+              cache_dir: str) -> Tuple[str, Dict]:
+        """按输入文件 (路径/大小/mtime) + 处理器链 + 去重参数找已合并的结果, 没有就合并一次"""
+        chain = processors_key(processors) if processors else ""
+        inputs = []
+        for path in self.paths:
+            st = os.stat(path)
+            inputs.append([os.path.abspath(path), st.st_size, st.st_mtime_ns])
+        # 处理器链没有稳定标识 (自定义函数) 时只在本进程内复用
+        ident = json.dumps([inputs, chain if chain is not None else f"pid{os.getpid()}", dedup, memory_mb])
+        key = hashlib.sha256(ident.encode()).hexdigest()[:32]
+        if key in self._memo:
+            return self._memo[key]
         
-        # 根据函数名推断
-        name = p.__qualname__ if hasattr(p, '__qualname__') else str(p)
-        if 'base64_encode' in name:
-            names.append('Base64编码')
-        elif 'base64_decode' in name:
-            names.append('Base64解码')
-        elif 'md5_16' in name:
-            names.append('MD5(16位)')
-        elif 'md5' in name:
-            names.append('MD5')
-        elif 'sha1' in name:
-            names.append('SHA1')
-        elif 'sha256' in name:
-            names.append('SHA256')
-        elif 'url_encode' in name:
-            names.append('URL编码')
-        elif 'upper' in name:
-            names.append('大写')
-        elif 'lower' in name:
-            names.append('小写')
-        elif 'prefix' in name:
-            names.append('前缀')
-        elif 'suffix' in name:
-            names.append('后缀')
-        else:
-            names.append('处理')
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, key + self.SUFFIX)
+        try:
+            with open(path + ".json", 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            if os.path.getsize(path) != info["bytes"]:
+                raise ValueError(path)
+            os.utime(path)  # 标记最近使用
+        except (OSError, ValueError, KeyError):
+            info = self._merge(path, processors, dedup, memory_mb)
+            if chain is None:
+                atexit.register(self._discard, path)
+        self._memo[key] = (path, info)
+        return path, info
     
-    return ' → '.join(names) if names else '无'
+    def _merge(self, path: str, processors: List[Callable], dedup: bool, memory_mb: int) -> Dict:
+        """一遍流式合并: 后台线程读/解压, 当前线程批量处理 + 去重 + 写出"""
+        budget = max(1, memory_mb) << 20
+        size = sum(os.path.getsize(p) for p in self.paths)
+        expected = sum(os.path.getsize(p) * (4 if is_compressed(p) else 1) for p in self.paths) // 8
+        seen = DedupFilter(budget // self.BYTES_PER_ENTRY, budget, expected) if dedup else None
+        batch = compile_batch(processors) if processors else None
+        
+        blocks: queue.Queue = queue.Queue(maxsize=8)
+        stop = threading.Event()
+        consumed = [0]
+        reader = threading.Thread(target=_read_blocks, args=(self.paths, blocks, stop, consumed), daemon=True)
+        reader.start()
+        started = last = time.monotonic()
+        read = unique = pos = 0
+        offsets = array.array('Q')
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as out:
+                append = offsets.append
+                while True:
+                    block = blocks.get()
+                    if block is None:
+                        break
+                    if isinstance(block, BaseException):
+                        raise block
+                    if self.progress is not None and time.monotonic() - last >= self.PROGRESS_INTERVAL:
+                        last = time.monotonic()
+                        self.progress({"done": consumed[0], "size": size, "read": read, "unique": unique,
+                                       "elapsed": last - started, "final": False})
+                    # 与 WordlistIndex 一致: 按 utf-8 (errors='ignore') 解码后去掉空白, 跳过空行
+                    values = [v for v in (line.decode('utf-8', 'ignore').strip() for line in block.split(b"\n")) if v]
+                    read += len(values)
+                    if seen is not None:
+                        values = seen.select(values, batch(values) if batch is not None else values)
+                    if not values:
+                        continue
+                    unique += len(values)
+                    data = ("\n".join(values) + "\n").encode('utf-8')
+                    out.write(data)
+                    # 顺手记下行偏移, 合并结果不用再扫描一遍建索引
+                    ascii_only = len(data) == sum(map(len, values)) + len(values)
+                    for value in values:
+                        append(pos)
+                        pos += len(value) if ascii_only else len(value.encode('utf-8'))
+                        append(pos)
+                        pos += 1
+            info = {"read": read, "unique": unique, "bloom": bool(seen and seen.bloom), "bytes": pos}
+            if self.progress is not None:
+                self.progress({"done": size, "size": size, "read": read, "unique": unique,
+                               "elapsed": time.monotonic() - started, "final": True})
+            os.replace(tmp, path)
+            WordlistIndex.save(path, os.stat(path), offsets)
+        finally:
+            stop.set()
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+        with contextlib.suppress(OSError), open(path + ".json", 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        return info
+    
+    @staticmethod
+    def _discard(path: str):
+        for name in (path, path + ".json", path + ".idx"):
+            with contextlib.suppress(OSError):
+                os.remove(name)
+
+def make_wordlist(cfg: dict, processors: List[Callable], cache_dir: Optional[str] = None,
+                  progress: Optional[Callable[[Dict], None]] = None) -> FileSource:
+    """字典来源: 单个普通文件直接 mmap; 多个文件/压缩文件/要求去重时先合并 (dedup 未指定时多个文件才去重)"""
+    path = cfg.get("path", "")
+    paths = [path] if isinstance(path, str) else list(path)
+    dedup = cfg.get("dedup")
+    if dedup is None:
+        dedup = len(paths) > 1
+    if len(paths) == 1 and not is_compressed(paths[0]) and not dedup:
+        return FileSource(paths[0])
+    return MergedSource(paths, processors, dedup, cfg.get("dedup_memory_mb", 64), cache_dir, progress)
+
+def merged_wordlist(source: PayloadSource) -> Optional[MergedSource]:
+    """位置背后的合并字典 (字典 + 规则时取基础字典), 没有则为 None"""
+    if isinstance(source, RulesSource):
+        source = source.words
+    return source if isinstance(source, MergedSource) else None
+
+def make_source(cfg: dict, cache_dir: Optional[str] = None,
+                progress: Optional[Callable[[Dict], None]] = None) -> PayloadSource:
+    """根据位置配置创建值来源 (cache_dir: 多字典合并结果的存放目录, progress: 合并进度回调)"""
+    ptype = cfg.get("type", "list")
+    if ptype == "range":
+        return RangeSource(cfg.get("start", 0), cfg.get("end", 100),
+                           cfg.get("step", 1), cfg.get("format", "{}"))
+    if ptype == "file":
+        return make_wordlist(cfg, cfg.get("processors", []), cache_dir, progress)
+    if ptype == "mask":
+        return MaskSource(cfg.get("mask", ""), cfg.get("charsets"), cfg.get("min_length"), cfg.get("max_length"))
+    if ptype == "rules":
+        words = make_wordlist(cfg, [], cache_dir, progress) if cfg.get("path") else ListSource(cfg.get("values", []))
+        rules = list(cfg.get("rules", []))
+        if cfg.get("rules_file"):
+            rules += RulesSource.read_rules(cfg["rules_file"])
+        return RulesSource(words, rules)
+    return ListSource(cfg.get("values", []))
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              💾 处理结果缓存
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class CachedValues:
+    """
+    mmap 打开的处理结果文件
+    
+    文件格式: 头 (MAGIC, 数量) + (数量+1) 个 uint64 偏移 + UTF-8 数据区。
+    处理失败的值存为单字节 0xFF (不可能是合法 UTF-8), 读出为 None。
+    """
+    
+    MAGIC = b"CTFPC001"
+    HEADER = struct.Struct("=8sQ")
+    FAILED = b"\xff"
+    
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = self.HEADER.unpack_from(self._mm, 0)
+        if magic != self.MAGIC:
+            self.close()
+            raise ValueError(f"缓存文件格式错误: {path}")
+        start = self.HEADER.size
+        self._offsets = memoryview(self._mm)[start:start + 8 * (self.count + 1)].cast('Q')
+        self._data = start + 8 * (self.count + 1)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __getitem__(self, index: int) -> Optional[str]:
+        raw = self._mm[self._data + self._offsets[index]:self._data + self._offsets[index + 1]]
+        return None if raw == self.FAILED else raw.decode('utf-8')
+    
+    def iter_from(self, start: int) -> Iterator[Optional[str]]:
+        mm, offsets, base, failed = self._mm, self._offsets, self._data, self.FAILED
+        for i in range(start, self.count):
+            raw = mm[base + offsets[i]:base + offsets[i + 1]]
+            yield None if raw == failed else raw.decode('utf-8')
+    
+    def close(self):
+        if getattr(self, '_offsets', None) is not None:
+            self._offsets.release()
+            self._offsets = None
+        self._mm.close()
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+class CacheWriter:
+    """顺序写入处理结果, commit 时原子重命名为正式缓存文件"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp = f"{path}.{os.getpid()}.tmp"
+        self._data = open(self._tmp + ".data", 'wb')
+        self._offsets = open(self._tmp + ".idx", 'wb')
+        self._pos = 0
+        self.count = 0
+        self._offsets.write(struct.pack('=Q', 0))
+    
+    def add(self, processed: Optional[str]):
+        raw = CachedValues.FAILED if processed is None else processed.encode('utf-8')
+        self._data.write(raw)
+        self._pos += len(raw)
+        self._offsets.write(struct.pack('=Q', self._pos))
+        self.count += 1
+    
+    def commit(self):
+        self._data.close()
+        self._offsets.close()
+        with open(self._tmp, 'wb') as out:
+            out.write(CachedValues.HEADER.pack(CachedValues.MAGIC, self.count))
+            for part in (self._tmp + ".idx", self._tmp + ".data"):
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out, 1 << 20)
+        os.replace(self._tmp, self.path)
+        self._cleanup()
+    
+    def abort(self):
+        self._data.close()
+        self._offsets.close()
+        self._cleanup()
+        with contextlib.suppress(OSError):
+            os.remove(self._tmp)
+    
+    def _cleanup(self):
+        for part in (self._tmp + ".idx", self._tmp + ".data"):
+            with contextlib.suppress(OSError):
+                os.remove(part)
+
+class ProcessedCache:
+    """
+    字典处理结果的持久化缓存
+    
+    键 = 字典文件内容哈希 + 处理器链序列化, 同一字典 + 同一处理器链在不同
+    题目间复用, 不必每次重新跑 MD5/SHA1。按最近使用时间淘汰, 总大小不超过上限。
+    """
+    
+    SUFFIX = ".pcache"
+    
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def file_digest(self, path: str) -> str:
+        """字典内容哈希, 按 (路径, 大小, mtime) 记忆, 文件未变时不再重新计算"""
+        st = os.stat(path)
+        memo_path = os.path.join(self.cache_dir, "digests.json")
+        try:
+            with open(memo_path, 'r') as f:
+                memo = json.load(f)
+        except (OSError, ValueError):
+            memo = {}
+        
+        ident = os.path.abspath(path)
+        entry = memo.get(ident)
+        if entry and entry[:2] == [st.st_size, st.st_mtime_ns]:
+            return entry[2]
+        
+        h = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        memo[ident] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        tmp = f"{memo_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(memo, f)
+        os.replace(tmp, memo_path)
+        return memo[ident][2]
+    
+    def key(self, source: "PayloadSource", processors: List[Callable]) -> Optional[str]:
+        """缓存键; 来源或处理器链没有稳定标识时返回 None"""
+        if not processors or not isinstance(source, FileSource):
+            return None
+        chain = processors_key(processors)
+        if chain is None:
+            return None
+        return hashlib.sha256(f"{self.file_digest(source.path)}|{chain}".encode()).hexdigest()[:32]
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+    
+    def open(self, key: str, count: int) -> Optional[CachedValues]:
+        """打开已有缓存, 数量对不上时视为失效"""
+        path = self._path(key)
+        try:
+            cached = CachedValues(path)
+        except (OSError, ValueError):
+            return None
+        if len(cached) != count:
+            cached.close()
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(path)  # 标记最近使用
+        return cached
+    
+    def writer(self, key: str) -> CacheWriter:
+        return CacheWriter(self._path(key))
+    
+    def evict(self):
+        """按最近使用时间淘汰 (处理结果缓存和合并字典), 直到总大小不超过上限"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith((self.SUFFIX, MergedSource.SUFFIX)):
+                path = os.path.join(self.cache_dir, name)
+                with contextlib.suppress(OSError):
+                    st = os.stat(path)
+                    entries.append((st.st_mtime, st.st_size, path))
+        size = sum(e[1] for e in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            if path.endswith(MergedSource.SUFFIX):
+                MergedSource._discard(path)
+            else:
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+            size -= entry_size
 
 # ═══════════════════════════════════════════════════════════════════════════════
 #                              ⚙️ 配置系统
@@ -313,11 +1311,45 @@ class BruteConfig:
         }
     })
     
+    # ═══════════ 攻击模式 ═══════════
+    # cluster_bomb : 各位置取笛卡尔积, 总数 = 各位置数量之积
+    # pitchfork    : 各位置按同一序号成对取值 (用户名/密码配对), 总数 = 最短的位置
+    # battering_ram: 第一个位置的值同时填入所有位置 (各位置仍用自己的处理器链), 总数 = 第一个位置
+    # sniper       : 每次只换一个位置, 其余位置填 "default" (未配置时取该位置第一个值), 总数 = 各位置数量之和
+    attack_mode: str = "cluster_bomb"
+    
     # ═══════════ 性能配置 ═══════════
-    concurrency: int = 500      # 并发连接数
+    concurrency: int = 500      # 并发连接数 (自适应时为窗口上限; 多目标时为所有目标合计)
     timeout: float = 5.0        # 超时时间(秒)
     retries: int = 2            # 重试次数
-    batch_size: int = 2000      # 批处理大小
+    batch_size: int = 2000      # 待发送队列容量 (生产者最多领先工作协程的数量)
+    
+    # ═══════════ 多目标 ═══════════
+    # 同一组 Payload 打多个目标 (非空时忽略 url), 每个目标独立的连接池/并发窗口/限速/统计
+    urls: List[str] = field(default_factory=list)
+    host_concurrency: int = 0   # 每个目标的并发上限, 0 = concurrency 按未结束的目标平分
+    
+    # ═══════════ 传输层 ═══════════
+    transport: str = "aiohttp"  # aiohttp / raw (精简 HTTP/1.1, 本地/快速目标 CPU 开销更低)
+    pipeline_depth: int = 1     # raw 传输每条连接上同时挂的请求数 (HTTP/1.1 流水线), 1 = 不用流水线
+    
+    # ═══════════ 自适应并发 ═══════════
+    # 根据延迟和超时/错误率自动调整在途请求窗口, 小容器不会被压垮; 关闭时 concurrency 即实际并发
+    adaptive: bool = False
+    adaptive_start: int = 32    # 初始窗口
+    adaptive_min: int = 4       # 最小窗口
+    max_error_rate: float = 0.05  # 超过此错误率时乘性减小窗口
+    
+    # ═══════════ 请求节奏 ═══════════
+    rate_limit: float = 0.0         # 全局每秒请求上限, 0 = 不限
+    host_rate_limit: float = 0.0    # 单个主机每秒请求上限, 0 = 不限
+    backoff_max: float = 10.0       # 重试退避上限(秒)
+    retry_statuses: List[int] = field(default_factory=lambda: [429, 503])  # 视为限流/过载, 退避后重试
+    breaker_threshold: float = 0.5  # 最近 breaker_window 个请求失败比例超过此值时熔断, 0 = 关闭
+    breaker_window: int = 50
+    breaker_cooldown: float = 2.0   # 熔断后首次探测前等待(秒), 探测失败时加倍
+    max_deferred: int = 20          # 单个 Payload 因熔断/限流推迟重发的次数上限, 超过后记为错误, 0 = 不限
+    max_defer_time: float = 120.0   # 单个 Payload 从开始尝试起等熔断/限流的时间上限(秒), 0 = 不限
     
     # ═══════════ 成功条件 ═══════════
     # 失败标记 (包含则失败)
@@ -334,14 +1366,67 @@ class BruteConfig:
     # 状态码
     success_status: Optional[int] = None
     
+    # Flag 格式 (前缀, 不区分大小写, 匹配 前缀{...})
+    flag_formats: List[str] = field(default_factory=lambda: [
+        "flag", "ctf", "NSSCTF", "hgame"
+    ])
+    
+    # ═══════════ 响应读取 ═══════════
+    stream_mode: bool = True        # 流式读取, 出现失败关键字即停止
+    stream_chunk: int = 16384       # 每次读取的块大小
+    max_body_size: int = 1 << 20    # 最多读取的响应体字节数
+    stream_drain_limit: int = 256 << 10  # 提前判定后剩余不超过此值时读完以复用连接, 否则断开
+    
     # ═══════════ 智能模式 ═══════════
     smart_mode: bool = True     # 自动检测基准响应
+    calibration_probes: int = 8 # 开始前发送的必然失败探测数, 0 = 用第一个响应作为基准
     auto_stop: bool = True      # 找到后停止
     
+    # ═══════════ 剪枝 (cluster_bomb) ═══════════
+    # 某个位置的值已有结论后, 跳过剩余所有包含它的组合; 一般配合 auto_stop=False 使用
+    prune_on_hit: List[str] = field(default_factory=list)   # 命中后剪掉这些位置的值, 如 ["USER"]: 找到密码的用户不再试
+    prune_signatures: Dict[str, List[str]] = field(default_factory=dict)  # 位置 → 关键字, 如 {"USER": ["用户不存在"]}
+    
+    # ═══════════ 响应聚类 ═══════════
+    cluster: bool = True        # 按 (状态码, 长度桶, 归一化响应体) 给响应分类, 结束时输出
+    cluster_max: int = 1000     # 类别上限, 超出的新指纹计入"其他"
+    cluster_warmup: int = 200   # 前 N 个响应之后出现的新类别实时提示
+    
     # ═══════════ 其他 ═══════════
     proxy: Optional[str] = None
     verbose: bool = False
-    output_file: str = "results.json"
+    
+    # ═══════════ 结果输出 ═══════════
+    output_file: Optional[str] = "results.jsonl"    # 命中结果按 JSON Lines 流式写入, None 关闭
+    results_keep: int = 20                          # 内存里保留用于展示的命中数 (带 Flag 的优先)
+    output_queue: int = 1024                        # 待写入队列上限, 满了工作协程等待
+    
+    # ═══════════ 处理结果缓存 ═══════════
+    # 字典 + 处理器链的结果持久化到磁盘, 下次直接复用; None 关闭
+    cache_dir: Optional[str] = os.path.join(os.path.expanduser("~"), ".cache", "ctf_brute")
+    cache_max_mb: int = 2048
+    
+    # ═══════════ 处理器批处理 ═══════════
+    process_workers: int = 0    # >0 时用多进程计算处理器链 (大字典 + 哈希)
+    process_chunk: int = 8192   # 每批处理的值数量
+    
+    # ═══════════ 断点续跑 ═══════════
+    checkpoint_file: Optional[str] = None               # 断点文件, None 关闭 (命令行 --checkpoint / --resume 开启)
+    checkpoint_interval: float = 10.0                   # 最短写入间隔(秒)
+    
+    # ═══════════ 指标导出 ═══════════
+    # 任一文件不为 None 时开启分阶段计时; 都为 None 时几乎没有额外开销
+    metrics_file: Optional[str] = None      # JSON 快照
+    prometheus_file: Optional[str] = None   # Prometheus 文本格式
+    metrics_interval: float = 5.0           # 写入间隔(秒)
+    
+    # ═══════════ 进度输出 ═══════════
+    progress: str = "auto"          # auto / tty / jsonl / quiet (auto: 终端用 tty, 否则 jsonl)
+    progress_interval: float = 0.0  # 刷新间隔(秒), 0 = 按模式默认
+    
+    @property
+    def metrics_enabled(self) -> bool:
+        return bool(self.metrics_file or self.prometheus_file)
 
 # ═══════════════════════════════════════════════════════════════════════════════
 #                              📊 统计系统
@@ -358,13 +1443,20 @@ class Stats:
     
     start_time: float = 0.0
     baseline_length: Optional[int] = None
+    window: int = 0             # 当前并发窗口 (自适应模式)
+    paused: bool = False        # 熔断中
+    pruned: int = 0             # 被剪枝的值
+    skipped: int = 0            # 因剪枝跳过的组合 (已从 total 扣除)
+    deferred: int = 0           # 因熔断/限流推迟重发过的 Payload
+    refused: int = 0            # 推迟次数超过上限后放弃的 Payload (同时计入 errors)
+    deduped: int = 0            # 多字典去重省下的请求 (不计入 total)
     
     # 速度采样
     _speed_samples: deque = field(default_factory=lambda: deque(maxlen=50))
     _last_sample: Tuple[float, int] = (0.0, 0)
     
-    # 结果
-    results: List[Dict] = field(default_factory=list)
+    # 结果 (results 只保留前 results_keep 条, 全部命中在 output_file; flags 已去重)
+    results: List["HitRecord"] = field(default_factory=list)
     flags: List[str] = field(default_factory=list)
     
     @property
@@ -378,24 +1470,28 @@ class Stats:
     @property
     def speed(self) -> float:
         """实时速度"""
-        if self.elapsed < 0.5:
+        elapsed = self.elapsed
+        if elapsed < 0.5:
             return 0
         
-        # 使用采样计算
-        if len(self._speed_samples) >= 2:
-            samples = list(self._speed_samples)
-            t_diff = samples[-1][0] - samples[0][0]
-            c_diff = samples[-1][1] - samples[0][1]
-            if t_diff > 0:
-                return c_diff / t_diff
+        # 使用采样窗口两端计算, 不复制 deque
+        samples = self._speed_samples
+        if len(samples) >= 2:
+            (t0, c0), (t1, c1) = samples[0], samples[-1]
+            if t1 > t0:
+                return (c1 - c0) / (t1 - t0)
         
-        return self.completed / self.elapsed if self.elapsed > 0 else 0
+        return self.completed / elapsed
     
     @property
     def eta(self) -> float:
         """预计剩余时间"""
+        return self.eta_at(self.speed)
+    
+    def eta_at(self, speed: float) -> float:
+        """按已算好的速度估算剩余时间"""
         remaining = self.total - self.completed
-        return remaining / self.speed if self.speed > 0 else float('inf')
+        return remaining / speed if speed > 0 else float('inf')
     
     def sample(self):
         """采样"""
@@ -405,54 +1501,499 @@ class Stats:
             self._last_sample = (now, self.completed)
 
 # ═══════════════════════════════════════════════════════════════════════════════
-#                              🎨 UI 系统
+#                              📤 结果输出
 # ═══════════════════════════════════════════════════════════════════════════════
 
-class UI:
-    """终端 UI"""
+class HitRecord:
+    """一条命中结果 (__slots__, 大量命中时比 dict 省内存)"""
     
-    BANNER = """
-╔═══════════════════════════════════════════════════════════════════════════════╗
-║                                                                               ║
-║     ██████╗ ██████╗ ██╗   ██╗████████╗███████╗    ██╗  ██╗                   ║
-║     ██╔══██╗██╔══██╗██║   ██║╚══██╔══╝██╔════╝    ╚██╗██╔╝                   ║
-║     ██████╔╝██████╔╝██║   ██║   ██║   █████╗       ╚███╔╝                    ║
-║     ██╔══██╗██╔══██╗██║   ██║   ██║   ██╔══╝       ██╔██╗                    ║
-║     ██████╔╝██║  ██║╚██████╔╝   ██║   ███████╗    ██╔╝ ██╗                   ║
-║     ╚═════╝ ╚═╝  ╚═╝ ╚═════╝    ╚═╝   ╚══════╝    ╚═╝  ╚═╝                   ║
-║                                                                               ║
-║                    🔥 CTF 通用爆破工具 v6.0 🔥                                ║
-║                       M4 Pro Edition | by chenjianfang                        ║
-║                                                                               ║
-╚═══════════════════════════════════════════════════════════════════════════════╝
-"""
+    __slots__ = ("payload", "length", "status", "flags", "response", "time", "target")
     
-    @staticmethod
-    def print_banner():
-        """打印横幅"""
-        colors = [S.RED, S.ORANGE, S.YELLOW, S.GREEN, S.CYAN, S.BLUE, S.PURPLE]
-        lines = UI.BANNER.strip().split('\n')
-        for i, line in enumerate(lines):
-            color = colors[i % len(colors)]
-            print(f"{color}{line}{S.RESET}")
-        print()
+    def __init__(self, payload: Dict, length: int, status: int, flags: List[str], response: str,
+                 time: Optional[str] = None, target: Optional[str] = None):
+        self.payload = payload
+        self.length = length
+        self.status = status
+        self.flags = flags
+        self.response = response
+        self.time = time or datetime.now().isoformat(timespec='seconds')
+        self.target = target  # 多目标模式下命中的 URL
     
-    @staticmethod
-    def print_config(config: BruteConfig):
-        """打印配置"""
-        print(f"{S.CYAN}┌{'─' * 68}┐{S.RESET}")
-        print(f"{S.CYAN}│{S.RESET}  {S.BOLD}⚙️  配置信息{S.RESET}" + " " * 53 + f"{S.CYAN}│{S.RESET}")
-        print(f"{S.CYAN}├{'─' * 68}┤{S.RESET}")
-        print(f"{S.CYAN}│{S.RESET}  🎯 目标: {S.YELLOW}{config.url[:50]:<50}{S.RESET}     {S.CYAN}│{S.RESET}")
-        print(f"{S.CYAN}│{S.RESET}  📡 方法: {S.GREEN}{config.method:<50}{S.RESET}     {S.CYAN}│{S.RESET}")
-        print(f"{S.CYAN}│{S.RESET}  🔗 并发: {S.MAGENTA}{config.concurrency:<50}{S.RESET}     {S.CYAN}│{S.RESET}")
-        print(f"{S.CYAN}│{S.RESET}  ⏱️  超时: {S.WHITE}{config.timeout}s{S.RESET}" + " " * 46 + f"{S.CYAN}│{S.RESET}")
-        print(f"{S.CYAN}└{'─' * 68}┘{S.RESET}")
-        print()
+    def to_dict(self) -> Dict:
+        data = {name: getattr(self, name) for name in self.__slots__}
+        if data["target"] is None:
+            del data["target"]
+        return data
     
-    @staticmethod
-    def print_payloads(config: BruteConfig, total: int):
-        """打印 Payload 信息"""
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HitRecord":
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+class OutputError(Exception):
+    """结果文件写不进去 (磁盘满/无权限等): 再跑下去只会丢命中, 爆破停止"""
+
+class ResultSink:
+    """
+    命中结果输出
+    
+    - 每条命中经有界队列交给后台任务, 按 JSON Lines 追加到 output_file
+      (写文件在线程池里做); 写不过来时 add() 阻塞工作协程, 而不是无限堆在内存里
+    - 内存里只保留 keep 条用于最终展示: 带 Flag 的优先, 其余保留最早的
+    - Flag 去重
+    - 多目标模式: 每个目标一个 sink, 记录打上 label 后转交父 sink 统一写文件
+    - 写入任务异常退出后 add() / close() 抛 OutputError
+    """
+    
+    def __init__(self, stats: Stats, path: Optional[str], keep: int = 20, queue_size: int = 1024,
+                 parent: Optional["ResultSink"] = None, label: Optional[str] = None):
+        self.stats = stats
+        self.path = path
+        self.keep = max(1, keep)
+        self.queue_size = max(1, queue_size)
+        self.parent = parent
+        self.label = label
+        self.outbox: Optional[List[HitRecord]] = None  # 分片子进程: 待上报父进程的新结果
+        self._heap: List[Tuple[bool, int, HitRecord]] = []
+        self._seq = 0
+        self._flags: set = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def seed(self):
+        """从断点恢复的 stats.results / stats.flags 重建内存状态"""
+        self._heap.clear()
+        for record in self.stats.results:
+            self._keep(record)
+        self._flags = set(self.stats.flags)
+        self.stats.results = self._top()
+    
+    async def start(self, append: bool = False):
+        """打开输出文件, 启动写入任务 (append: 续跑时接着写)"""
+        if not self.path:
+            return
+        f = open(self.path, 'a' if append else 'w', encoding='utf-8')
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._writer(self._queue, f))
+    
+    async def add(self, record: HitRecord):
+        """记录一条命中; 输出队列满时等待 (背压)"""
+        # 写入任务已经挂了就什么都不记, 免得调用方重发时重复计数
+        self._check_writer()
+        if self.label is not None:
+            record.target = self.label
+        self.stats.success += 1
+        new_flags = [flag for flag in record.flags if flag not in self._flags]
+        if new_flags:
+            self._flags.update(new_flags)
+            self.stats.flags.extend(new_flags)
+        if self._keep(record):
+            self.stats.results = self._top()
+        if self.outbox is not None and (len(self.outbox) < self.keep or new_flags):
+            self.outbox.append(record)
+        if self._queue is not None and not await self._put(record):
+            self._check_writer()
+        if self.parent is not None:
+            await self.parent.add(record)
+    
+    async def close(self):
+        """写完队列里剩余的结果并关闭文件"""
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self._put(None)
+        task, self._task, self._queue = self._task, None, None
+        try:
+            await task
+        except Exception as e:
+            raise OutputError(f"写入 {self.path} 失败: {e}") from e
+    
+    def _check_writer(self):
+        """写入任务已异常退出时抛 OutputError"""
+        if self._task is not None and self._task.done() and self._task.exception() is not None:
+            error = self._task.exception()
+            raise OutputError(f"写入 {self.path} 失败: {error}") from error
+    
+    async def _put(self, item: Optional[HitRecord]) -> bool:
+        """放进写入队列; 队列满时和写入任务一起等, 写入任务先退出则返回 False (不会卡死在 put 上)"""
+        if not self._queue.full():
+            self._queue.put_nowait(item)
+            return True
+        put = asyncio.ensure_future(self._queue.put(item))
+        try:
+            await asyncio.wait((put, self._task), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            put.cancel()
+            raise
+        if put.done():
+            return True
+        put.cancel()
+        return False
+    
+    def take_outbox(self) -> List[HitRecord]:
+        """取出并清空待上报的新结果"""
+        records, self.outbox = self.outbox, []
+        return records
+    
+    def _keep(self, record: HitRecord) -> bool:
+        """放进保留集合, 返回集合是否变化"""
+        self._seq += 1
+        entry = (bool(record.flags), -self._seq, record)
+        if len(self._heap) < self.keep:
+            heapq.heappush(self._heap, entry)
+            return True
+        return heapq.heappushpop(self._heap, entry) is not entry
+    
+    def _top(self) -> List[HitRecord]:
+        return [record for _, _, record in sorted(self._heap, key=lambda e: -e[1])]
+    
+    async def _writer(self, queue: asyncio.Queue, f):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                batch = [await queue.get()]
+                while not queue.empty() and len(batch) < 256:
+                    batch.append(queue.get_nowait())
+                done = batch[-1] is None
+                lines = "".join(json.dumps(record.to_dict(), ensure_ascii=False) + "\n"
+                                for record in batch if record is not None)
+                if lines:
+                    await loop.run_in_executor(None, self._write, f, lines)
+                if done:
+                    return
+        finally:
+            f.close()
+    
+    @staticmethod
+    def _write(f, text: str):
+        f.write(text)
+        f.flush()
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              💾 断点续跑
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class Checkpoint:
+    """
+    断点文件 (JSON)
+    
+    - next    : 已生成到的组合编号, 之前的组合要么完成, 要么在 pending 里
+    - pending : 写断点时仍在途 (排队或请求中) 的组合编号, 续跑时重发
+    - stats / results / flags : 统计与命中结果
+    """
+    
+    VERSION = 1
+    
+    @staticmethod
+    def state(fingerprint: str, next_index: int, inflight: set, stats: Stats) -> Dict:
+        return {
+            "version": Checkpoint.VERSION,
+            "fingerprint": fingerprint,
+            "next": next_index,
+            "pending": sorted(inflight),
+            "stats": {
+                "total": stats.total,
+                "completed": stats.completed,
+                "success": stats.success,
+                "errors": stats.errors,
+                "retried": stats.retried,
+                "elapsed": stats.elapsed,
+                "pruned": stats.pruned,
+                "skipped": stats.skipped,
+                "deferred": stats.deferred,
+                "refused": stats.refused,
+            },
+            "results": [record.to_dict() for record in stats.results],
+            "flags": list(stats.flags),
+            "saved_at": datetime.now().isoformat(timespec='seconds'),
+        }
+    
+    @staticmethod
+    def save(path: str, state: Dict):
+        """写临时文件再原子重命名, 中途崩溃不会留下半个断点"""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    
+    @staticmethod
+    def load(path: Optional[str]) -> Optional[Dict]:
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get("version") != Checkpoint.VERSION:
+            raise ValueError(f"断点文件版本不支持: {path}")
+        return state
+    
+    @staticmethod
+    def restore_stats(stats: Stats, state: Dict):
+        saved = state["stats"]
+        stats.total = saved["total"]
+        stats.completed = saved["completed"]
+        stats.success = saved["success"]
+        stats.errors = saved["errors"]
+        stats.retried = saved["retried"]
+        stats.pruned = saved.get("pruned", 0)
+        stats.skipped = saved.get("skipped", 0)
+        stats.deferred = saved.get("deferred", 0)
+        stats.refused = saved.get("refused", 0)
+        stats.start_time = time.time() - saved["elapsed"]
+        stats.results = [HitRecord.from_dict(data) for data in state["results"]]
+        stats.flags = list(state["flags"])
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              📈 指标
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class LatencyHistogram:
+    """
+    对数分桶延迟直方图
+    
+    每个 2 倍区间再等分 4 个桶 (相对误差 < 25%), 覆盖 2^-20 s (~1μs) 到 2^7 s;
+    记录一次只是一次 frexp + 列表自增, 不保存样本。
+    """
+    
+    SUB = 4
+    MIN_EXP = -20
+    MAX_EXP = 7
+    
+    __slots__ = ("counts", "count", "total", "max")
+    
+    def __init__(self):
+        # 0 号桶收下溢, 最后一个桶收上溢
+        self.counts = [0] * ((self.MAX_EXP - self.MIN_EXP) * self.SUB + 2)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if seconds <= 0:
+            self.counts[0] += 1
+            return
+        m, e = math.frexp(seconds)  # seconds = m * 2^e, 0.5 <= m < 1
+        i = (e - 1 - self.MIN_EXP) * self.SUB + int((m - 0.5) * 2 * self.SUB) + 1
+        self.counts[min(max(i, 0), len(self.counts) - 1)] += 1
+    
+    def upper_bound(self, i: int) -> float:
+        """第 i 个桶的上界(秒)"""
+        if i == 0:
+            return 2.0 ** self.MIN_EXP
+        if i == len(self.counts) - 1:
+            return float('inf')
+        octave, sub = divmod(i - 1, self.SUB)
+        return 2.0 ** (octave + self.MIN_EXP) * (1 + (sub + 1) / self.SUB)
+    
+    def percentile(self, q: float) -> float:
+        """q 分位数 (桶上界, 不超过实际最大值)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.upper_bound(i), self.max)
+        return self.max
+    
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "max": self.max,
+            "p50": self.percentile(0.50),
+            "p90": self.percentile(0.90),
+            "p99": self.percentile(0.99),
+        }
+
+class RequestTrace:
+    """单个请求的传输层计时 (只在开启指标时创建, 由传输层填写)"""
+    
+    __slots__ = ("pool", "connect", "reused", "check", "mark")
+    
+    def __init__(self):
+        self.pool = 0.0       # 等连接池空闲连接
+        self.connect = 0.0    # 新建连接 (0 = 没有新建)
+        self.reused = False   # 复用了已有连接
+        self.check = 0.0      # check_success 累计耗时
+        self.mark = 0.0
+
+class Metrics:
+    """
+    分阶段延迟直方图 + 连接/重试计数, 定时导出 JSON 快照和 Prometheus 文本
+    
+    阶段:
+    - feed: 工作协程等下一个 Payload (生产者/处理器链跟不上时变大)
+    - queue: 等熔断恢复 / 并发窗口 / 限速令牌
+    - pool / connect: 等连接池空闲连接 / 新建连接
+    - ttfb: 请求发出到收到响应头 (不含 pool / connect)
+    - body: 读响应体 (不含 check)
+    - check / flags: check_success / extract_flags
+    """
+    
+    PHASES = ("feed", "queue", "pool", "connect", "ttfb", "body", "check", "flags")
+    
+    def __init__(self):
+        self.phases: Dict[str, LatencyHistogram] = {name: LatencyHistogram() for name in self.PHASES}
+        self.connections = {"opened": 0, "reused": 0}
+        self.retries: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+    
+    def observe(self, phase: str, seconds: float):
+        self.phases[phase].observe(seconds)
+    
+    def record_request(self, trace: RequestTrace, queued: float, started: float,
+                       headers_at: float, done_at: float):
+        """一个请求结束: queued 进入等待, started 拿到窗口, headers_at 收到响应头, done_at 响应处理完"""
+        phases = self.phases
+        phases["queue"].observe(started - queued)
+        if trace.pool:
+            phases["pool"].observe(trace.pool)
+        if trace.connect:
+            phases["connect"].observe(trace.connect)
+            self.connections["opened"] += 1
+        elif trace.reused:
+            self.connections["reused"] += 1
+        phases["ttfb"].observe(headers_at - started - trace.pool - trace.connect)
+        phases["body"].observe(done_at - headers_at - trace.check)
+        phases["check"].observe(trace.check)
+    
+    def failure(self, kind: str, retried: bool):
+        """按错误类型计数: 重试了记 retries, 放弃了记 errors"""
+        counter = self.retries if retried else self.errors
+        counter[kind] = counter.get(kind, 0) + 1
+    
+    def snapshot(self, stats: "Stats") -> Dict:
+        return {
+            "time": datetime.now().isoformat(timespec='seconds'),
+            "stats": {
+                "total": stats.total,
+                "completed": stats.completed,
+                "success": stats.success,
+                "errors": stats.errors,
+                "retried": stats.retried,
+                "speed": stats.speed,
+                "window": stats.window,
+                "elapsed": stats.elapsed,
+            },
+            "phases": {name: hist.to_dict() for name, hist in self.phases.items()},
+            "connections": dict(self.connections),
+            "retries": dict(self.retries),
+            "errors": dict(self.errors),
+        }
+    
+    def prometheus(self, stats: "Stats") -> str:
+        """Prometheus 文本格式 (node_exporter textfile collector 可直接读取)"""
+        lines = [
+            "# HELP ctf_brute_phase_seconds 各阶段耗时",
+            "# TYPE ctf_brute_phase_seconds histogram",
+        ]
+        for name, hist in self.phases.items():
+            # 导出时按 2 倍区间合并, 每个阶段 28 个桶
+            cumulative = 0
+            for i, n in enumerate(hist.counts[:-1]):
+                cumulative += n
+                if i % hist.SUB == 0:
+                    lines.append(f'ctf_brute_phase_seconds_bucket{{phase="{name}",le="{hist.upper_bound(i):.9g}"}} {cumulative}')
+            lines.append(f'ctf_brute_phase_seconds_bucket{{phase="{name}",le="+Inf"}} {hist.count}')
+            lines.append(f'ctf_brute_phase_seconds_sum{{phase="{name}"}} {hist.total:.9g}')
+            lines.append(f'ctf_brute_phase_seconds_count{{phase="{name}"}} {hist.count}')
+        
+        lines += ["# HELP ctf_brute_requests_total 请求计数", "# TYPE ctf_brute_requests_total counter"]
+        for key in ("completed", "success", "errors", "retried"):
+            lines.append(f'ctf_brute_requests_total{{result="{key}"}} {getattr(stats, key)}')
+        lines += ["# HELP ctf_brute_connections_total 连接新建/复用次数", "# TYPE ctf_brute_connections_total counter"]
+        for key, n in self.connections.items():
+            lines.append(f'ctf_brute_connections_total{{state="{key}"}} {n}')
+        lines += ["# HELP ctf_brute_failures_total 按错误类型的失败次数", "# TYPE ctf_brute_failures_total counter"]
+        for outcome, counter in (("retried", self.retries), ("gave_up", self.errors)):
+            for kind, n in sorted(counter.items()):
+                lines.append(f'ctf_brute_failures_total{{kind="{kind}",outcome="{outcome}"}} {n}')
+        lines += [
+            "# TYPE ctf_brute_total gauge", f"ctf_brute_total {stats.total}",
+            "# TYPE ctf_brute_speed gauge", f"ctf_brute_speed {stats.speed:.3f}",
+            "# TYPE ctf_brute_window gauge", f"ctf_brute_window {stats.window}",
+        ]
+        return "\n".join(lines) + "\n"
+    
+    def exports(self, stats: "Stats", json_path: Optional[str], prom_path: Optional[str]) -> List[Tuple[str, str]]:
+        """在事件循环里渲染好要写的 (路径, 内容), 写文件交给线程池"""
+        files = []
+        if json_path:
+            files.append((json_path, json.dumps(self.snapshot(stats), ensure_ascii=False, indent=2)))
+        if prom_path:
+            files.append((prom_path, self.prometheus(stats)))
+        return files
+    
+    @staticmethod
+    def write(files: List[Tuple[str, str]]):
+        """原子写出 (写临时文件再重命名, 抓取方不会读到半个文件)"""
+        for path, text in files:
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp, path)
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🎨 UI 系统
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class UI:
+    """终端 UI"""
+    
+    BANNER = """
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║                                                                               ║
+║     ██████╗ ██████╗ ██╗   ██╗████████╗███████╗    ██╗  ██╗                   ║
+║     ██╔══██╗██╔══██╗██║   ██║╚══██╔══╝██╔════╝    ╚██╗██╔╝                   ║
+║     ██████╔╝██████╔╝██║   ██║   ██║   █████╗       ╚███╔╝                    ║
+║     ██╔══██╗██╔══██╗██║   ██║   ██║   ██╔══╝       ██╔██╗                    ║
+║     ██████╔╝██║  ██║╚██████╔╝   ██║   ███████╗    ██╔╝ ██╗                   ║
+║     ╚═════╝ ╚═╝  ╚═╝ ╚═════╝    ╚═╝   ╚══════╝    ╚═╝  ╚═╝                   ║
+║                                                                               ║
+║                    🔥 CTF 通用爆破工具 v6.0 🔥                                ║
+║                       M4 Pro Edition | by chenjianfang                        ║
+║                                                                               ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+"""
+    
+    @staticmethod
+    def print_banner():
+        """打印横幅"""
+        colors = [S.RED, S.ORANGE, S.YELLOW, S.GREEN, S.CYAN, S.BLUE, S.PURPLE]
+        lines = UI.BANNER.strip().split('\n')
+        for i, line in enumerate(lines):
+            color = colors[i % len(colors)]
+            print(f"{color}{line}{S.RESET}")
+        print()
+    
+    @staticmethod
+    def print_config(config: BruteConfig):
+        """打印配置"""
+        print(f"{S.CYAN}┌{'─' * 68}┐{S.RESET}")
+        print(f"{S.CYAN}│{S.RESET}  {S.BOLD}⚙️  配置信息{S.RESET}" + " " * 53 + f"{S.CYAN}│{S.RESET}")
+        print(f"{S.CYAN}├{'─' * 68}┤{S.RESET}")
+        target = f"{len(config.urls)} 个, {config.urls[0]} …" if config.urls else config.url
+        print(f"{S.CYAN}│{S.RESET}  🎯 目标: {S.YELLOW}{target[:50]:<50}{S.RESET}     {S.CYAN}│{S.RESET}")
+        print(f"{S.CYAN}│{S.RESET}  📡 方法: {S.GREEN}{config.method:<50}{S.RESET}     {S.CYAN}│{S.RESET}")
+        if config.adaptive:
+            # 自适应: 从起步窗口开始按延迟/错误率调整, concurrency 只是上限
+            window = f"{min(config.adaptive_start, config.concurrency)} → {config.concurrency} (自适应)"
+            print(f"{S.CYAN}│{S.RESET}  🔗 并发: {S.MAGENTA}{window}{S.RESET}" + " " * max(0, 52 - len(window)) + f"{S.CYAN}│{S.RESET}")
+        else:
+            print(f"{S.CYAN}│{S.RESET}  🔗 并发: {S.MAGENTA}{config.concurrency:<50}{S.RESET}     {S.CYAN}│{S.RESET}")
+        print(f"{S.CYAN}│{S.RESET}  ⏱️  超时: {S.WHITE}{config.timeout}s{S.RESET}" + " " * 46 + f"{S.CYAN}│{S.RESET}")
+        print(f"{S.CYAN}└{'─' * 68}┘{S.RESET}")
+        print()
+    
+    @staticmethod
+    def print_payloads(config: BruteConfig, total: int, counts: Dict[str, int],
+                       merged: Optional[Dict[str, "MergedSource"]] = None, saved: int = 0):
+        """打印 Payload 信息 (counts: 各位置的值数量, merged: 合并字典的位置, saved: 去重省下的请求数)"""
+        merged = merged or {}
         print(f"{S.CYAN}┌{'─' * 68}┐{S.RESET}")
         print(f"{S.CYAN}│{S.RESET}  {S.BOLD}📋 Payload 配置{S.RESET}" + " " * 50 + f"{S.CYAN}│{S.RESET}")
         print(f"{S.CYAN}├{'─' * 68}┤{S.RESET}")
@@ -460,31 +2001,50 @@ class UI:
         for name, cfg in config.payloads.items():
             ptype = cfg.get("type", "list")
             processors = cfg.get("processors", [])
+            count = counts.get(name, "?")
             
-            # 获取数量
             if ptype == "range":
-                count = cfg.get("end", 0) - cfg.get("start", 0) + 1
                 desc = f"range({cfg.get('start')}, {cfg.get('end')})"
+            elif ptype == "file" and name in merged:
+                paths = merged[name].paths
+                desc = os.path.basename(paths[0]) + (f" +{len(paths) - 1}" if len(paths) > 1 else "")
             elif ptype == "file":
                 desc = os.path.basename(cfg.get("path", ""))
-                try:
-                    with open(cfg.get("path", ""), 'r', errors='ignore') as f:
-                        count = sum(1 for _ in f)
-                except:
-                    count = "?"
+            elif ptype == "mask":
+                desc = f"mask {cfg.get('mask', '')}"
+                if cfg.get("min_length") or cfg.get("max_length"):
+                    desc += f" ({cfg.get('min_length') or '-'}~{cfg.get('max_length') or '-'} 位)"
+            elif ptype == "rules":
+                path = cfg.get("path")
+                if not path:
+                    base = "list"
+                elif isinstance(path, str):
+                    base = os.path.basename(path)
+                else:
+                    base = os.path.basename(path[0]) + f" +{len(path) - 1}"
+                desc = f"{base} + {os.path.basename(cfg.get('rules_file') or '') or '规则'}"
             else:
-                count = len(cfg.get("values", []))
                 desc = f"list ({count} items)"
             
             print(f"{S.CYAN}│{S.RESET}  {S.YELLOW}{name:8}{S.RESET}: {desc:30} [{S.GREEN}{count}{S.RESET} 个]" + " " * 10 + f"{S.CYAN}│{S.RESET}")
             
+            # 合并去重
+            if name in merged and merged[name].dropped:
+                info = merged[name].info
+                dedup_desc = f"去重: {info['read']:,} → {info['unique']:,}" + (" (Bloom)" if info["bloom"] else "")
+                print(f"{S.CYAN}│{S.RESET}           {S.GRAY}{dedup_desc[:45]}{S.RESET}" + " " * max(0, 49 - len(dedup_desc)) + f"   {S.CYAN}│{S.RESET}")
+            
             # 处理器
             if processors:
                 proc_desc = describe_processors(processors)
                 print(f"{S.CYAN}│{S.RESET}           {S.GRAY}处理: {proc_desc[:45]}{S.RESET}" + " " * max(0, 45 - len(proc_desc)) + f"   {S.CYAN}│{S.RESET}")
         
         print(f"{S.CYAN}├{'─' * 68}┤{S.RESET}")
-        print(f"{S.CYAN}│{S.RESET}  {S.BOLD}总组合数: {S.GREEN}{total:,}{S.RESET}" + " " * (53 - len(f"{total:,}")) + f"{S.CYAN}│{S.RESET}")
+        mode = f" ({config.attack_mode})" if config.attack_mode != "cluster_bomb" else ""
+        print(f"{S.CYAN}│{S.RESET}  {S.BOLD}总请求数: {S.GREEN}{total:,}{S.RESET}{mode}" + " " * max(0, 53 - len(f"{total:,}{mode}")) + f"{S.CYAN}│{S.RESET}")
+        if saved:
+            text = f"{saved:,} 个请求"
+            print(f"{S.CYAN}│{S.RESET}  去重省下: {S.BLUE}{text}{S.RESET}" + " " * max(0, 50 - len(text)) + f"{S.CYAN}│{S.RESET}")
         print(f"{S.CYAN}└{'─' * 68}┘{S.RESET}")
         print()
     
@@ -508,7 +2068,7 @@ class UI:
             speed_style = S.RED
         
         # ETA
-        eta = stats.eta
+        eta = stats.eta_at(speed)
         if eta == float('inf') or eta > 36000:
             eta_str = "计算中"
         elif eta > 3600:
@@ -524,17 +2084,49 @@ class UI:
               f"{stats.completed:,}/{stats.total:,} │ "
               f"{speed_style}{speed:,.0f}/s{S.RESET} │ "
               f"ETA: {S.YELLOW}{eta_str}{S.RESET} │ "
-              f"Err: {S.RED}{stats.errors}{S.RESET}", end="", flush=True)
+              + (f"窗口: {S.MAGENTA}{stats.window}{S.RESET} │ " if stats.window else "")
+              + (f"{S.YELLOW}⏸ 熔断{S.RESET} │ " if stats.paused else "")
+              + f"Err: {S.RED}{stats.errors}{S.RESET}", end="", flush=True)
+    
+    @staticmethod
+    def print_merge_progress(state: Dict):
+        """合并多个字典时的进度 (首次运行要先读完所有输入)"""
+        pct = state["done"] / state["size"] * 100 if state["size"] else 100.0
+        print(f"\r{S.CYAN}[*] 合并字典{S.RESET} {S.BOLD}{pct:5.1f}%{S.RESET} │ "
+              f"读取 {state['read']:,} 行 │ 去重后 {S.GREEN}{state['unique']:,}{S.RESET} │ "
+              f"{state['elapsed']:.1f}s\033[K", end="\n" if state["final"] else "", flush=True)
+    
+    @staticmethod
+    def print_merge_progress_jsonl(state: Dict):
+        UI.emit_json("merge", **{**state, "elapsed": round(state["elapsed"], 3)})
+    
+    @staticmethod
+    def emit_json(event: str, **fields):
+        """非终端输出: 一行一个 JSON 事件"""
+        sys.stdout.write(json.dumps({"event": event, **fields}, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
     
     @staticmethod
-    def print_success(result: Dict):
+    def print_progress_jsonl(stats: Stats):
+        """JSON lines 进度, 供 CI / 脚本解析"""
+        speed = stats.speed
+        eta = stats.eta_at(speed)
+        UI.emit_json("progress", elapsed=round(stats.elapsed, 3), completed=stats.completed, total=stats.total,
+                     success=stats.success, errors=stats.errors, retried=stats.retried,
+                     speed=round(speed, 1), eta=round(eta, 1) if eta != float('inf') else None,
+                     window=stats.window, paused=stats.paused)
+    
+    @staticmethod
+    def print_success(result: HitRecord):
         """打印成功结果"""
         print("\n")
         print(f"{S.GREEN}{S.BOLD}╔{'═' * 70}╗{S.RESET}")
         print(f"{S.GREEN}{S.BOLD}║{'🎉 爆破成功! 🎉':^68}║{S.RESET}")
         print(f"{S.GREEN}{S.BOLD}╠{'═' * 70}╣{S.RESET}")
         
-        for key, value in result.get("payload", {}).items():
+        if result.target:
+            print(f"{S.GREEN}{S.BOLD}║{S.RESET}  {S.YELLOW}{'目标':8}{S.RESET}: {S.CYAN}{result.target}{S.RESET}")
+        for key, value in result.payload.items():
             original = value.get("original", value)
             processed = value.get("processed", value)
             
@@ -545,14 +2137,100 @@ class UI:
                 print(f"{S.GREEN}{S.BOLD}║{S.RESET}  {S.YELLOW}{key:10}{S.RESET}: {S.WHITE}{S.BOLD}{original}{S.RESET}")
         
         print(f"{S.GREEN}{S.BOLD}╠{'═' * 70}╣{S.RESET}")
-        print(f"{S.GREEN}{S.BOLD}║{S.RESET}  响应长度: {S.CYAN}{result.get('length', 0)}{S.RESET}" + " " * 50 + f"{S.GREEN}{S.BOLD}║{S.RESET}")
-        print(f"{S.GREEN}{S.BOLD}║{S.RESET}  状态码:   {S.CYAN}{result.get('status', 0)}{S.RESET}" + " " * 50 + f"{S.GREEN}{S.BOLD}║{S.RESET}")
+        print(f"{S.GREEN}{S.BOLD}║{S.RESET}  响应长度: {S.CYAN}{result.length}{S.RESET}" + " " * 50 + f"{S.GREEN}{S.BOLD}║{S.RESET}")
+        print(f"{S.GREEN}{S.BOLD}║{S.RESET}  状态码:   {S.CYAN}{result.status}{S.RESET}" + " " * 50 + f"{S.GREEN}{S.BOLD}║{S.RESET}")
         print(f"{S.GREEN}{S.BOLD}╚{'═' * 70}╝{S.RESET}")
         
         # Flag
-        for flag in result.get("flags", []):
+        for flag in result.flags:
             print(f"\n{S.RED}{S.BOLD}🚩 FLAG: {flag}{S.RESET}")
     
+    @staticmethod
+    def describe_sample(sample: Dict, width: int = 32) -> str:
+        """样本 Payload 的原始值, 多个位置用 / 连接"""
+        text = " / ".join(str(val.get("original", val)) if isinstance(val, dict) else str(val)
+                          for val in sample.values())
+        return text if len(text) <= width else text[:width - 1] + "…"
+    
+    @staticmethod
+    def print_cluster_notice(cluster: "ResponseCluster", target: Optional[str] = None):
+        """运行中出现的新响应类别 (打印在进度条上方)"""
+        where = f" ({target})" if target else ""
+        print(f"\r\033[K{S.MAGENTA}[~] 新响应类别{where}: 状态 {cluster.status} │ 长度 {cluster.describe_length()} │ "
+              f"第 {cluster.first_seen:,} 个响应 │ 样本 {UI.describe_sample(cluster.sample)}{S.RESET}")
+    
+    @staticmethod
+    def print_prune_notice(name: str, value: str, reason: str, target: Optional[str] = None):
+        """运行中的剪枝提示 (打印在进度条上方)"""
+        where = f" ({target})" if target else ""
+        print(f"\r\033[K{S.BLUE}[✂] 剪枝{where}: {name}={value} ({reason}), 跳过剩余包含它的组合{S.RESET}")
+    
+    @staticmethod
+    def cluster_dict(cluster: "ResponseCluster", target: Optional[str] = None) -> Dict:
+        data = {"status": cluster.status, "length": cluster.describe_length(), "count": cluster.count,
+                "first_seen": cluster.first_seen, "sample": cluster.sample}
+        if target:
+            data["target"] = target
+        return data
+    
+    @staticmethod
+    def print_clusters(clusters: "ResponseClusters", limit: int = 20, target: Optional[str] = None):
+        """响应分类表: 类别多时显示最常见的几类和全部稀有类"""
+        ranked = clusters.ranked()
+        if not ranked:
+            return
+        if len(ranked) > limit:
+            head = max(1, limit // 4)
+            rows = ranked[:head] + [None] + ranked[-(limit - head):]
+        else:
+            rows = ranked
+        total = max(1, clusters.total)
+        print(f"\n{S.CYAN}┌{'─' * 68}┐{S.RESET}")
+        where = f" {target}" if target else ""
+        print(f"{S.CYAN}│{S.RESET}  {S.BOLD}🧮 响应分类{S.RESET}{where} ({len(ranked)} 类)")
+        print(f"{S.CYAN}├{'─' * 68}┤{S.RESET}")
+        # 中文表头按两列宽手工对齐
+        print(f"{S.CYAN}│{S.RESET}  状态   {' ' * 8}长度{' ' * 10}数量{' ' * 6}占比   样本")
+        for cluster in rows:
+            if cluster is None:
+                print(f"{S.CYAN}│{S.RESET}  {S.GRAY}… 省略 {len(ranked) - limit} 类{S.RESET}")
+                continue
+            share = cluster.count / total
+            style = S.YELLOW + S.BOLD if share < 0.01 else ""
+            print(f"{S.CYAN}│{S.RESET}  {style}{cluster.status:<7}{cluster.describe_length():>12}"
+                  f"{cluster.count:>14,}{share:>10.2%}   {UI.describe_sample(cluster.sample)}{S.RESET}")
+        if clusters.overflow:
+            print(f"{S.CYAN}│{S.RESET}  {S.GRAY}超出类别上限未分类: {clusters.overflow:,}{S.RESET}")
+        print(f"{S.CYAN}└{'─' * 68}┘{S.RESET}")
+    
+    @staticmethod
+    def target_dict(url: str, stats: Stats, state: str, elapsed: float) -> Dict:
+        return {"url": url, "state": state, "total": stats.total, "completed": stats.completed,
+                "success": stats.success, "errors": stats.errors, "retried": stats.retried,
+                "elapsed": round(elapsed, 3), "flags": stats.flags}
+    
+    @staticmethod
+    def print_targets(rows: List[Tuple[str, Stats, str, float]]):
+        """多目标模式: 每个目标一行 (URL, 进度, 命中, 错误, 耗时, 状态)"""
+        print(f"\n{S.CYAN}┌{'─' * 68}┐{S.RESET}")
+        print(f"{S.CYAN}│{S.RESET}  {S.BOLD}🌐 目标统计{S.RESET} ({len(rows)} 个)")
+        print(f"{S.CYAN}├{'─' * 68}┤{S.RESET}")
+        print(f"{S.CYAN}│{S.RESET}  目标{' ' * 26}完成{' ' * 13}命中{' ' * 4}错误{' ' * 4}耗时  状态")
+        for url, stats, state, elapsed in rows:
+            text = url if len(url) <= 28 else url[:27] + "…"
+            style = S.GREEN + S.BOLD if stats.success else ""
+            print(f"{S.CYAN}│{S.RESET}  {style}{text:<28}{stats.completed:>8,}/{stats.total:<8,}"
+                  f"{stats.success:>6,}{stats.errors:>8,}{elapsed:>7.1f}s  {state}{S.RESET}")
+        print(f"{S.CYAN}└{'─' * 68}┘{S.RESET}")
+    
+    @staticmethod
+    def print_hidden_results(stats: Stats, output_file: Optional[str]):
+        """命中数超过内存保留条数时提示去结果文件里看"""
+        hidden = stats.success - len(stats.results)
+        if hidden > 0:
+            where = f", 全部结果见 {output_file}" if output_file else ""
+            print(f"\n{S.YELLOW}[!] 另有 {hidden:,} 条命中未显示{where}{S.RESET}")
+    
     @staticmethod
     def print_summary(stats: Stats):
         """打印总结"""
@@ -564,247 +2242,2731 @@ class UI:
         print(f"{S.CYAN}│{S.RESET}  已完成: {S.GREEN}{stats.completed:,}{S.RESET}" + " " * (55 - len(f"{stats.completed:,}")) + f"{S.CYAN}│{S.RESET}")
         print(f"{S.CYAN}│{S.RESET}  成功数: {S.YELLOW}{stats.success}{S.RESET}" + " " * (55 - len(str(stats.success))) + f"{S.CYAN}│{S.RESET}")
         print(f"{S.CYAN}│{S.RESET}  错误数: {S.RED}{stats.errors}{S.RESET}" + " " * (55 - len(str(stats.errors))) + f"{S.CYAN}│{S.RESET}")
+        if stats.pruned:
+            text = f"{stats.pruned:,} 个值, 跳过 {stats.skipped:,} 个组合"
+            print(f"{S.CYAN}│{S.RESET}  剪枝:   {S.BLUE}{text}{S.RESET}" + " " * max(0, 48 - len(text)) + f"{S.CYAN}│{S.RESET}")
+        if stats.deferred or stats.refused:
+            text = f"{stats.deferred:,} 个被推迟, {stats.refused:,} 个放弃"
+            print(f"{S.CYAN}│{S.RESET}  限流:   {S.YELLOW}{text}{S.RESET}" + " " * max(0, 48 - len(text)) + f"{S.CYAN}│{S.RESET}")
+        if stats.deduped:
+            text = f"省下 {stats.deduped:,} 个请求"
+            print(f"{S.CYAN}│{S.RESET}  去重:   {S.BLUE}{text}{S.RESET}" + " " * max(0, 50 - len(text)) + f"{S.CYAN}│{S.RESET}")
         print(f"{S.CYAN}├{'─' * 68}┤{S.RESET}")
         print(f"{S.CYAN}│{S.RESET}  耗时: {S.WHITE}{stats.elapsed:.2f}s{S.RESET}" + " " * 52 + f"{S.CYAN}│{S.RESET}")
         avg_speed = stats.completed / stats.elapsed if stats.elapsed > 0 else 0
         print(f"{S.CYAN}│{S.RESET}  平均速度: {S.GREEN}{avg_speed:,.0f}/s{S.RESET}" + " " * (52 - len(f"{avg_speed:,.0f}")) + f"{S.CYAN}│{S.RESET}")
         print(f"{S.CYAN}└{'─' * 68}┘{S.RESET}")
 
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🔍 响应匹配
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def decode_body(body: bytes, charset: Optional[str] = None) -> str:
+    """按响应声明的编码解码, 未声明或不认识时按 UTF-8"""
+    try:
+        return body.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+def _keyword_variants(keywords: List[str]) -> List[bytes]:
+    """关键字的字节形式; 非 ASCII 关键字同时匹配 UTF-8 和 GBK 页面"""
+    variants = []
+    for kw in keywords:
+        if not kw:
+            continue
+        for encoding in ('utf-8', 'gbk'):
+            with contextlib.suppress(UnicodeEncodeError):
+                raw = kw.encode(encoding)
+                if raw not in variants:
+                    variants.append(raw)
+    # 长的在前, 避免被短前缀抢先匹配
+    return sorted(variants, key=len, reverse=True)
+
+class ResponseMatcher:
+    """
+    每次运行编译一次的响应匹配器, 直接在原始字节上匹配
+    
+    - 失败/成功关键字合并成一个带分组的交替正则, 一遍扫描:
+      遇到失败关键字立即判失败, 扫完只见过成功关键字则判成功
+    - success_regex 只编译一次 (ASCII 规则直接匹配字节, 否则才解码)
+    - 所有 Flag 格式合并成一个正则
+    """
+    
+    def __init__(self, config: BruteConfig):
+        self.config = config
+        
+        fail = _keyword_variants(config.fail_keywords)
+        success = _keyword_variants(config.success_keywords)
+        parts = []
+        if fail:
+            parts.append(b"(?P<fail>" + b"|".join(map(re.escape, fail)) + b")")
+        if success:
+            parts.append(b"(?P<ok>" + b"|".join(map(re.escape, success)) + b")")
+        self.keywords = re.compile(b"|".join(parts), re.I) if parts else None
+        self.has_fail = bool(fail)
+        # 流式读取用: 单独的失败关键字正则, 以及分块边界需要回看的字节数
+        self.fail_regex = re.compile(b"|".join(map(re.escape, fail)), re.I) if fail else None
+        self.ok_regex = re.compile(b"|".join(map(re.escape, success)), re.I) if success else None
+        self.overlap = max(map(len, fail), default=1) - 1
+        
+        self.success_regex = None
+        self.success_regex_text = None
+        if config.success_regex:
+            if config.success_regex.isascii():
+                self.success_regex = re.compile(config.success_regex.encode(), re.I)
+            else:
+                self.success_regex_text = re.compile(config.success_regex, re.I)
+        
+        prefixes = sorted({re.escape(f.encode()) for f in config.flag_formats if f}, key=len, reverse=True)
+        self.flag_regex = re.compile(b"(?:" + b"|".join(prefixes) + rb")\{[^}]+\}", re.I) if prefixes else None
+        
+        # 是否需要响应体才能判定 (否则只看状态码/长度)
+        self.needs_body = bool(parts) or bool(config.success_regex) or bool(config.prune_signatures) or \
+            (config.smart_mode and config.calibration_probes > 0)
+    
+    def check(self, body: bytes, length: int, status: int, baseline_length: Optional[int] = None,
+              fail_checked: bool = False, profile: Optional["BaselineProfile"] = None,
+              reflected: Tuple[bytes, ...] = ()) -> bool:
+        """
+        检查是否成功
+        
+        fail_checked: 流式读取时已确认没有失败关键字
+        profile/reflected: 校准得到的基准画像, 以及响应里可能回显的本次 Payload 值
+        """
+        config = self.config
+        
+        # 关键字: 一遍扫描
+        if fail_checked:
+            if self.ok_regex is not None and self.ok_regex.search(body):
+                return True
+        elif self.keywords is not None:
+            seen_ok = False
+            for m in self.keywords.finditer(body):
+                if m.lastgroup == "fail":
+                    return False
+                seen_ok = True
+                if not self.has_fail:
+                    break
+            if seen_ok:
+                return True
+        
+        # 正则匹配
+        if self.success_regex is not None and self.success_regex.search(body):
+            return True
+        if self.success_regex_text is not None and self.success_regex_text.search(decode_body(body)):
+            return True
+        
+        # 长度判断
+        if config.success_length is not None and length == config.success_length:
+            return True
+        if config.success_length_not is not None and length != config.success_length_not:
+            return True
+        
+        # 状态码
+        if config.success_status is not None and status == config.success_status:
+            return True
+        
+        # 智能模式
+        if config.smart_mode and profile is not None:
+            if profile.is_anomaly(body, status, reflected):
+                return True
+        elif config.smart_mode and baseline_length is not None:
+            diff = abs(length - baseline_length)
+            threshold = max(50, baseline_length * 0.1)
+            if diff > threshold:
+                return True
+        
+        return False
+    
+    def extract_flags(self, body: bytes) -> List[str]:
+        """提取 Flag (去重, 保持出现顺序)"""
+        if self.flag_regex is None:
+            return []
+        return list(dict.fromkeys(m.decode('utf-8', errors='replace') for m in self.flag_regex.findall(body)))
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              📐 基准校准
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# 动态内容: 长十六进制串 (token/hash), 长 base64 串 (CSRF/session), 数字 (时间戳/计数)
+_DYNAMIC_TOKENS = re.compile(rb'[0-9a-fA-F]{16,}|[A-Za-z0-9+/_-]{24,}={0,2}|\d+')
+
+def payload_reflections(values: Iterable[str]) -> Tuple[bytes, ...]:
+    """响应里可能回显的 Payload 值 (处理前后都算, 长的在前)"""
+    encoded = {v.encode('utf-8', errors='ignore') for v in values if v}
+    return tuple(sorted(encoded, key=len, reverse=True))
+
+def normalize_body(body: bytes, reflected: Tuple[bytes, ...] = ()) -> bytes:
+    """去掉回显的 Payload 和动态 token, 得到可比较的响应骨架"""
+    if reflected:
+        # 只替换独立出现的值, 避免把 token/正文里恰好相同的片段也换掉
+        pattern = rb'(?<![A-Za-z0-9])(?:' + b'|'.join(map(re.escape, reflected)) + rb')(?![A-Za-z0-9])'
+        body = re.sub(pattern, b"#", body)
+    return _DYNAMIC_TOKENS.sub(b"#", body)
+
+class BaselineProfile:
+    """
+    基准响应画像, 由 K 个必然失败的探测请求建立
+    
+    - 状态码集合
+    - 归一化响应骨架的指纹集合 (一次哈希比较即可排除绝大多数失败响应)
+    - 归一化长度分布 (探测之间骨架不一致时, 用 3σ 容差判断)
+    """
+    
+    def __init__(self, samples: List[Tuple[bytes, int, Tuple[bytes, ...]]]):
+        normalized = [normalize_body(body, reflected) for body, _, reflected in samples]
+        self.samples = len(samples)
+        self.statuses = {status for _, status, _ in samples}
+        self.fingerprints = {hash(n) for n in normalized}
+        lengths = [len(n) for n in normalized]
+        self.low, self.high = min(lengths), max(lengths)
+        self.stdev = statistics.pstdev(lengths)
+        self.tolerance = max(8.0, 3 * self.stdev)
+        # 所有探测骨架一致: 动态内容已剥离干净, 骨架不同即视为异常
+        self.stable = len(self.fingerprints) == 1
+        self.length = int(statistics.median(len(body) for body, _, _ in samples))
+    
+    def is_anomaly(self, body: bytes, status: int, reflected: Tuple[bytes, ...] = ()) -> bool:
+        if status not in self.statuses:
+            # 限流/服务端错误不算命中
+            return status != 429 and status < 500
+        normalized = normalize_body(body, reflected)
+        if hash(normalized) in self.fingerprints:
+            return False
+        if self.stable:
+            return True
+        n = len(normalized)
+        return n < self.low - self.tolerance or n > self.high + self.tolerance
+    
+    def describe(self) -> str:
+        statuses = ','.join(map(str, sorted(self.statuses)))
+        mode = "骨架一致" if self.stable else f"骨架 {len(self.fingerprints)} 种, 长度容差 ±{self.tolerance:.0f}"
+        return f"{self.samples} 个探测 | 状态 {statuses} | 长度 ~{self.length} | {mode}"
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🧮 响应聚类
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class ResponseCluster:
+    """一类响应: 计数, 长度范围, 第一个样本 Payload"""
+    
+    __slots__ = ("status", "bucket", "count", "min_length", "max_length", "sample", "first_seen")
+    
+    def __init__(self, status: int, bucket: int, sample: Dict, first_seen: int):
+        self.status = status
+        self.bucket = bucket
+        self.count = 0
+        self.min_length: Optional[int] = None
+        self.max_length: Optional[int] = None
+        self.sample = sample
+        self.first_seen = first_seen
+    
+    def add(self, length: Optional[int], count: int = 1):
+        self.count += count
+        if length is not None:
+            self.min_length = length if self.min_length is None else min(self.min_length, length)
+            self.max_length = length if self.max_length is None else max(self.max_length, length)
+    
+    def describe_length(self) -> str:
+        if self.min_length is None:
+            return "?"
+        if self.min_length == self.max_length:
+            return str(self.min_length)
+        return f"{self.min_length}-{self.max_length}"
+
+class ResponseClusters:
+    """
+    Burp Intruder 式响应聚类
+    
+    每个响应归约成指纹 (状态码, 长度桶, 归一化响应体哈希) 计入聚类表,
+    每类只保存计数/长度范围/一个样本, 内存只与类别数有关, 与响应数无关。
+    - 长度桶: 64 以下精确, 以上每个 2 倍区间分 64 桶 (约 1.5%)
+    - 归一化: 去掉回显的 Payload 和动态 token (同基准校准); 原始响应体哈希 → 归一化哈希
+      有缓存, 静态失败页只算一次哈希
+    - 只读到失败关键字为止的响应体按已读前缀算哈希, 只看状态码/长度时按空响应体算
+    - 类别超过 max_clusters 后, 新指纹只计入 overflow
+    - 前 warmup 个响应之后出现的新类别放进 fresh, 由渲染任务实时提示
+    """
+    
+    MEMO_SIZE = 4096
+    
+    def __init__(self, max_clusters: int, warmup: int,
+                 describe: Callable[[int, Sequence[str]], Dict],
+                 reflect: Callable[[int, Sequence[str]], Tuple[bytes, ...]]):
+        self.max_clusters = max(1, max_clusters)
+        self.warmup = warmup
+        self.clusters: Dict[Tuple[int, int, int], ResponseCluster] = {}
+        self.total = 0
+        self.overflow = 0
+        self.fresh: List[ResponseCluster] = []
+        self._describe = describe
+        self._reflect = reflect
+        self._memo: Dict[int, int] = {}
+        self._reported: Optional[Dict[Tuple[int, int, int], int]] = None  # 分片子进程: 已上报的计数
+        self._reported_totals = (0, 0)
+    
+    @staticmethod
+    def bucket(length: Optional[int]) -> int:
+        if length is None:
+            return -1
+        shift = length.bit_length() - 6
+        return length if shift <= 0 else (length >> shift) << shift
+    
+    def _body_hash(self, body: bytes, index: int, values: Sequence[str]) -> int:
+        raw = hash(body)
+        normalized = self._memo.get(raw)
+        if normalized is None:
+            # 短值 (< 3 字节) 容易误伤正文, 只替换较长的回显
+            for value in self._reflect(index, values):
+                if len(value) >= 3:
+                    body = body.replace(value, b"#")
+            normalized = hash(_DYNAMIC_TOKENS.sub(b"#", body))
+            if len(self._memo) >= self.MEMO_SIZE:
+                self._memo.clear()
+            self._memo[raw] = normalized
+        return normalized
+    
+    def observe(self, status: int, length: Optional[int], body: bytes, index: int, values: Sequence[str]):
+        self.total += 1
+        key = (status, self.bucket(length), self._body_hash(body, index, values))
+        cluster = self.clusters.get(key)
+        if cluster is None:
+            if len(self.clusters) >= self.max_clusters:
+                self.overflow += 1
+                return
+            cluster = self._create(key, self._describe(index, values), self.total)
+        cluster.add(length)
+    
+    def _create(self, key: Tuple[int, int, int], sample: Dict, first_seen: int) -> ResponseCluster:
+        cluster = self.clusters[key] = ResponseCluster(key[0], key[1], sample, first_seen)
+        if self.total > self.warmup:
+            self.fresh.append(cluster)
+        return cluster
+    
+    def take_fresh(self) -> List[ResponseCluster]:
+        fresh, self.fresh = self.fresh, []
+        return fresh
+    
+    def ranked(self) -> List[ResponseCluster]:
+        """按数量从多到少"""
+        return sorted(self.clusters.values(), key=lambda c: -c.count)
+    
+    # ═══════════ 多进程汇总 ═══════════
+    
+    def track_changes(self):
+        """分片子进程调用, 之后 take_delta() 只返回变化的类别; 实时提示交给父进程"""
+        self._reported = {}
+        self.warmup = math.inf
+    
+    def take_delta(self) -> Dict:
+        """自上次调用以来的增量: 新类别带样本, 老类别只带计数和长度范围"""
+        reported = self._reported
+        changes = []
+        for key, cluster in self.clusters.items():
+            sent = reported.get(key)
+            if sent == cluster.count:
+                continue
+            changes.append((key, cluster.count - (sent or 0), cluster.min_length, cluster.max_length,
+                            cluster.sample if sent is None else None))
+            reported[key] = cluster.count
+        total, overflow = self._reported_totals
+        self._reported_totals = (self.total, self.overflow)
+        return {"total": self.total - total, "overflow": self.overflow - overflow, "clusters": changes}
+    
+    def merge(self, delta: Dict):
+        """父进程合并子进程的增量 (新类别按合并前的总数判断是否过了 warmup)"""
+        self.overflow += delta["overflow"]
+        for key, count, min_length, max_length, sample in delta["clusters"]:
+            cluster = self.clusters.get(key)
+            if cluster is None:
+                if len(self.clusters) >= self.max_clusters:
+                    self.overflow += count
+                    continue
+                cluster = self._create(key, sample or {}, self.total)
+            cluster.add(min_length, count)
+            cluster.add(max_length, 0)
+        self.total += delta["total"]
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🎚️ 自适应并发
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class AdaptiveLimiter:
+    """上限可在运行时调整的信号量 (调小时不打断已在途的请求)"""
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters: deque = deque()
+    
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.cancelled():
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove(fut)
+            else:
+                self.release()  # 已分到名额但被取消
+            raise
+    
+    def release(self):
+        self.active -= 1
+        self._wake()
+    
+    def resize(self, limit: int):
+        self.limit = limit
+        self._wake()
+    
+    def _wake(self):
+        while self._waiters and self.active < self.limit:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.active += 1
+                fut.set_result(None)
+    
+    async def __aenter__(self):
+        await self.acquire()
+    
+    async def __aexit__(self, *exc):
+        self.release()
+
+class ConcurrencyController:
+    """
+    AIMD + 延迟梯度的并发窗口控制器
+    
+    每个周期 (约 1 秒, 样本太少时顺延) 统计成功请求的 p50/p95 延迟和失败率:
+    - 失败率 > max_error_rate, 或 p95 逼近超时: 乘性减 (×0.7)
+    - 否则按 空载延迟 / 当前 p50 的梯度缩放, 再加 √window 的探测余量,
+      延迟没有被排队拉高时窗口持续增长, 一旦开始排队就停在吞吐拐点附近
+    空载延迟取观测到的最小 p50, 每周期上浮 2%, 目标整体变慢时能跟上。
+    """
+    
+    def __init__(self, limiter: AdaptiveLimiter, min_window: int, max_window: int,
+                 timeout: float, max_error_rate: float, interval: float = 1.0):
+        self.limiter = limiter
+        self.min_window = max(1, min(min_window, max_window))
+        self.max_window = max_window
+        self.timeout = timeout
+        self.max_error_rate = max_error_rate
+        self.interval = interval
+        
+        self.window = float(limiter.limit)
+        self.rtt_noload: Optional[float] = None
+        self.p50 = 0.0
+        self.p95 = 0.0
+        self.error_rate = 0.0
+        self._latencies: List[float] = []
+        self._errors = 0
+        self._last_update = time.perf_counter()
+    
+    def record(self, latency: Optional[float], error: bool = False):
+        """记录一次请求: 成功给出延迟, 超时/连接错误记 error"""
+        if error:
+            self._errors += 1
+        elif len(self._latencies) < 8192:
+            self._latencies.append(latency)
+    
+    def maybe_update(self) -> bool:
+        """周期到了且样本足够时调整窗口"""
+        now = time.perf_counter()
+        samples = len(self._latencies) + self._errors
+        if now - self._last_update < self.interval or samples < min(20, self.limiter.limit):
+            return False
+        self._last_update = now
+        
+        latencies = sorted(self._latencies)
+        self.error_rate = self._errors / samples
+        self._latencies = []
+        self._errors = 0
+        
+        if latencies:
+            self.p50 = latencies[len(latencies) // 2]
+            self.p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.rtt_noload = self.p50 if self.rtt_noload is None else min(self.rtt_noload * 1.02, self.p50)
+        
+        if self.error_rate > self.max_error_rate or not latencies or self.p95 > 0.8 * self.timeout:
+            target = self.window * 0.7
+        else:
+            gradient = max(0.5, min(1.0, self.rtt_noload / self.p50)) if self.p50 > 0 else 1.0
+            target = self.window * gradient + math.sqrt(self.window)
+        
+        self.window = max(self.min_window, min(self.max_window, target))
+        self.limiter.resize(int(self.window))
+        return True
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🚦 请求节奏
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TokenBucket:
+    """
+    令牌桶限速 (rate 个/秒, 最多攒 burst 个)
+    
+    令牌可以透支: 取令牌时先扣减, 余额为负就睡到补足为止。
+    并发调用者各自按扣减顺序排队, 不需要锁也不会一起醒来。
+    """
+    
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else rate / 10)
+        self.tokens = self.burst
+        self._last = time.monotonic()
+    
+    async def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+class RetryableStatus(Exception):
+    """目标返回限流/过载状态码 (429/503), 按 Retry-After 退避后重试"""
+    
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}" + (f" (Retry-After {retry_after:g}s)" if retry_after is not None else ""))
+        self.status = status
+        self.retry_after = retry_after
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 头: 秒数或 HTTP 日期"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        from email.utils import parsedate_to_datetime
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+def classify_error(exc: BaseException) -> str:
+    """错误分类: timeout / refused / reset / status / other"""
+    if isinstance(exc, RetryableStatus):
+        return "status"
+    if isinstance(exc, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(exc, (aiohttp.ClientConnectorError, ConnectionRefusedError)):
+        return "refused"
+    if isinstance(exc, (aiohttp.ClientConnectionError, ConnectionError, OSError)):
+        return "reset"
+    return "other"
+
+class CircuitBreaker:
+    """
+    熔断器
+    
+    - closed: 正常放行, 记录最近 window 个请求的成败
+    - open: 失败比例超过 threshold 时打开, 所有工作协程在发送前等待 cooldown 秒
+    - half_open: 冷却结束后只放一个探测请求; 成功则关闭, 失败则重新打开且冷却时间加倍
+    
+    熔断期间失败的请求不消耗重试次数, Payload 留在工作协程手里等恢复后重发。
+    """
+    
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+    
+    def __init__(self, threshold: float = 0.5, window: int = 50,
+                 cooldown: float = 2.0, max_cooldown: float = 60.0):
+        self.threshold = threshold
+        self.window = window
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = self.CLOSED
+        self.trips = 0
+        self._outcomes: deque = deque(maxlen=window)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._closed = asyncio.Event()
+        self._closed.set()
+    
+    @property
+    def is_closed(self) -> bool:
+        return self.state == self.CLOSED
+    
+    async def wait(self):
+        """发送前调用: 熔断时阻塞, 冷却结束后第一个到达的调用者成为探测者"""
+        while self.state != self.CLOSED:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.cooldown - time.monotonic()
+                if remaining <= 0:
+                    self.state = self.HALF_OPEN
+                    return
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._closed.wait(), remaining)
+            else:
+                await self._closed.wait()
+    
+    def record_success(self):
+        if self.state == self.OPEN:
+            return  # 熔断前发出的请求晚到的成功, 不足以说明已恢复
+        if self.state == self.HALF_OPEN:
+            self.cooldown = self.base_cooldown
+            self._outcomes.clear()
+            self._failures = 0
+            self.state = self.CLOSED
+            self._closed.set()
+            return
+        self._push(False)
+    
+    def record_failure(self) -> bool:
+        """记录一次失败, 返回熔断器是否处于非关闭状态 (即失败应归因于目标故障)"""
+        if self.state == self.HALF_OPEN:
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            self._open()
+        elif self.state == self.CLOSED:
+            self._push(True)
+            if len(self._outcomes) >= min(20, self.window) and self._failures > self.threshold * len(self._outcomes):
+                self._open()
+        return self.state != self.CLOSED
+    
+    def _push(self, failed: bool):
+        if len(self._outcomes) == self._outcomes.maxlen and self._outcomes[0]:
+            self._failures -= 1
+        self._outcomes.append(failed)
+        self._failures += failed
+    
+    def _open(self):
+        self.state = self.OPEN
+        self.trips += 1
+        self._opened_at = time.monotonic()
+        self._closed.clear()
+
+class RequestPacer:
+    """
+    请求节奏: 全局/单主机令牌桶 + 按错误类型的指数退避 + 熔断器
+    
+    退避用 full jitter: random(0, base × 2^attempt), 上限 backoff_max;
+    429/503 带 Retry-After 时以它为下限。连接被拒说明服务没起来, 基数最大;
+    超时通常是过载, 次之; 连接被重置多半是瞬时问题, 基数最小。
+    """
+    
+    BACKOFF_BASE = {
+        "timeout": 0.5,
+        "refused": 1.0,
+        "reset": 0.2,
+        "status": 1.0,
+        "other": 0.1,
+    }
+    # 这些错误说明目标本身出了问题, 计入熔断统计 (429 只是限流, 退避即可)
+    OUTAGE_KINDS = ("timeout", "refused", "reset")
+    
+    def __init__(self, config: BruteConfig):
+        self.config = config
+        self.bucket = TokenBucket(config.rate_limit) if config.rate_limit > 0 else None
+        self.host_buckets: Dict[str, TokenBucket] = {}
+        self.breaker = CircuitBreaker(
+            config.breaker_threshold, config.breaker_window, config.breaker_cooldown
+        ) if config.breaker_threshold > 0 else None
+    
+    async def ready(self, timeout: Optional[float] = None) -> bool:
+        """熔断时等待 (在占用并发窗口之前调用); 超过 timeout 秒仍未恢复时返回 False"""
+        breaker = self.breaker
+        if breaker is None or breaker.is_closed:
+            return True
+        if timeout is None:
+            await breaker.wait()
+            return True
+        try:
+            await asyncio.wait_for(breaker.wait(), max(0.0, timeout))
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    async def throttle(self, host: str):
+        """取全局和该主机的令牌"""
+        if self.bucket is not None:
+            await self.bucket.take()
+        if self.config.host_rate_limit > 0:
+            bucket = self.host_buckets.get(host)
+            if bucket is None:
+                bucket = self.host_buckets[host] = TokenBucket(self.config.host_rate_limit)
+            await bucket.take()
+    
+    def success(self):
+        if self.breaker is not None:
+            self.breaker.record_success()
+    
+    def failure(self, exc: BaseException) -> Tuple[str, bool]:
+        """记录失败, 返回 (错误类型, 是否处于目标故障期)"""
+        kind = classify_error(exc)
+        outage = False
+        # 探测期间任何失败都算探测失败, 否则熔断器会一直停在 half_open
+        if self.breaker is not None and (
+                not self.breaker.is_closed or kind in self.OUTAGE_KINDS
+                or (kind == "status" and exc.status == 503)):
+            outage = self.breaker.record_failure()
+        return kind, outage
+    
+    def backoff(self, kind: str, attempt: int, retry_after: Optional[float] = None) -> float:
+        """第 attempt 次重试前的等待时间"""
+        base = self.BACKOFF_BASE.get(kind, 0.1)
+        delay = random.uniform(0, min(self.config.backoff_max, base * (2 ** min(attempt, 16))))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.config.backoff_max))
+        return delay
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              📨 请求模板
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# URL 字面量里保留的字符 (用户写的 URL 视为已编码, 只转义空格/非 ASCII 等)
+_URL_SAFE = "!#$%&'()*+,/:;=?@[]~"
+# Cookie 值保留的字符: http.cookies 的合法字符, 与会话里的 Cookie 合并时不会被再次加引号
+_COOKIE_SAFE = "!#$&'*+-.^_`|~:"
+
+def _encode_form(text: str) -> bytes:
+    return urllib.parse.quote_plus(text).encode()
+
+def _encode_json(text: str) -> bytes:
+    return json.dumps(text)[1:-1].encode()
+
+def _encode_path(text: str) -> bytes:
+    return urllib.parse.quote(text, safe="").encode()
+
+def _encode_url_literal(text: str) -> bytes:
+    return urllib.parse.quote(text, safe=_URL_SAFE).encode()
+
+def _encode_header(text: str) -> bytes:
+    return text.encode()
+
+def _encode_cookie(text: str) -> bytes:
+    return urllib.parse.quote(text, safe=_COOKIE_SAFE).encode()
+
+class _Segments:
+    """字面量 bytes 与占位槽交替的片段表, 渲染时按位置填槽后一次 join"""
+    
+    __slots__ = ("parts", "slots")
+    
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.slots: List[Tuple[int, int, Callable[[str], bytes]]] = []  # (片段下标, Payload 位置, 编码)
+    
+    def literal(self, data: bytes):
+        if not data:
+            return
+        if self.parts and not (self.slots and self.slots[-1][0] == len(self.parts) - 1):
+            self.parts[-1] += data
+        else:
+            self.parts.append(data)
+    
+    def slot(self, position: int, encode: Callable[[str], bytes]):
+        self.slots.append((len(self.parts), position, encode))
+        self.parts.append(b"")
+    
+    def render(self, values: Sequence[str]) -> bytes:
+        if not self.slots:
+            return b"".join(self.parts)
+        parts = self.parts.copy()
+        for i, position, encode in self.slots:
+            parts[i] = encode(values[position])
+        return b"".join(parts)
+
+class RequestTemplate:
+    """
+    预编译请求模板
+    
+    URL (路径/查询串)、请求数据、请求头和 Cookie 里的 {NAME} 在启动时切成字面量段和占位段,
+    字面量按所在位置的规则 (表单 / JSON / URL / Cookie) 预先编码成 bytes,
+    每个请求只编码 Payload 值再 join 一次。生成的表单/JSON 与 urlencode / json.dumps 逐字节一致。
+    不含占位符的请求头和 Cookie 交给会话统一发送, 不进模板。
+    占位槽按 config.payloads 的顺序编号, render() 接收同顺序的处理后值元组。
+    """
+    
+    def __init__(self, config: BruteConfig):
+        method = config.method.upper()
+        self.method = "GET" if method == "GET" else "POST"
+        self.positions = {name: i for i, name in enumerate(config.payloads)}
+        names = sorted(config.payloads, key=len, reverse=True)
+        self._slot_re = re.compile(
+            r"\{(" + "|".join(re.escape(name) for name in names) + r")\}") if names else None
+        
+        self.static_headers = {k: v for k, v in config.headers.items() if not self._has_slots(v)}
+        self.static_cookies = {k: v for k, v in config.cookies.items() if not self._has_slots(v)}
+        
+        # URL: "?" 之前按路径段编码, 之后按查询参数编码; GET 的请求数据拼到查询串末尾
+        url = _Segments()
+        path, sep, query = config.url.partition("?")
+        self._compile(url, path, _encode_url_literal, _encode_path)
+        if sep:
+            url.literal(b"?")
+            self._compile(url, query, _encode_url_literal, _encode_form)
+        
+        body = _Segments()
+        if self.method == "GET":
+            if config.data:
+                url.literal(b"&" if sep else b"?")
+                self._compile_form(url, config.data)
+        elif method == "JSON":
+            self._compile_json(body, config.data)
+        else:
+            self._compile_form(body, config.data)
+        
+        self.url = url
+        self.body = body if self.method == "POST" else None
+        self._static_url = yarl.URL(url.render(()).decode(), encoded=True) if not url.slots else None
+        self._static_body = body.render(()) if self.body is not None and not body.slots else None
+        
+        # 固定的 Content-Type 每次复用同一个 dict, 有占位的请求头/Cookie 才逐个渲染
+        self.base_headers: Dict[str, str] = {}
+        if method == "JSON":
+            self.base_headers["Content-Type"] = "application/json"
+        elif self.method == "POST":
+            self.base_headers["Content-Type"] = "application/x-www-form-urlencoded"
+        self.headers: List[Tuple[str, _Segments]] = []
+        for key, value in config.headers.items():
+            if key not in self.static_headers:
+                segments = _Segments()
+                self._compile(segments, value, _encode_header, _encode_header)
+                self.headers.append((key, segments))
+        cookie = _Segments()
+        for key, value in config.cookies.items():
+            if key not in self.static_cookies:
+                cookie.literal(f"{'; ' if cookie.parts else ''}{key}=".encode())
+                self._compile(cookie, value, _encode_cookie, _encode_cookie)
+        if cookie.parts:
+            self.headers.append(("Cookie", cookie))
+    
+    def _has_slots(self, text: str) -> bool:
+        return self._slot_re is not None and self._slot_re.search(text) is not None
+    
+    def _compile(self, segments: _Segments, text: str,
+                 encode_literal: Callable[[str], bytes], encode_value: Callable[[str], bytes]):
+        pos = 0
+        if self._slot_re is not None:
+            for m in self._slot_re.finditer(text):
+                segments.literal(encode_literal(text[pos:m.start()]))
+                segments.slot(self.positions[m.group(1)], encode_value)
+                pos = m.end()
+        segments.literal(encode_literal(text[pos:]))
+    
+    def _compile_form(self, segments: _Segments, data: Dict[str, str]):
+        """与 urllib.parse.urlencode 相同: quote_plus(key)=quote_plus(value), & 连接"""
+        for i, (key, value) in enumerate(data.items()):
+            segments.literal((b"&" if i else b"") + _encode_form(key) + b"=")
+            self._compile(segments, value, _encode_form, _encode_form)
+    
+    def _compile_json(self, segments: _Segments, data: Dict[str, str]):
+        """与 json.dumps(dict) 相同 (默认分隔符, ensure_ascii)"""
+        segments.literal(b"{")
+        for i, (key, value) in enumerate(data.items()):
+            segments.literal((b", " if i else b"") + json.dumps(key).encode() + b': "')
+            self._compile(segments, value, _encode_json, _encode_json)
+            segments.literal(b'"')
+        segments.literal(b"}")
+    
+    def render(self, values: Sequence[str]) -> Tuple[yarl.URL, Optional[bytes], Dict[str, str]]:
+        """渲染一个 Payload (各位置处理后的值), 返回 (URL, 请求体, 请求头)"""
+        url = self._static_url or yarl.URL(self.url.render(values).decode(), encoded=True)
+        body = self._static_body
+        if body is None and self.body is not None:
+            body = self.body.render(values)
+        headers = self.base_headers
+        if self.headers:
+            headers = dict(headers)
+            for key, segments in self.headers:
+                headers[key] = segments.render(values).decode()
+        return url, body, headers
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🔌 传输层
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class Transport:
+    """
+    传输层接口
+    
+    request() 返回异步上下文管理器, 产出的响应对象只需提供引擎用到的
+    aiohttp.ClientResponse 子集: status / headers.get() / content_length / charset /
+    read() / content.iter_chunked()。退出上下文时由传输层决定连接复用还是关闭。
+    """
+    
+    name = ""
+    
+    def __init__(self, config: BruteConfig, template: RequestTemplate, pool_size: Optional[int] = None):
+        self.config = config
+        self.template = template
+        # 连接数上限, 默认 concurrency; 多目标时按目标能分到的最大并发建, 其它目标结束后放大的窗口才用得上
+        self.pool_size = pool_size or config.concurrency
+    
+    async def open(self):
+        pass
+    
+    def request(self, method: str, url: yarl.URL, body: Optional[bytes], headers: Dict[str, str],
+                trace: Optional[RequestTrace] = None):
+        """trace 不为 None 时填写连接池等待/建连耗时和是否复用连接"""
+        raise NotImplementedError
+    
+    async def close(self):
+        pass
+
+class AiohttpTransport(Transport):
+    """默认传输: aiohttp 会话 (gzip 解压 / Cookie 会话 / 完整 HTTP 支持)"""
+    
+    name = "aiohttp"
+    
+    async def open(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.template.static_headers,
+            cookies=self.template.static_cookies,
+            trace_configs=[self._trace_config()] if self.config.metrics_enabled else None,
+        )
+        self.timeout = aiohttp.ClientTimeout(total=self.config.timeout)
+    
+    @staticmethod
+    def _trace_config() -> aiohttp.TraceConfig:
+        """把 aiohttp 连接池/建连事件记到请求的 RequestTrace 上"""
+        async def start(session, ctx, params):
+            if ctx.trace_request_ctx is not None:
+                ctx.trace_request_ctx.mark = time.perf_counter()
+        
+        async def queued_end(session, ctx, params):
+            if ctx.trace_request_ctx is not None:
+                ctx.trace_request_ctx.pool += time.perf_counter() - ctx.trace_request_ctx.mark
+        
+        async def create_end(session, ctx, params):
+            if ctx.trace_request_ctx is not None:
+                ctx.trace_request_ctx.connect += time.perf_counter() - ctx.trace_request_ctx.mark
+        
+        async def reuse(session, ctx, params):
+            if ctx.trace_request_ctx is not None:
+                ctx.trace_request_ctx.reused = True
+        
+        config = aiohttp.TraceConfig()
+        config.on_connection_queued_start.append(start)
+        config.on_connection_queued_end.append(queued_end)
+        config.on_connection_create_start.append(start)
+        config.on_connection_create_end.append(create_end)
+        config.on_connection_reuseconn.append(reuse)
+        return config
+    
+    def request(self, method: str, url: yarl.URL, body: Optional[bytes], headers: Dict[str, str],
+                trace: Optional[RequestTrace] = None):
+        return self.session.request(method, url, data=body, headers=headers, timeout=self.timeout,
+                                    trace_request_ctx=trace)
+    
+    async def close(self):
+        await self.session.close()
+
+class _RawHeaders(dict):
+    """键为小写的响应头, get() 不区分大小写"""
+    
+    __slots__ = ()
+    
+    def get(self, key: str, default=None):
+        return dict.get(self, key.lower(), default)
+
+class _RawConnection:
+    """一条持久连接; queue 是已写出但响应还没读完的请求 (队首正在读), 长度即流水线深度"""
+    
+    __slots__ = ("reader", "writer", "queue", "served", "closed", "keep_alive")
+    
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.queue: deque = deque()
+        self.served = 0
+        self.closed = False
+        self.keep_alive = True
+    
+    def submit(self, data: bytes) -> asyncio.Future:
+        """写出请求, 返回轮到读取它的响应时完成的 Future"""
+        turn = asyncio.get_running_loop().create_future()
+        if not self.queue:
+            turn.set_result(None)
+        self.queue.append(turn)
+        self.writer.write(data)
+        return turn
+    
+    def finish(self):
+        """队首响应读完, 轮到下一个"""
+        self.queue.popleft()
+        self.served += 1
+        if self.queue and not self.queue[0].done():
+            self.queue[0].set_result(None)
+    
+    def abort(self):
+        """断开连接, 排队中的流水线请求全部失败 (它们会在新连接上重发)"""
+        if self.closed:
+            return
+        self.closed = True
+        self.writer.transport.abort()
+        for turn in self.queue:
+            if not turn.done():
+                turn.set_exception(ConnectionResetError("流水线连接已断开"))
+
+class _RawResponse:
+    """最小 HTTP/1.1 响应: 状态行 + 头, 响应体按 Content-Length / chunked / 读到 EOF 分帧"""
+    
+    __slots__ = ("conn", "status", "headers", "keep_alive", "done",
+                 "_remaining", "_chunked", "_chunk_left", "_decoder")
+    
+    def __init__(self, conn: _RawConnection):
+        self.conn = conn
+        self.done = False
+        self._chunk_left = 0
+        self._decoder = None
+    
+    async def start(self):
+        reader = self.conn.reader
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            raise ConnectionResetError("响应头不完整") from e
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            version, status = lines[0].split(" ", 2)[:2]
+            self.status = int(status)
+        except ValueError:
+            raise ConnectionError(f"无法解析的状态行: {lines[0][:80]!r}") from None
+        headers = self.headers = _RawHeaders()
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        
+        connection = headers.get("connection", "").lower()
+        self.keep_alive = "close" not in connection if version == "HTTP/1.1" else "keep-alive" in connection
+        self._chunked = "chunked" in headers.get("transfer-encoding", "").lower()
+        if self.status in (204, 304) or 100 <= self.status < 200:
+            self._remaining = 0
+        elif self._chunked:
+            self._remaining = None
+        elif "content-length" in headers:
+            self._remaining = int(headers["content-length"])
+        else:
+            self._remaining = None  # 读到连接关闭为止
+            self.keep_alive = False
+        if self._remaining == 0:
+            self.done = True
+        
+        encoding = headers.get("content-encoding", "").lower()
+        if encoding in ("gzip", "deflate"):
+            self._decoder = zlib.decompressobj(31 if encoding == "gzip" else 15)
+    
+    @property
+    def content_length(self) -> Optional[int]:
+        value = self.headers.get("content-length")
+        return int(value) if value is not None and not self._chunked else None
+    
+    @property
+    def charset(self) -> Optional[str]:
+        ctype = self.headers.get("content-type", "")
+        _, sep, charset = ctype.partition("charset=")
+        return charset.split(";")[0].strip().strip('"') or None if sep else None
+    
+    @property
+    def content(self) -> "_RawResponse":
+        return self
+    
+    def iter_chunked(self, n: int) -> "_ChunkIterator":
+        return _ChunkIterator(self, n)
+    
+    async def read(self) -> bytes:
+        """读取剩余的全部响应体"""
+        parts = []
+        while True:
+            chunk = await self._read(65536)
+            if not chunk:
+                return b"".join(parts)
+            parts.append(chunk)
+    
+    async def _read(self, n: int) -> bytes:
+        while True:
+            data = await self._read_raw(n)
+            if self._decoder is None:
+                return data
+            if not data:
+                return self._decoder.flush()
+            data = self._decoder.decompress(data)
+            if data:
+                return data
+    
+    async def _read_raw(self, n: int) -> bytes:
+        if self.done:
+            return b""
+        reader = self.conn.reader
+        try:
+            if not self._chunked:
+                size = n if self._remaining is None else min(n, self._remaining)
+                data = await reader.read(size)
+                if self._remaining is None:
+                    self.done = not data
+                    return data
+                if not data:
+                    raise ConnectionResetError("响应体不完整")
+                self._remaining -= len(data)
+                self.done = self._remaining == 0
+                return data
+            
+            if not self._chunk_left:
+                line = await reader.readuntil(b"\r\n")
+                self._chunk_left = int(line.split(b";", 1)[0], 16)
+                if not self._chunk_left:
+                    while await reader.readuntil(b"\r\n") != b"\r\n":
+                        pass  # trailer
+                    self.done = True
+                    return b""
+            data = await reader.read(min(n, self._chunk_left))
+            if not data:
+                raise ConnectionResetError("响应体不完整")
+            self._chunk_left -= len(data)
+            if not self._chunk_left:
+                await reader.readexactly(2)
+            return data
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            raise ConnectionResetError("响应体不完整") from e
+        except ValueError as e:
+            raise ConnectionError(f"无法解析的 chunk: {e}") from None
+
+class _ChunkIterator:
+    __slots__ = ("resp", "n")
+    
+    def __init__(self, resp: _RawResponse, n: int):
+        self.resp = resp
+        self.n = n
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> bytes:
+        chunk = await self.resp._read(self.n)
+        if not chunk:
+            raise StopAsyncIteration
+        return chunk
+
+class _RawRequest:
+    """
+    一次请求的上下文
+    
+    超时从进入上下文开始计 (含等连接/建连); 流水线上排在别人后面时暂停计时,
+    轮到自己读响应时重新计时, 前一个响应卡住只会由前一个请求的超时断开连接,
+    后面的请求在新连接上重发, 不会跟着一起超时。
+    """
+    
+    __slots__ = ("transport", "data", "trace", "conn", "resp", "waiter", "deadline", "timed_out", "_timer")
+    
+    def __init__(self, transport: "RawTransport", data: bytes, trace: Optional[RequestTrace] = None):
+        self.transport = transport
+        self.data = data
+        self.trace = trace
+        self.conn: Optional[_RawConnection] = None
+        self.resp: Optional[_RawResponse] = None
+        self.waiter: Optional[asyncio.Future] = None
+        self.timed_out = False
+    
+    def _expire(self):
+        self.timed_out = True
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_exception(asyncio.TimeoutError())
+        elif self.conn is not None:
+            self.conn.abort()
+    
+    def arm(self):
+        loop = asyncio.get_running_loop()
+        self.deadline = loop.time() + self.transport.config.timeout
+        self._timer = loop.call_at(self.deadline, self._expire)
+    
+    def disarm(self):
+        self._timer.cancel()
+    
+    async def __aenter__(self) -> _RawResponse:
+        self.arm()
+        try:
+            self.resp = await self.transport._send(self)
+        except BaseException as e:
+            self.disarm()
+            if self.timed_out and isinstance(e, Exception):
+                raise asyncio.TimeoutError() from e
+            raise
+        return self.resp
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        conn, resp = self.conn, self.resp
+        # 后面还有流水线请求时必须读完本响应; 否则剩余部分交给引擎决定 (它会读完小响应)
+        if exc_type is None and not resp.done and len(conn.queue) > 1:
+            with contextlib.suppress(Exception):
+                await resp.read()
+        self.disarm()
+        if resp.done and resp.keep_alive and not conn.closed:
+            self.transport._release(conn)
+        else:
+            conn.abort()
+            self.transport._discard(conn)
+        if self.timed_out and exc_type is not None and issubclass(exc_type, Exception):
+            raise asyncio.TimeoutError() from exc
+        return False
+
+class RawTransport(Transport):
+    """
+    精简 HTTP/1.1 传输 (asyncio streams)
+    
+    请求头的固定部分启动时序列化一次, 每个请求只拼请求行/可变头/请求体;
+    响应只解析状态码和头, 按需读取响应体。连接持久复用, pipeline_depth > 1 时
+    连接数为 ceil(并发 / 深度), 每条连接上最多同时挂 pipeline_depth 个请求。
+    复用的连接在收到响应前断开 (对端关闭空闲连接) 时换新连接自动重发一次;
+    流水线上还没轮到的请求因连接断开失败时总是重发。
+    
+    不支持: 代理, 服务端 Set-Cookie 会话, br 压缩 (请求时不发 Accept-Encoding)。
+    URL 的 协议/主机/端口 固定取 config.url。
+    """
+    
+    name = "raw"
+    
+    # 这些请求头由传输层自己决定
+    _SKIP_HEADERS = ("host", "content-length", "connection", "accept-encoding", "transfer-encoding")
+    
+    async def open(self):
+        url = yarl.URL(self.config.url)
+        self.host = url.raw_host
+        self.port = url.port
+        self.ssl = ssl.create_default_context() if url.scheme == "https" else None
+        self.depth = max(1, self.config.pipeline_depth)
+        self.max_conns = max(1, -(-self.pool_size // self.depth))
+        
+        head = [f"Host: {urllib.parse.urlsplit(self.config.url).netloc.rpartition('@')[2]}\r\n"]
+        for key, value in self.template.static_headers.items():
+            if key.lower() not in self._SKIP_HEADERS:
+                head.append(f"{key}: {value}\r\n")
+        cookie = "; ".join(f"{k}={v}" for k, v in self.template.static_cookies.items())
+        self._static_cookie = None
+        if cookie:
+            if any(key == "Cookie" for key, _ in self.template.headers):
+                self._static_cookie = cookie  # 与模板渲染出的 Cookie 合并
+            else:
+                head.append(f"Cookie: {cookie}\r\n")
+        self._static_head = "".join(head).encode()
+        
+        self._conns: List[_RawConnection] = []
+        self._idle: deque = deque()
+        self._waiters: deque = deque()
+        self._connecting = 0
+    
+    def request(self, method: str, url: yarl.URL, body: Optional[bytes], headers: Dict[str, str],
+                trace: Optional[RequestTrace] = None) -> _RawRequest:
+        parts = [f"{method} {url.raw_path_qs} HTTP/1.1\r\n".encode(), self._static_head]
+        for key, value in headers.items():
+            if key == "Cookie" and self._static_cookie:
+                value = f"{self._static_cookie}; {value}"
+            parts.append(f"{key}: {value}\r\n".encode())
+        if body is not None:
+            parts.append(b"Content-Length: %d\r\n\r\n" % len(body))
+            parts.append(body)
+        else:
+            parts.append(b"\r\n")
+        return _RawRequest(self, b"".join(parts), trace)
+    
+    async def _send(self, req: _RawRequest) -> _RawResponse:
+        retried = False
+        while True:
+            conn = await self._acquire(req)
+            reused = conn.served > 0 or len(conn.queue) > 0
+            req.conn = conn
+            turn = conn.submit(req.data)
+            head = turn.done()
+            try:
+                if not head:
+                    req.disarm()
+                    await turn
+                    head = True
+                    req.arm()
+                resp = _RawResponse(conn)
+                await resp.start()
+                if not resp.keep_alive:
+                    conn.keep_alive = False
+                return resp
+            except ConnectionError:
+                conn.abort()
+                self._discard(conn)
+                # 排在流水线后面时连接断了 (前面的响应要求关闭 / 超时): 还没轮到读, 直接重发
+                if not head:
+                    req.arm()
+                    continue
+                # 新建的连接失败或自己超时: 如实上报; 复用的连接还没收到响应就断了: 重发一次
+                if req.timed_out or retried or not reused:
+                    raise
+                retried = True
+            except BaseException:
+                conn.abort()
+                self._discard(conn)
+                raise
+    
+    async def _acquire(self, req: _RawRequest) -> _RawConnection:
+        """空闲连接 > 新建连接 > 流水线挂到最空的连接 > 等待"""
+        trace = req.trace
+        while True:
+            while self._idle:
+                conn = self._idle.pop()
+                if not conn.closed and not conn.queue:
+                    if trace is not None:
+                        trace.reused = True
+                    return conn
+            
+            if len(self._conns) + self._connecting < self.max_conns:
+                self._connecting += 1
+                started = time.perf_counter()
+                try:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port, ssl=self.ssl, limit=1 << 18),
+                        max(0.0, req.deadline - asyncio.get_running_loop().time()))
+                except BaseException:
+                    self._wake()
+                    raise
+                finally:
+                    self._connecting -= 1
+                if trace is not None:
+                    trace.connect += time.perf_counter() - started
+                conn = _RawConnection(reader, writer)
+                self._conns.append(conn)
+                return conn
+            
+            if self.depth > 1:
+                conn = min((c for c in self._conns if not c.closed and c.keep_alive),
+                           key=lambda c: len(c.queue), default=None)
+                if conn is not None and len(conn.queue) < self.depth:
+                    if trace is not None:
+                        trace.reused = True
+                    return conn
+            
+            req.waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(req.waiter)
+            started = time.perf_counter()
+            try:
+                await req.waiter
+            finally:
+                req.waiter = None
+                if trace is not None:
+                    trace.pool += time.perf_counter() - started
+    
+    def _release(self, conn: _RawConnection):
+        conn.finish()
+        if not conn.queue:
+            self._idle.append(conn)
+        self._wake()
+    
+    def _discard(self, conn: _RawConnection):
+        with contextlib.suppress(ValueError):
+            self._conns.remove(conn)
+        self._wake()
+    
+    def _wake(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+    
+    async def close(self):
+        for conn in self._conns:
+            conn.abort()
+        self._conns.clear()
+        self._idle.clear()
+
+TRANSPORTS: Dict[str, type] = {
+    AiohttpTransport.name: AiohttpTransport,
+    RawTransport.name: RawTransport,
+}
+
+def make_transport(config: BruteConfig, template: RequestTemplate, pool_size: Optional[int] = None) -> Transport:
+    """根据 config.transport 创建传输层 (pool_size: 连接数上限, 默认 concurrency)"""
+    try:
+        return TRANSPORTS[config.transport](config, template, pool_size)
+    except KeyError:
+        raise ValueError(f"未知的传输层: {config.transport} (可选: {', '.join(TRANSPORTS)})") from None
+
+# 进度模式 → (渲染函数, 默认刷新间隔); quiet 不在表里, 不创建渲染任务
+PROGRESS_RENDERERS: Dict[str, Tuple[Callable[[Stats], None], float]] = {
+    "tty": (UI.print_progress, 0.1),
+    "jsonl": (UI.print_progress_jsonl, 1.0),
+}
+
+# 合并字典的进度 (只在首次合并时出现)
+MERGE_RENDERERS: Dict[str, Callable[[Dict], None]] = {
+    "tty": UI.print_merge_progress,
+    "jsonl": UI.print_merge_progress_jsonl,
+}
+
+def resolve_progress_mode(mode: str) -> str:
+    """auto: 标准输出是终端时用 tty, 否则 jsonl"""
+    if mode == "auto":
+        return "tty" if sys.stdout.isatty() else "jsonl"
+    if mode != "quiet" and mode not in PROGRESS_RENDERERS:
+        raise ValueError(f"未知的进度模式: {mode} (可选: auto, quiet, {', '.join(PROGRESS_RENDERERS)})")
+    return mode
+
 # ═══════════════════════════════════════════════════════════════════════════════
 #                              🚀 爆破引擎
 # ═══════════════════════════════════════════════════════════════════════════════
 
+ATTACK_MODES = ("cluster_bomb", "pitchfork", "battering_ram", "sniper")
+
 class BruteEngine:
     """异步爆破引擎"""
     
-    def __init__(self, config: BruteConfig):
+    CLUSTER_NOTICES = 20
+    PRUNE_NOTICES = 20
+    
+    def __init__(self, config: BruteConfig, shard: Optional[Tuple[int, int]] = None):
         self.config = config
+        self.shard = shard  # 只跑组合编号 [lo, hi) 区间
         self.stats = Stats()
         self.stop_flag = False
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.interrupted = False    # 用户中断 (Ctrl-C) 导致的停止
+        # 进度渲染与调度解耦: 独立定时任务按固定频率读计数器, quiet 时 hook 为 None
+        self.progress_mode = resolve_progress_mode(config.progress)
+        hook, interval = PROGRESS_RENDERERS.get(self.progress_mode, (None, 0.0))
+        self.progress_hook: Optional[Callable[[Stats], None]] = hook
+        self.progress_interval: float = config.progress_interval or interval
+        self.matcher = ResponseMatcher(config)
+        self.profile: Optional[BaselineProfile] = None
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self.cache: Optional[ProcessedCache] = (
+            ProcessedCache(config.cache_dir, config.cache_max_mb << 20) if config.cache_dir else None)
+        self.transport: Optional[Transport] = None
+        self.pool_size: Optional[int] = None  # 传输层连接数上限, None = concurrency
+        self.semaphore: Optional[AdaptiveLimiter] = None
+        self.controller: Optional[ConcurrencyController] = None
+        self.sink = ResultSink(self.stats, config.output_file, config.results_keep, config.output_queue)
+        self.pacer: Optional[RequestPacer] = None
+        self.host = urllib.parse.urlsplit(config.url).netloc
+        self.template = RequestTemplate(config)
+        if config.attack_mode not in ATTACK_MODES:
+            raise ValueError(f"未知的攻击模式: {config.attack_mode} (可选: {', '.join(ATTACK_MODES)})")
+        self._sources: Optional[List[Tuple[str, PayloadSource, List[Callable]]]] = None
+        self._defaults: Optional[Tuple[str, ...]] = None
+        self._processed_positions = [i for i, cfg in enumerate(config.payloads.values()) if cfg.get("processors")]
+        self.clusters: Optional[ResponseClusters] = (
+            ResponseClusters(config.cluster_max, config.cluster_warmup, self.payload_dict, self._reflections)
+            if config.cluster else None)
+        self._cluster_notices = 0
+        self.metrics: Optional[Metrics] = Metrics() if config.metrics_enabled else None
+        # 剪枝: 每个位置已有结论的值 (来源里的下标); epoch 每次新增剪枝加 1, 生成器据此发现祖先位置被剪
+        names = list(config.payloads)
+        unknown = (set(config.prune_on_hit) | set(config.prune_signatures)) - set(names)
+        if unknown:
+            raise ValueError(f"剪枝配置引用了不存在的位置: {', '.join(sorted(unknown))}")
+        self._pruned: List[set] = [set() for _ in names]
+        self._prune_epoch = 0
+        self._prune_hit = [names.index(name) for name in config.prune_on_hit]
+        self._prune_regexes = [
+            (names.index(name), re.compile(b"|".join(map(re.escape, _keyword_variants(words))), re.I))
+            for name, words in config.prune_signatures.items() if words]
+        # 流式读取时剪枝特征跨分块边界需要回看的字节数
+        self._prune_overlap = max((len(raw) for words in config.prune_signatures.values()
+                                   for raw in _keyword_variants(words)), default=1) - 1
+        if (self._prune_hit or self._prune_regexes) and config.attack_mode != "cluster_bomb":
+            raise ValueError("剪枝只支持 cluster_bomb 攻击模式")
+        self._radix: Optional[List[Tuple[int, int]]] = None
+        self._prune_fresh: List[Tuple[str, str, str]] = []
+        self._prune_notices = 0
+    
+    def build_sources(self) -> List[Tuple[str, "PayloadSource", List[Callable]]]:
+        """构建每个爆破位置的 (名称, 值来源, 处理器链)"""
+        return [
+            (name, make_source(cfg, self.config.cache_dir, MERGE_RENDERERS.get(self.progress_mode)),
+             cfg.get("processors", []))
+            for name, cfg in self.config.payloads.items()
+        ]
+    
+    def count_payloads(self) -> int:
+        """总请求数 (按攻击模式算, 不枚举)"""
+        return self._count(self.build_sources())
     
-    def generate_payloads(self) -> List[Dict]:
-        """生成所有 Payload 组合"""
-        payload_data = {}
+    def dedup_savings(self, sources: Optional[List[Tuple[str, PayloadSource, List[Callable]]]] = None) -> int:
+        """多字典去重省下的请求数: 按去重前的行数算出的总数 - 实际总数"""
+        sources = sources if sources is not None else self.build_sources()
+        raw, merged = [], False
+        for _, source, _ in sources:
+            wordlist = merged_wordlist(source)
+            if wordlist is None:
+                raw.append(len(source))
+            else:
+                merged = True
+                raw.append(len(source) // max(1, len(wordlist)) * wordlist.raw_count)
+        return self._count_sizes(raw) - self._count(sources) if merged else 0
+    
+    def _count(self, sources: List[Tuple[str, PayloadSource, List[Callable]]]) -> int:
+        return self._count_sizes([len(source) for _, source, _ in sources])
+    
+    def _count_sizes(self, sizes: List[int]) -> int:
+        mode = self.config.attack_mode
+        if not sizes:
+            return 1
+        if mode == "pitchfork":
+            return min(sizes)
+        if mode == "battering_ram":
+            return sizes[0]
+        if mode == "sniper":
+            return sum(sizes)
+        return math.prod(sizes)
+    
+    def generate_payloads(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """惰性生成 Payload 组合的展示用 dict (发送走 iter_payloads 的紧凑表示)"""
+        return (self.payload_dict(index, values) for index, values in self.iter_payloads(start, stop))
+    
+    def iter_payloads(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+        """
+        惰性产出 (组合编号, 各位置处理后的值)
         
-        for name, cfg in self.config.payloads.items():
-            ptype = cfg.get("type", "list")
-            processors = cfg.get("processors", [])
-            
-            # 生成原始值
-            if ptype == "range":
-                start = cfg.get("start", 0)
-                end = cfg.get("end", 100)
-                step = cfg.get("step", 1)
-                fmt = cfg.get("format", "{}")
-                raw_values = [fmt.format(i) for i in range(start, end + 1, step)]
-            
-            elif ptype == "file":
-                path = cfg.get("path", "")
-                if not os.path.exists(path):
-                    raise FileNotFoundError(f"字典文件不存在: {path}")
-                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                    raw_values = [line.strip() for line in f if line.strip()]
-            
-            else:  # list
-                raw_values = [str(v) for v in cfg.get("values", [])]
-            
-            # 应用处理器
-            payload_data[name] = []
-            for val in raw_values:
+        编号规则由 attack_mode 决定 (见 originals_at), 只产出 [start, stop) 区间,
+        用于多进程分片和断点续跑。值按 config.payloads 的顺序放在元组里,
+        原始值需要时按编号从来源取 (originals_at)。
+        """
+        sources = self._positions()
+        stop = self._count(sources) if stop is None else min(stop, self._count(sources))
+        if start >= stop:
+            return iter(())
+        mode = self.config.attack_mode
+        if mode == "pitchfork":
+            streams = [self._iter_processed(source, processors, start) for _, source, processors in sources]
+            return self._iter_zipped(streams, start, stop)
+        if mode == "battering_ram":
+            first = sources[0][1]
+            streams = [self._iter_processed(first, processors, start) for _, _, processors in sources]
+            return self._iter_zipped(streams, start, stop)
+        if mode == "sniper":
+            return self._iter_sniper(sources, start, stop)
+        return self._iter_cluster_bomb(sources, start, stop)
+    
+    def _iter_cluster_bomb(self, sources: List[Tuple[str, PayloadSource, List[Callable]]],
+                           start: int, stop: int) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+        """笛卡尔积: 按混合进制编号 (第一个位置为最高位), 外层位置的值在内层循环中共享同一个对象"""
+        n = len(sources)
+        # 内层组合数: 第 depth 位每加 1 跳过的组合数
+        inner_counts = [1] * n
+        for i in range(n - 2, -1, -1):
+            inner_counts[i] = inner_counts[i + 1] * len(sources[i + 1][1])
+        
+        # 起点编号拆成各位置的下标
+        start_digits = []
+        rem = start
+        for inner in inner_counts:
+            start_digits.append(rem // inner)
+            rem %= inner
+        
+        stats = self.stats
+        pruned = self._pruned if self.pruning else None
+        
+        def skip(lo: int, hi: int) -> int:
+            """从 total 中扣除 [lo, hi) 落在区间内的组合"""
+            count = max(0, min(hi, stop) - max(lo, start))
+            stats.total -= count
+            return count
+        
+        def product(depth: int, base: int, head: bool, prefix: Tuple[str, ...],
+                    digits: Tuple[int, ...]) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+            if depth == n:
+                yield base, prefix
+                return
+            _, source, processors = sources[depth]
+            inner = inner_counts[depth]
+            begin = start_digits[depth] if head else 0
+            index = base + begin * inner
+            epoch = self._prune_epoch
+            # 内层位置每轮重新迭代来源, 不像 itertools.product 那样先物化全部输入
+            for digit, (val, processed) in enumerate(self._iter_processed(source, processors, begin), begin):
+                if index >= stop:
+                    return
+                if pruned is not None:
+                    if epoch != self._prune_epoch:
+                        # 有新的剪枝: 外层位置的值被剪掉时, 本轮剩下的组合整段跳过
+                        epoch = self._prune_epoch
+                        if any(d in pruned[i] for i, d in enumerate(digits)):
+                            stats.skipped += skip(index, base + len(source) * inner)
+                            return
+                    if digit in pruned[depth]:
+                        stats.skipped += skip(index, index + inner)
+                        head = False
+                        index += inner
+                        continue
+                if processed is None:
+                    # 处理失败: 从 total 中扣除被跳过且落在区间内的组合
+                    skip(index, index + inner)
+                else:
+                    yield from product(depth + 1, index, head, prefix + (str(processed),), digits + (digit,))
+                head = False
+                index += inner
+        
+        return product(0, 0, True, (), ())
+    
+    def _iter_zipped(self, streams: List[Iterator[Tuple[str, Optional[str]]]],
+                     start: int, stop: int) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+        """pitchfork / battering_ram: 第 k 个请求取各位置的第 k 个值"""
+        for index, pairs in zip(range(start, stop), zip(*streams)):
+            if any(processed is None for _, processed in pairs):
+                self.stats.total -= 1
+            else:
+                yield index, tuple(str(processed) for _, processed in pairs)
+    
+    def _iter_sniper(self, sources: List[Tuple[str, PayloadSource, List[Callable]]],
+                     start: int, stop: int) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+        """依次对每个位置跑它的全部值, 其余位置固定为处理后的默认值"""
+        defaults = []
+        for original, (_, _, processors) in zip(self._sniper_defaults(), sources):
+            try:
+                defaults.append(str(apply_processors(original, processors)) if processors else original)
+            except Exception:
+                defaults.append(None)
+        end = 0
+        for position, (_, source, processors) in enumerate(sources):
+            base, end = end, end + len(source)
+            lo, hi = max(start, base), min(stop, end)
+            if lo >= hi:
+                continue
+            head, tail = tuple(defaults[:position]), tuple(defaults[position + 1:])
+            if None in head or None in tail:
+                self.stats.total -= hi - lo
+                continue
+            index = lo
+            for _, processed in self._iter_processed(source, processors, lo - base):
+                if index >= hi:
+                    break
+                if processed is None:
+                    self.stats.total -= 1
+                else:
+                    yield index, head + (str(processed),) + tail
+                index += 1
+    
+    def _sniper_defaults(self) -> Tuple[str, ...]:
+        """sniper 模式下没轮到的位置的原始值: 配置的 default, 否则该位置的第一个值"""
+        if self._defaults is None:
+            self._defaults = tuple(
+                str(self.config.payloads[name].get("default", source[0] if len(source) else ""))
+                for name, source, _ in self._positions())
+        return self._defaults
+    
+    def payloads_at(self, indices: List[int]) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+        """按编号随机取组合 (断点续跑时重发在途的组合), 处理失败的组合跳过"""
+        sources = self._positions()
+        for index in indices:
+            values = []
+            for val, (_, _, processors) in zip(self.originals_at(index), sources):
                 try:
-                    processed = apply_processors(val, processors) if processors else val
-                    payload_data[name].append({
-                        "original": val,
-                        "processed": processed
-                    })
-                except:
-                    continue
+                    values.append(str(apply_processors(val, processors)) if processors else val)
+                except Exception:
+                    break
+            else:
+                yield index, tuple(values)
+    
+    def _positions(self) -> List[Tuple[str, PayloadSource, List[Callable]]]:
+        """build_sources 的缓存, 按编号取原始值时用"""
+        if self._sources is None:
+            self._sources = self.build_sources()
+        return self._sources
+    
+    def originals_at(self, index: int) -> Tuple[str, ...]:
+        """组合编号 → 各位置的原始值 (各来源都支持 O(1) 随机访问)"""
+        sources = self._positions()
+        mode = self.config.attack_mode
+        if mode == "pitchfork":
+            return tuple(source[index] for _, source, _ in sources)
+        if mode == "battering_ram":
+            return (sources[0][1][index],) * len(sources)
+        if mode == "sniper":
+            values = list(self._sniper_defaults())
+            for position, (_, source, _) in enumerate(sources):
+                if index < len(source):
+                    values[position] = source[index]
+                    break
+                index -= len(source)
+            return tuple(values)
+        values = []
+        for _, source, _ in reversed(sources):
+            index, digit = divmod(index, len(source))
+            values.append(source[digit])
+        values.reverse()
+        return tuple(values)
+    
+    def payload_dict(self, index: int, values: Sequence[str]) -> Dict:
+        """紧凑表示 → {名称: {"original", "processed"}}, 只在命中和展示时构建"""
+        return {
+            name: {"original": original, "processed": processed}
+            for (name, _, _), original, processed in zip(self._positions(), self.originals_at(index), values)
+        }
+    
+    def _reflections(self, index: int, values: Tuple[str, ...]) -> Tuple[bytes, ...]:
+        """回显候选: 处理后的值, 以及带处理器位置的原始值"""
+        if not self._processed_positions:
+            return payload_reflections(values)
+        originals = self.originals_at(index)
+        return payload_reflections(values + tuple(originals[i] for i in self._processed_positions))
+    
+    @property
+    def pruning(self) -> bool:
+        return bool(self._prune_hit or self._prune_regexes)
+    
+    def _radix_of(self) -> List[Tuple[int, int]]:
+        """各位置的 (内层组合数, 值数量), 组合编号 → 位置下标用"""
+        if self._radix is None:
+            sizes = [len(source) for _, source, _ in self._positions()]
+            inner = [math.prod(sizes[i + 1:]) for i in range(len(sizes))]
+            self._radix = list(zip(inner, sizes))
+        return self._radix
+    
+    def is_pruned(self, index: int) -> bool:
+        for pruned, (inner, size) in zip(self._pruned, self._radix_of()):
+            if pruned and index // inner % size in pruned:
+                return True
+        return False
+    
+    def prune(self, index: int, positions: List[int], reason: str):
+        """组合 index 在这些位置上的值已有结论, 之后包含它们的组合都跳过"""
+        sources = self._positions()
+        for position in positions:
+            inner, size = self._radix_of()[position]
+            digit = index // inner % size
+            if digit in self._pruned[position]:
+                continue
+            self._pruned[position].add(digit)
+            self._prune_epoch += 1
+            self.stats.pruned += 1
+            if self.stats.pruned <= self.PRUNE_NOTICES:
+                name, source, _ = sources[position]
+                self._prune_fresh.append((name, source[digit], reason))
+    
+    def take_prunes(self) -> List[Tuple[str, str, str]]:
+        """取出并清空待提示的剪枝 (位置, 原始值, 原因)"""
+        fresh, self._prune_fresh = self._prune_fresh, []
+        return fresh
+    
+    def _iter_processed(self, source: PayloadSource, processors: List[Callable],
+                        begin: int) -> Iterator[Tuple[str, Optional[str]]]:
+        """从第 begin 个值开始产出 (原始值, 处理后值), 处理失败时处理后值为 None"""
+        if not processors:
+            for val in source.iter_from(begin):
+                yield val, val
+            return
+        
+        key = self.cache.key(source, processors) if self.cache else None
+        if key:
+            cached = self.cache.open(key, len(source))
+            if cached is not None:
+                with cached:
+                    yield from zip(source.iter_from(begin), cached.iter_from(begin))
+                return
+            if begin == 0:
+                # 缓存未命中: 第一次完整遍历时顺便写入
+                yield from self._process_and_store(source, processors, key)
+                return
+        
+        yield from self._compute(source, processors, begin)
+    
+    def _compute(self, source: PayloadSource, processors: List[Callable],
+                 begin: int) -> Iterator[Tuple[str, Optional[str]]]:
+        """按块批量计算处理器链, 值足够多且开启 process_workers 时交给进程池"""
+        chunk_size = max(1, self.config.process_chunk)
+        chunks = iter(lambda it=source.iter_from(begin): list(itertools.islice(it, chunk_size)), [])
         
-        # 生成笛卡尔积
-        names = list(payload_data.keys())
-        values_list = [payload_data[n] for n in names]
+        pool = None
+        if self.config.process_workers > 0 and len(source) - begin >= 2 * chunk_size:
+            pool = self._get_pool()
+        if pool is None:
+            batch = compile_batch(processors)
+            for values in chunks:
+                yield from zip(values, batch(values))
+            return
         
-        return [dict(zip(names, combo)) for combo in itertools.product(*values_list)]
+        # 有限预取: 最多 2 * workers 个块在途, 不会一次提交整个字典
+        window = 2 * self.config.process_workers
+        pending: deque = deque()
+        for values in chunks:
+            pending.append((values, pool.submit(process_chunk, values, processors)))
+            if len(pending) >= window:
+                done_values, future = pending.popleft()
+                yield from zip(done_values, future.result())
+        while pending:
+            done_values, future = pending.popleft()
+            yield from zip(done_values, future.result())
+    
+    def _get_pool(self) -> Optional[concurrent.futures.ProcessPoolExecutor]:
+        """按需创建处理器进程池, 创建失败 (如在守护进程中) 时回退为单进程"""
+        if self._pool is None:
+            try:
+                self._pool = concurrent.futures.ProcessPoolExecutor(self.config.process_workers)
+            except (OSError, ValueError, AssertionError):
+                return None
+        return self._pool
+    
+    def _process_and_store(self, source: PayloadSource, processors: List[Callable],
+                           key: str) -> Iterator[Tuple[str, Optional[str]]]:
+        """边处理边写缓存, 只有完整遍历结束才提交, 中途停止则丢弃"""
+        try:
+            writer = self.cache.writer(key)
+        except OSError:
+            yield from self._compute(source, processors, 0)
+            return
+        committed = False
+        try:
+            for val, processed in self._compute(source, processors, 0):
+                writer.add(processed)
+                yield val, processed
+            try:
+                writer.commit()
+                committed = True
+                self.cache.evict()
+            except OSError:
+                pass  # 缓存写失败不影响爆破
+        finally:
+            if not committed:
+                writer.abort()
     
-    def build_request_data(self, payload: Dict) -> Dict:
-        """构建请求数据"""
+    def build_request_data(self, values: Sequence[str]) -> Dict:
+        """构建请求数据字典 (仅用于展示; 发送走预编译的 self.template)"""
         data = {}
         for key, template in self.config.data.items():
             value = template
-            for name, val in payload.items():
-                processed = val["processed"] if isinstance(val, dict) else val
-                value = value.replace(f"{{{name}}}", str(processed))
+            for name, processed in zip(self.config.payloads, values):
+                value = value.replace(f"{{{name}}}", processed)
             data[key] = value
         return data
     
-    def check_success(self, text: str, length: int, status: int) -> bool:
+    def check_success(self, body: bytes, length: int, status: int,
+                      reflected: Tuple[bytes, ...] = (), fail_checked: bool = False) -> bool:
         """检查是否成功"""
-        text_lower = text.lower()
-        
-        # 检查失败关键字
-        for kw in self.config.fail_keywords:
-            if kw.lower() in text_lower:
-                return False
+        return self.matcher.check(body, length, status, self.stats.baseline_length,
+                                  fail_checked=fail_checked, profile=self.profile, reflected=reflected)
+    
+    def _check(self, trace: Optional[RequestTrace], body: bytes, length: int, status: int,
+               reflected: Tuple[bytes, ...] = (), fail_checked: bool = False) -> bool:
+        """check_success, 开启指标时把判定耗时累计到 trace"""
+        if trace is None:
+            return self.check_success(body, length, status, reflected, fail_checked)
+        started = time.perf_counter()
+        hit = self.check_success(body, length, status, reflected, fail_checked)
+        trace.check += time.perf_counter() - started
+        return hit
+    
+    def extract_flags(self, body: bytes) -> List[str]:
+        """提取 Flag"""
+        return self.matcher.extract_flags(body)
+    
+    def _set_baseline(self, length: int):
+        """未校准时用第一个完整响应的长度作为基准"""
+        if self.stats.baseline_length is None and self.profile is None:
+            self.stats.baseline_length = length
+    
+    def _probe_payload(self) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """必然失败的探测 Payload: 每个位置一个随机值, 同样经过处理器链; 返回 (处理后, 原始)"""
+        originals, values = [], []
+        for cfg in self.config.payloads.values():
+            val = ''.join(random.choices(string.ascii_lowercase + string.digits, k=12))
+            try:
+                processed = str(apply_processors(val, cfg.get("processors", [])))
+            except Exception:
+                processed = val
+            originals.append(val)
+            values.append(processed)
+        return tuple(values), tuple(originals)
+    
+    async def calibrate(self) -> Optional[BaselineProfile]:
+        """发送 calibration_probes 个探测请求建立基准画像, 成功少于 2 个时返回 None"""
+        if not self.config.smart_mode or self.config.calibration_probes <= 0:
+            return None
         
-        # 检查成功关键字
-        for kw in self.config.success_keywords:
-            if kw.lower() in text_lower:
-                return True
+        async def probe():
+            values, originals = self._probe_payload()
+            request = self.template.render(values)
+            try:
+                async with self.semaphore:
+                    async with self._request(request) as resp:
+                        # 限流/过载页不代表失败页, 不能混进基准
+                        if resp.status in self.config.retry_statuses:
+                            return None
+                        body = await self._read_capped(resp)
+                        return body, resp.status, payload_reflections(values + originals)
+            except Exception:
+                return None
         
-        # 正则匹配
-        if self.config.success_regex:
-            if re.search(self.config.success_regex, text, re.I):
-                return True
+        samples = await asyncio.gather(*[probe() for _ in range(self.config.calibration_probes)])
+        samples = [sample for sample in samples if sample is not None]
+        if len(samples) < 2:
+            return None
+        profile = BaselineProfile(samples)
+        self.stats.baseline_length = profile.length
+        return profile
+    
+    def _request(self, request: Tuple[yarl.URL, Optional[bytes], Dict[str, str]],
+                 trace: Optional[RequestTrace] = None):
+        """发出模板渲染好的请求, 返回传输层的请求上下文"""
+        url, body, headers = request
+        return self.transport.request(self.template.method, url, body, headers, trace)
+    
+    async def _evaluate(self, resp: aiohttp.ClientResponse, index: int, values: Tuple[str, ...],
+                        trace: Optional[RequestTrace] = None) -> Tuple[bool, bytes, int]:
+        """
+        读取并判定响应, 返回 (是否成功, 已读响应体, 长度)
         
-        # 长度判断
-        if self.config.success_length is not None:
-            if length == self.config.success_length:
-                return True
+        流式模式下:
+        - 只有状态码/长度条件且有 Content-Length 时, 判定前不读响应体
+        - 否则分块读取, 一出现失败关键字就停止匹配, 剩余部分大时直接断开;
+          配了剪枝特征时要等各特征都出现 (或读完) 才停, 失败关键字后面的特征不会漏掉
+        - 最多读取 max_body_size 字节
+        每个响应同时计入聚类表 (self.clusters)
+        """
+        config, matcher, clusters = self.config, self.matcher, self.clusters
+        status = resp.status
+        reflected = self._reflections(index, values) if self.profile is not None else ()
+        # 压缩响应的 Content-Length 是压缩后大小, 不能当作响应体长度
+        clen = None if resp.headers.get("Content-Encoding") else resp.content_length
         
-        if self.config.success_length_not is not None:
-            if length != self.config.success_length_not:
-                return True
+        if not config.stream_mode:
+            body = await resp.read()
+            self._set_baseline(len(body))
+            if clusters is not None:
+                clusters.observe(status, len(body), body, index, values)
+            return self._check(trace, body, len(body), status, reflected), body, len(body)
         
-        # 状态码
-        if self.config.success_status is not None:
-            if status == self.config.success_status:
-                return True
+        if not matcher.needs_body and clen is not None:
+            self._set_baseline(clen)
+            if clusters is not None:
+                clusters.observe(status, clen, b"", index, values)
+            if self._check(trace, b"", clen, status):
+                return True, await self._read_capped(resp), clen
+            if clen <= config.stream_chunk:
+                await resp.read()  # 小响应读完, 连接可以复用
+            return False, b"", clen
         
-        # 智能模式
-        if self.config.smart_mode and self.stats.baseline_length is not None:
-            diff = abs(length - self.stats.baseline_length)
-            threshold = max(50, self.stats.baseline_length * 0.1)
-            if diff > threshold:
-                return True
+        buf = bytearray()
+        scanned = 0
+        fail_regex = matcher.fail_regex
+        fail_end: Optional[int] = None  # 失败关键字结束位置
+        pending = self._prune_regexes   # 还没出现的剪枝特征
+        complete = True
+        async for chunk in resp.content.iter_chunked(config.stream_chunk):
+            buf += chunk
+            if pending:
+                start = max(0, scanned - self._prune_overlap)
+                pending = [item for item in pending if not item[1].search(buf, start)]
+            if fail_regex is not None and fail_end is None:
+                m = fail_regex.search(buf, max(0, scanned - matcher.overlap))
+                if m:
+                    fail_end = m.end()
+            if fail_end is not None and not pending:
+                if clen is not None and clen - len(buf) <= config.stream_drain_limit:
+                    await resp.read()  # 剩余不多, 读完以复用连接 (重连比多收几百 KB 更贵)
+                if clusters is not None:
+                    # 按到失败关键字为止的前缀分类, 与网络分块无关
+                    clusters.observe(status, clen, bytes(buf[:fail_end]), index, values)
+                return False, bytes(buf), clen if clen is not None else len(buf)
+            scanned = len(buf)
+            if len(buf) >= config.max_body_size:
+                del buf[config.max_body_size:]
+                complete = False
+                break
         
-        return False
+        body = bytes(buf)
+        if fail_end is not None:
+            # 失败关键字之后没等到全部剪枝特征, 判定同上
+            if clusters is not None:
+                clusters.observe(status, clen, body[:fail_end], index, values)
+            return False, body, clen if clen is not None else len(body)
+        if complete:
+            length = len(body)
+            self._set_baseline(length)
+        else:
+            length = clen if clen is not None else len(body)
+        if clusters is not None:
+            clusters.observe(status, length, body, index, values)
+        hit = self._check(trace, body, length, status, reflected, fail_checked=fail_regex is not None)
+        return hit, body, length
     
-    def extract_flags(self, text: str) -> List[str]:
-        """提取 Flag"""
-        patterns = [
-            r'flag\{[^}]+\}',
-            r'FLAG\{[^}]+\}',
-            r'ctf\{[^}]+\}',
-            r'CTF\{[^}]+\}',
-            r'NSSCTF\{[^}]+\}',
-            r'hgame\{[^}]+\}',
-        ]
-        
-        flags = []
-        for p in patterns:
-            flags.extend(re.findall(p, text, re.I))
-        return list(set(flags))
+    async def _read_capped(self, resp: aiohttp.ClientResponse) -> bytes:
+        """最多读取 max_body_size 字节"""
+        buf = bytearray()
+        async for chunk in resp.content.iter_chunked(self.config.stream_chunk):
+            buf += chunk
+            if len(buf) >= self.config.max_body_size:
+                return bytes(buf[:self.config.max_body_size])
+        return bytes(buf)
     
-    async def try_one(self, payload: Dict) -> Optional[Dict]:
-        """尝试单个 Payload"""
+    async def try_one(self, index: int, values: Tuple[str, ...]) -> Optional[HitRecord]:
+        """尝试单个 Payload (组合编号, 各位置处理后的值)"""
         if self.stop_flag:
             return None
+        if self._prune_epoch and self.is_pruned(index):
+            # 生成之后才被剪掉的组合 (排队中/断点里的在途组合)
+            self.stats.total -= 1
+            self.stats.skipped += 1
+            return None
         
-        data = self.build_request_data(payload)
+        request = self.template.render(values)
+        pacer = self.pacer
+        metrics = self.metrics
         
-        for attempt in range(self.config.retries + 1):
+        attempt = 0     # 消耗重试次数的失败
+        deferred = 0    # 目标故障/限流导致的失败, 不消耗重试次数, 只加大退避
+        # 熔断等待和推迟重发合计的时限, 一直拒绝的目标 (WAF 拦截页/后端挂掉) 不会让爆破卡住
+        deadline = time.monotonic() + self.config.max_defer_time if self.config.max_defer_time > 0 else None
+        while True:
+            # 指标关闭时 trace 为 None, 各阶段都不计时
+            trace = RequestTrace() if metrics is not None else None
+            queued = time.perf_counter()
+            # 熔断时在这里等, 不占并发窗口
+            if not await pacer.ready(None if deadline is None else deadline - time.monotonic()):
+                if not deferred:
+                    self.stats.deferred += 1
+                self._give_up("deferred", "熔断等待超时", refused=True)
+                return None
             try:
                 async with self.semaphore:
-                    timeout = aiohttp.ClientTimeout(total=self.config.timeout)
-                    
-                    if self.config.method.upper() == "GET":
-                        async with self.session.get(self.config.url, params=data, timeout=timeout) as resp:
-                            text = await resp.text()
-                            status = resp.status
-                    elif self.config.method.upper() == "JSON":
-                        async with self.session.post(self.config.url, json=data, timeout=timeout) as resp:
-                            text = await resp.text()
-                            status = resp.status
-                    else:  # POST
-                        async with self.session.post(self.config.url, data=data, timeout=timeout) as resp:
-                            text = await resp.text()
-                            status = resp.status
-                
-                length = len(text)
-                
-                # 设置基准
-                if self.stats.baseline_length is None:
-                    self.stats.baseline_length = length
+                    await pacer.throttle(self.host)
+                    started = time.perf_counter()
+                    # 只读原始字节, 命中时才解码
+                    async with self._request(request, trace) as resp:
+                        headers_at = time.perf_counter() if trace is not None else 0.0
+                        status = resp.status
+                        if status in self.config.retry_statuses and status != self.config.success_status:
+                            raise RetryableStatus(status, parse_retry_after(resp.headers.get("Retry-After")))
+                        hit, body, length = await self._evaluate(resp, index, values, trace)
+                        charset = resp.charset
+                    done_at = time.perf_counter()
+                    if self.controller is not None:
+                        self.controller.record(done_at - started)
+                    if trace is not None:
+                        metrics.record_request(trace, queued, started, headers_at, done_at)
+                pacer.success()
                 
                 # 检查成功
-                if self.check_success(text, length, status):
-                    flags = self.extract_flags(text)
-                    result = {
-                        "payload": payload,
-                        "length": length,
-                        "status": status,
-                        "flags": flags,
-                        "response": text[:2000]
-                    }
-                    
-                    self.stats.success += 1
-                    self.stats.results.append(result)
-                    self.stats.flags.extend(flags)
+                if hit:
+                    flags = self.extract_flags(body)
+                    if metrics is not None:
+                        metrics.observe("flags", time.perf_counter() - done_at)
+                    result = HitRecord(self.payload_dict(index, values), length, status, flags,
+                                       decode_body(body[:8000], charset)[:2000])
                     
                     if self.config.auto_stop:
                         self.stop_flag = True
-                    
-                    return result
+                    elif self._prune_hit:
+                        self.prune(index, self._prune_hit, "命中")
+                    break
                 
+                for position, regex in self._prune_regexes:
+                    if regex.search(body):
+                        self.prune(index, [position], "特征")
                 self.stats.completed += 1
                 return None
-                
-            except asyncio.TimeoutError:
-                if attempt < self.config.retries:
-                    self.stats.retried += 1
-                else:
-                    self.stats.errors += 1
-                    self.stats.completed += 1
+            
             except Exception as e:
-                if attempt < self.config.retries:
-                    self.stats.retried += 1
+                if self.controller is not None:
+                    self.controller.record(None, error=True)
+                kind, outage = pacer.failure(e)
+                # 目标故障期间或被限流 (429/503) 时请求并没有被处理, 不消耗重试次数, 恢复后原样重发,
+                # 直到推迟次数或时限用完
+                refusing = outage or kind == "status"
+                if refusing and not deferred:
+                    self.stats.deferred += 1
+                refused = refusing and (0 < self.config.max_deferred <= deferred or
+                                        (deadline is not None and time.monotonic() >= deadline))
+                if refused or (not refusing and attempt >= self.config.retries):
+                    self._give_up(kind, e, refused)
+                    return None
+                if refusing:
+                    deferred += 1
                 else:
-                    self.stats.errors += 1
-                    self.stats.completed += 1
-                    if self.config.verbose:
-                        print(f"\n{S.RED}[E] {e}{S.RESET}")
+                    attempt += 1
+                self.stats.retried += 1
+                if metrics is not None:
+                    metrics.failure(kind, retried=True)
+                await asyncio.sleep(pacer.backoff(kind, attempt + deferred, getattr(e, "retry_after", None)))
         
-        return None
+        # 记结果放在请求的 try 外面: 写结果失败 (OutputError) 不是请求失败, 不能重发
+        await self.sink.add(result)
+        return result
+    
+    def interrupt(self):
+        """用户中断: 不再发新请求, 在途请求收尾后正常结束 (保存断点/结果/指标)"""
+        self.interrupted = True
+        self.stop_flag = True
+    
+    def _give_up(self, kind: str, error, refused: bool = False):
+        """放弃当前 Payload, 计为错误 (refused: 目标一直拒绝, 推迟次数/时限用完)"""
+        if refused:
+            self.stats.refused += 1
+        self.stats.errors += 1
+        self.stats.completed += 1
+        if self.metrics is not None:
+            self.metrics.failure(kind, retried=False)
+        if self.config.verbose:
+            print(f"\n{S.RED}[E] {error}{S.RESET}")
+    
+    async def run(self, resume: bool = False):
+        """运行爆破 (resume: 从断点文件继续)"""
+        payloads, checkpoint = self._prepare(resume)
+        await self._open(append=checkpoint is not None)
+        
+        # 固定数量的工作协程从有界队列取 Payload, 没有批次屏障, 并发始终保持满载
+        n_workers = max(1, self.config.concurrency)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(n_workers, self.config.batch_size))
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(n_workers)]
+        control = asyncio.create_task(self._control_loop())
+        render = self._start_render()
+        
+        finished = False
+        try:
+            await self._produce(payloads, queue, n_workers)
+            await asyncio.gather(*workers)
+            finished = not self.stop_flag
+        
+        finally:
+            for task in workers:
+                task.cancel()
+            control.cancel()
+            await asyncio.gather(*workers, control, return_exceptions=True)
+            await self._stop_render(render)
+            await self._close(finished)
     
-    async def run(self):
-        """运行爆破"""
-        # 生成 Payload
-        payloads = self.generate_payloads()
-        self.stats.total = len(payloads)
+    def _prepare(self, resume: bool) -> Tuple[Iterator[Tuple[int, Tuple[str, ...]]], Optional[Dict]]:
+        """计算总数, 按需从断点恢复, 返回 (Payload 迭代器, 断点)"""
+        # Payload 惰性生成, 总数按算术计算
+        lo, hi = self.shard or (0, None)
+        sources = self.build_sources()
+        total = self._count(sources)
+        hi = total if hi is None else min(hi, total)
+        self.stats.total = max(0, hi - lo)
+        if self.shard is None:
+            self.stats.deduped = self.dedup_savings(sources)
         self.stats.start_time = time.time()
         
-        # 创建连接
-        connector = aiohttp.TCPConnector(
-            limit=self.config.concurrency,
-            limit_per_host=self.config.concurrency,
-            ttl_dns_cache=300,
-            keepalive_timeout=30,
-        )
+        # 断点: 先重发上次在途的组合, 再从上次生成到的位置继续
+        pending: List[int] = []
+        self._next_index = lo
+        checkpoint = Checkpoint.load(self.config.checkpoint_file) if resume else None
+        if checkpoint is not None:
+            if checkpoint.get("fingerprint") != self._fingerprint(lo, hi):
+                raise ValueError(f"断点文件与当前配置不匹配: {self.config.checkpoint_file}")
+            self._next_index = checkpoint["next"]
+            pending = checkpoint["pending"]
+            Checkpoint.restore_stats(self.stats, checkpoint)
+            self.sink.seed()
+            names = list(self.config.payloads)
+            for name, digits in checkpoint.get("pruned", {}).items():
+                self._pruned[names.index(name)].update(digits)
+                self._prune_epoch += 1
+        payloads = itertools.chain(self.payloads_at(pending), self.iter_payloads(self._next_index, hi))
+        self._fp = self._fingerprint(lo, hi)
+        self._inflight: set = set()
+        self._last_checkpoint = time.time()
+        self._checkpoint_task: Optional[asyncio.Future] = None
+        self._last_metrics = time.time()
+        self._metrics_task: Optional[asyncio.Future] = None
+        return payloads, checkpoint
+    
+    async def _open(self, append: bool):
+        """创建连接和并发窗口, 启动结果输出, 做基准校准"""
+        # 创建连接 (传输层由 config.transport 选择)
+        self.transport = make_transport(self.config, self.template, self.pool_size)
+        await self.transport.open()
+        await self.sink.start(append=append)
         
-        self.session = aiohttp.ClientSession(
-            connector=connector,
-            headers=self.config.headers,
-            cookies=self.config.cookies,
-        )
+        # 在途请求窗口: 自适应模式从 adaptive_start 起步, 由控制器按延迟/错误率调整
+        if self.config.adaptive:
+            self.semaphore = AdaptiveLimiter(min(self.config.adaptive_start, self.config.concurrency))
+            self.controller = ConcurrencyController(
+                self.semaphore, self.config.adaptive_min, self.config.concurrency,
+                self.config.timeout, self.config.max_error_rate)
+            self.stats.window = self.semaphore.limit
+        else:
+            self.semaphore = AdaptiveLimiter(self.config.concurrency)
+        self.pacer = RequestPacer(self.config)
+        
+        # 基准校准: 先发一组必然失败的探测, 不再用最先返回的响应当基准
+        self.profile = await self.calibrate()
+        if self.profile is not None and self.shard is None and self.progress_mode == "tty":
+            where = f" ({self.config.url})" if self.config.urls else ""
+            print(f"{S.CYAN}[*] 基准校准{where}: {self.profile.describe()}{S.RESET}")
+    
+    async def _close(self, finished: bool):
+        """写完结果, 保存或删除断点, 导出最终指标, 关闭连接"""
+        try:
+            try:
+                await self.sink.close()
+            except OutputError:
+                finished = False  # 有命中没写进结果文件, 留着断点
+                raise
+            finally:
+                if self.config.checkpoint_file:
+                    if finished:
+                        # 全部跑完, 没有可续跑的内容
+                        with contextlib.suppress(OSError):
+                            os.remove(self.config.checkpoint_file)
+                    else:
+                        Checkpoint.save(self.config.checkpoint_file, self._checkpoint_state())
+                if self.metrics is not None:
+                    Metrics.write(self.metrics.exports(self.stats, self.config.metrics_file,
+                                                       self.config.prometheus_file))
+        finally:
+            await self.transport.close()
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+    
+    async def _produce(self, payloads: Iterator[Tuple[int, Tuple[str, ...]]], queue: asyncio.Queue, n_workers: int):
+        """生产者: 按需从迭代器取 Payload 填充队列, 队列满时自然阻塞"""
+        for item in payloads:
+            index = item[0]
+            if self.stop_flag:
+                break
+            # 入队即视为在途, 发送完成才移除; 断点里记录的就是这部分
+            self._inflight.add(index)
+            if index >= self._next_index:
+                self._next_index = index + 1
+            await queue.put(item)
+        # 每个工作协程一个结束标记
+        for _ in range(n_workers):
+            await queue.put(None)
+    
+    async def _worker(self, queue: asyncio.Queue):
+        """工作协程: 循环取 Payload 发送, 直到收到结束标记"""
+        metrics = self.metrics
+        while True:
+            if metrics is not None and queue.empty():
+                # 队列空了才计时: 工作协程在等生产者, 说明 Payload 生成跟不上
+                waited = time.perf_counter()
+                item = await queue.get()
+                metrics.observe("feed", time.perf_counter() - waited)
+            else:
+                item = await queue.get()
+            if item is None:
+                return
+            # 已停止时只排空队列, 让生产者尽快退出 (未发送的仍算在途)
+            if self.stop_flag:
+                continue
+            index, values = item
+            try:
+                await self.try_one(index, values)
+            except OutputError:
+                # 命中没记下来, 留在在途里, 续跑时重发; 异常由收尾时的 sink.close() 抛出
+                self.stop_flag = True
+                continue
+            except Exception as e:
+                if self.config.verbose:
+                    print(f"\n{S.RED}[E] {e}{S.RESET}")
+            self._inflight.discard(index)
+    
+    async def _control_loop(self, interval: float = 0.2):
+        """定时维护: 调整并发窗口, 速度采样, 断点, 指标 (不负责渲染)"""
+        while True:
+            await asyncio.sleep(interval)
+            self._control_tick()
+    
+    def _control_tick(self):
+        if self.controller is not None and self.controller.maybe_update():
+            self.stats.window = self.semaphore.limit
+        if self.pacer.breaker is not None:
+            self.stats.paused = not self.pacer.breaker.is_closed
+        self.stats.sample()
+        self._maybe_checkpoint()
+        self._maybe_write_metrics()
+    
+    def _start_render(self) -> Optional[asyncio.Task]:
+        """quiet 模式不创建渲染任务"""
+        if self.progress_hook is None:
+            return None
+        return asyncio.create_task(self._render_loop(self.progress_hook, self.progress_interval))
+    
+    async def _stop_render(self, render: Optional[asyncio.Task]):
+        """停止渲染任务并按最终计数再渲染一次"""
+        if render is None:
+            return
+        render.cancel()
+        await asyncio.gather(render, return_exceptions=True)
+        self.stats.sample()
+        self._announce()
+        self.progress_hook(self.stats)
+    
+    async def _render_loop(self, hook: Callable[[Stats], None], interval: float):
+        """按固定频率渲染进度; 只读计数器, 不与工作协程同步"""
+        while True:
+            await asyncio.sleep(interval)
+            self._announce()
+            hook(self.stats)
+    
+    def cluster_tables(self) -> List[Tuple[Optional[str], ResponseClusters]]:
+        """(目标, 响应分类) 列表; 单目标时目标为 None"""
+        return [(None, self.clusters)] if self.clusters is not None else []
+    
+    def _announce(self):
+        self._announce_clusters()
+        self._announce_prunes()
+    
+    def _announce_prunes(self, target: Optional[str] = None):
+        """实时提示新的剪枝, 最多 PRUNE_NOTICES 条 (quiet 时留给 take_prunes 取走)"""
+        if not self._prune_fresh or self.progress_mode == "quiet":
+            return
+        for name, value, reason in self.take_prunes():
+            self._prune_notices += 1
+            if self._prune_notices > self.PRUNE_NOTICES:
+                continue
+            if self.progress_mode == "jsonl":
+                fields = {"target": target} if target else {}
+                UI.emit_json("prune", **fields, position=name, value=value, reason=reason)
+            else:
+                UI.print_prune_notice(name, value, reason, target)
+    
+    def _announce_clusters(self):
+        """实时提示新出现的响应类别, 最多 CLUSTER_NOTICES 条"""
+        for target, clusters in self.cluster_tables():
+            if not clusters.fresh:
+                continue
+            for cluster in clusters.take_fresh():
+                self._cluster_notices += 1
+                if self._cluster_notices > self.CLUSTER_NOTICES:
+                    continue
+                if self.progress_mode == "jsonl":
+                    UI.emit_json("cluster", **UI.cluster_dict(cluster, target))
+                else:
+                    UI.print_cluster_notice(cluster, target)
+    
+    def _fingerprint(self, lo: int, hi: int) -> str:
+        """配置指纹: 目标/模板/Payload 定义/分片有变化时拒绝续跑"""
+        ident = {
+            "url": self.config.url,
+            "method": self.config.method,
+            "data": self.config.data,
+            "payloads": self.config.payloads,
+            "shard": [lo, hi],
+        }
+        if self.config.attack_mode != "cluster_bomb":
+            ident["attack_mode"] = self.config.attack_mode
+        text = json.dumps(ident, sort_keys=True, ensure_ascii=False,
+                          default=lambda o: repr(o) if isinstance(o, Processor) else getattr(o, '__qualname__', '?'))
+        return hashlib.sha1(text.encode()).hexdigest()
+    
+    def _checkpoint_state(self) -> Dict:
+        state = Checkpoint.state(self._fp, self._next_index, self._inflight, self.stats)
+        if self._prune_epoch:
+            state["pruned"] = {name: sorted(pruned) for name, pruned in zip(self.config.payloads, self._pruned) if pruned}
+        return state
+    
+    def _maybe_checkpoint(self):
+        """最多每 checkpoint_interval 秒写一次, 在线程池里写, 不阻塞工作协程"""
+        if not self.config.checkpoint_file:
+            return
+        now = time.time()
+        if now - self._last_checkpoint < self.config.checkpoint_interval:
+            return
+        if self._checkpoint_task is not None and not self._checkpoint_task.done():
+            return
+        self._last_checkpoint = now
+        state = self._checkpoint_state()
+        self._checkpoint_task = asyncio.get_running_loop().run_in_executor(
+            None, Checkpoint.save, self.config.checkpoint_file, state)
+    
+    def _maybe_write_metrics(self):
+        """每 metrics_interval 秒导出一次指标; 文本在事件循环里生成, 写文件放线程池"""
+        if self.metrics is None:
+            return
+        now = time.time()
+        if now - self._last_metrics < self.config.metrics_interval:
+            return
+        if self._metrics_task is not None and not self._metrics_task.done():
+            return
+        self._last_metrics = now
+        files = self.metrics.exports(self.stats, self.config.metrics_file, self.config.prometheus_file)
+        self._metrics_task = asyncio.get_running_loop().run_in_executor(None, Metrics.write, files)
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🧩 多进程分片
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _stats_snapshot(stats: Stats) -> Dict:
+    """子进程上报的计数器快照"""
+    return {
+        "total": stats.total,
+        "completed": stats.completed,
+        "success": stats.success,
+        "errors": stats.errors,
+        "retried": stats.retried,
+        "pruned": stats.pruned,
+        "skipped": stats.skipped,
+        "deferred": stats.deferred,
+        "refused": stats.refused,
+        "window": stats.window,
+        "paused": stats.paused,
+    }
+
+def _shard_main(config: BruteConfig, shard: Tuple[int, int], wid: int,
+                queue: "multiprocessing.Queue", stop_event: "multiprocessing.Event", resume: bool):
+    """子进程入口: 在独立事件循环里跑一个分片, 定时把统计和新结果发回父进程"""
+    # Ctrl-C 由父进程处理, 通过 stop_event 通知, 子进程各自收尾并保存断点
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    engine = BruteEngine(config, shard)
+    engine.sink.outbox = []
+    if engine.clusters is not None:
+        engine.clusters.track_changes()
+    
+    def report(stats: Stats):
+        if stop_event.is_set():
+            engine.stop_flag = True
+        snapshot = _stats_snapshot(stats)
+        if engine.clusters is not None:
+            snapshot["clusters"] = engine.clusters.take_delta()
+        snapshot["prunes"] = engine.take_prunes()
+        queue.put(("stats", wid, snapshot, engine.sink.take_outbox()))
+    
+    # 子进程不直接输出, 提示都交给父进程渲染
+    engine.progress_mode = "quiet"
+    engine.progress_hook = report
+    engine.progress_interval = 0.2
+    try:
+        asyncio.run(engine.run(resume))
+    except KeyboardInterrupt:
+        pass
+    except OutputError as e:
+        queue.put(("error", wid, str(e), []))
+    finally:
+        report(engine.stats)
+        queue.put(("done", wid, None, []))
+
+class ShardedEngine(BruteEngine):
+    """
+    多进程爆破引擎
+    
+    把组合编号空间切成 workers 段连续区间, 每个子进程跑自己的 BruteEngine,
+    总并发平均分给各进程。父进程汇总统计/结果, 任一进程命中且 auto_stop 时
+    通过共享 Event 通知所有进程停止。
+    """
+    
+    def __init__(self, config: BruteConfig, workers: int):
+        super().__init__(config)
+        self.workers = max(1, workers)
+        # 子进程各写自己的 output_file.shard{wid}, 结束后由父进程合并
+        self.sink = ResultSink(self.stats, None, config.results_keep)
+    
+    async def run(self, resume: bool = False):
+        """运行爆破 (resume: 各分片从自己的断点文件继续, 进程数需与上次相同)"""
+        sources = self.build_sources()
+        total = self._count(sources)
+        self.stats.total = total
+        self.stats.deduped = self.dedup_savings(sources)
+        self.stats.start_time = time.time()
+        
+        # fork 启动: 处理器链可能包含 lambda, 无法 pickle 传给 spawn 子进程
+        ctx = multiprocessing.get_context("fork")
+        queue = ctx.Queue()
+        stop_event = ctx.Event()
         
-        self.semaphore = asyncio.Semaphore(self.config.concurrency)
+        # 多进程已经占满核心, 子进程内不再开处理器进程池; 并发和限速平均分给各进程
+        child_config = dataclasses.replace(
+            self.config, concurrency=max(1, self.config.concurrency // self.workers), process_workers=0,
+            rate_limit=self.config.rate_limit / self.workers,
+            host_rate_limit=self.config.host_rate_limit / self.workers)
+        step = -(-total // self.workers)
+        procs = []
+        for wid in range(self.workers):
+            shard = (wid * step, min(total, (wid + 1) * step))
+            if shard[0] >= shard[1]:
+                break
+            # 断点和指标文件每个分片各写一份
+            per_shard = {name: f"{path}.shard{wid}"
+                         for name in ("checkpoint_file", "metrics_file", "prometheus_file", "output_file")
+                         if (path := getattr(child_config, name))}
+            shard_config = dataclasses.replace(child_config, **per_shard) if per_shard else child_config
+            proc = ctx.Process(target=_shard_main,
+                               args=(shard_config, shard, wid, queue, stop_event, resume), daemon=True)
+            proc.start()
+            procs.append(proc)
         
+        snapshots: Dict[int, Dict] = {}
+        running = len(procs)
+        failure: Optional[str] = None
+        render = self._start_render()
         try:
-            for i in range(0, len(payloads), self.config.batch_size):
-                if self.stop_flag:
-                    break
+            while running:
+                if self.stop_flag and not stop_event.is_set():
+                    stop_event.set()
+                try:
+                    kind, wid, snapshot, results = queue.get_nowait()
+                except Exception:
+                    await asyncio.sleep(0.05)
+                    continue
                 
-                batch = payloads[i:i + self.config.batch_size]
-                tasks = [self.try_one(p) for p in batch]
-                await asyncio.gather(*tasks, return_exceptions=True)
+                if kind == "done":
+                    running -= 1
+                    continue
+                if kind == "error":
+                    # 某个分片写不了结果文件 (多半磁盘满), 其它分片也停下
+                    failure = failure or snapshot
+                    self.stop_flag = True
+                    continue
                 
+                delta = snapshot.pop("clusters", None)
+                if delta is not None and self.clusters is not None:
+                    self.clusters.merge(delta)
+                self._prune_fresh += snapshot.pop("prunes", [])
+                snapshots[wid] = snapshot
+                if results:
+                    for result in results:
+                        await self.sink.add(result)
+                    if self.config.auto_stop:
+                        self.stop_flag = True
+                        stop_event.set()
+                self._merge(snapshots, total, step)
                 self.stats.sample()
-                UI.print_progress(self.stats)
+            if failure is not None:
+                raise OutputError(failure)
+        finally:
+            stop_event.set()
+            for proc in procs:
+                proc.join(timeout=self.config.timeout * (self.config.retries + 1) + 1)
+                if proc.is_alive():
+                    proc.terminate()
+            await self._stop_render(render)
+            self._merge_outputs(len(procs), append=resume)
+    
+    def _merge_outputs(self, n_shards: int, append: bool):
+        """把各分片的结果文件按顺序拼接到 output_file"""
+        path = self.config.output_file
+        if not path:
+            return
+        with open(path, 'ab' if append else 'wb') as out:
+            for wid in range(n_shards):
+                shard_path = f"{path}.shard{wid}"
+                if not os.path.exists(shard_path):
+                    continue
+                with open(shard_path, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+                os.remove(shard_path)
+    
+    def _merge(self, snapshots: Dict[int, Dict], total: int, step: int):
+        """汇总各分片计数器"""
+        stats = self.stats
+        # 还没上报的分片按理论区间大小计入 total
+        stats.total = total - sum(
+            min(step, total - wid * step) - snap["total"] for wid, snap in snapshots.items())
+        stats.completed = sum(snap["completed"] for snap in snapshots.values())
+        stats.success = sum(snap["success"] for snap in snapshots.values())
+        stats.errors = sum(snap["errors"] for snap in snapshots.values())
+        stats.retried = sum(snap["retried"] for snap in snapshots.values())
+        stats.pruned = sum(snap["pruned"] for snap in snapshots.values())
+        stats.skipped = sum(snap["skipped"] for snap in snapshots.values())
+        stats.deferred = sum(snap["deferred"] for snap in snapshots.values())
+        stats.refused = sum(snap["refused"] for snap in snapshots.values())
+        stats.window = sum(snap["window"] for snap in snapshots.values())
+        stats.paused = any(snap["paused"] for snap in snapshots.values())
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#                              🌐 多目标
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class MultiTargetEngine(BruteEngine):
+    """
+    多目标爆破引擎
+    
+    同一组 Payload 打多个目标 (如每队一个题目实例)。每个目标一个 BruteEngine,
+    有自己的连接池、并发窗口 (自适应控制器)、限速/熔断、基准校准、响应分类、
+    断点和统计; 命中经目标的 sink 打上 URL 后汇总到 output_file。
+    
+    全局 concurrency 个工作协程按轮询从"窗口还有余量"的目标取下一个 Payload:
+    慢目标最多占满自己的窗口, 其余协程继续服务别的目标, 不会被它拖住。
+    目标跑完或命中停止 (auto_stop 按目标生效) 后, 并发重新平分给剩下的目标。
+    """
+    
+    STATES = {"done": "完成", "stopped": "命中停止", "running": "中断"}
+    
+    def __init__(self, config: BruteConfig):
+        super().__init__(config)
+        self.clusters = None
+        self.metrics = None
+        urls = config.urls or [config.url]
+        self.targets: List[BruteEngine] = [self._make_target(i, url, len(urls)) for i, url in enumerate(urls)]
+        self.state: Dict[BruteEngine, str] = {}
+        self.finished_at: Dict[BruteEngine, float] = {}
+        self._ring: deque = deque()
+        self._feeds: Dict[BruteEngine, Iterator[Tuple[int, Tuple[str, ...]]]] = {}
+        self._busy: Dict[BruteEngine, int] = {}
+        self._idle: deque = deque()
+    
+    def interrupt(self):
+        super().interrupt()
+        self._wake()
+    
+    def _make_target(self, i: int, url: str, n_targets: int) -> BruteEngine:
+        """目标 i 的引擎: 断点/指标文件各写一份, 结果交给父 sink 写"""
+        per_target = {name: f"{path}.t{i}"
+                      for name in ("checkpoint_file", "metrics_file", "prometheus_file")
+                      if (path := getattr(self.config, name))}
+        config = dataclasses.replace(
+            self.config, url=url, concurrency=self._budget(n_targets), output_file=None,
+            rate_limit=self.config.rate_limit / n_targets, **per_target)
+        target = BruteEngine(config)
+        # 窗口起步是平分的份额, 其它目标结束后会放大到 _budget(1); 连接池一开始就按最大值建,
+        # 否则放大的窗口只是在连接池里排队, 排队时间还算在请求超时里
+        target.pool_size = self._budget(1)
+        target.sink = ResultSink(target.stats, None, config.results_keep, parent=self.sink, label=url)
+        return target
+    
+    def _budget(self, n_targets: int) -> int:
+        """每个目标的并发上限"""
+        return self.config.host_concurrency or -(-self.config.concurrency // max(1, n_targets))
+    
+    def cluster_tables(self) -> List[Tuple[Optional[str], ResponseClusters]]:
+        return [(target.config.url, target.clusters) for target in self.targets if target.clusters is not None]
+    
+    def _announce_prunes(self, target: Optional[str] = None):
+        for engine in self.targets:
+            engine._announce_prunes(engine.config.url)
+    
+    def target_rows(self) -> List[Tuple[str, Stats, str, float]]:
+        """(URL, 统计, 状态, 耗时)"""
+        now = time.time()
+        return [(target.config.url, target.stats, self.STATES[self.state.get(target, "running")],
+                 self.finished_at.get(target, now) - target.stats.start_time)
+                for target in self.targets]
+    
+    async def run(self, resume: bool = False):
+        """运行爆破 (resume: 各目标从自己的断点文件继续)"""
+        self.stats.start_time = time.time()
+        for target in self.targets:
+            self._feeds[target] = target._prepare(resume)[0]
+            self._busy[target] = 0
+        self._ring = deque(self.targets)
+        if resume:
+            # 各目标断点里的结果和 Flag 汇总到父 sink
+            self.stats.results = [record for target in self.targets for record in target.stats.results]
+            self.stats.flags = list(dict.fromkeys(flag for target in self.targets for flag in target.stats.flags))
+            self.sink.seed()
+        self._merge_targets()
+        
+        workers: List[asyncio.Task] = []
+        control = render = None
+        try:
+            await self.sink.start(append=resume)
+            # 各目标的连接和基准校准并行做
+            await asyncio.gather(*(target._open(append=False) for target in self.targets))
+            n_workers = max(1, self.config.concurrency)
+            workers = [asyncio.create_task(self._worker()) for _ in range(n_workers)]
+            control = asyncio.create_task(self._control_loop())
+            render = self._start_render()
+            await asyncio.gather(*workers)
         
         finally:
-            await self.session.close()
+            for task in workers:
+                task.cancel()
+            if control is not None:
+                control.cancel()
+            await asyncio.gather(*workers, *([control] if control else []), return_exceptions=True)
+            self._merge_targets()
+            await self._stop_render(render)
+            for target in self.targets:
+                if target.transport is not None:
+                    # 写结果失败时没记下的命中还在在途里, 断点要留着
+                    await target._close(self.state.get(target) == "done" and not target._inflight)
+            await self.sink.close()
+    
+    def _pick(self) -> Optional[Tuple[BruteEngine, Tuple[int, Tuple[str, ...]]]]:
+        """轮询下一个窗口有余量的目标, 取它的下一个 Payload; 都满了返回 None"""
+        ring = self._ring
+        for _ in range(len(ring)):
+            target = ring[0]
+            ring.rotate(-1)
+            if target.stop_flag:
+                self._retire(target, "stopped")
+                continue
+            if self._busy[target] >= target.semaphore.limit:
+                continue
+            item = next(self._feeds[target], None)
+            if item is None:
+                self._retire(target, "done")
+                continue
+            return target, item
+        return None
+    
+    def _retire(self, target: BruteEngine, state: str):
+        """目标结束: 移出轮询, 并发重新平分给剩下的目标"""
+        self._ring.remove(target)
+        self.state[target] = state
+        self.finished_at[target] = time.time()
+        budget = self._budget(len(self._ring))
+        for other in self._ring:
+            if other.controller is not None:
+                other.controller.max_window = budget
+            else:
+                other.semaphore.resize(budget)
+        self._wake()
+    
+    def _wake(self):
+        """唤醒所有空闲的工作协程重新挑目标"""
+        while self._idle:
+            fut = self._idle.popleft()
+            if not fut.done():
+                fut.set_result(None)
+    
+    async def _worker(self):
+        """工作协程: 轮询取 Payload 发送; 所有目标窗口都满时挂起, 全部目标结束后退出"""
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.stop_flag:
+                return
+            picked = self._pick()
+            if picked is None:
+                if not self._ring:
+                    return
+                fut = loop.create_future()
+                self._idle.append(fut)
+                await fut
+                continue
+            target, (index, values) = picked
+            # 在途记录在目标自己的断点里
+            self._busy[target] += 1
+            target._inflight.add(index)
+            if index >= target._next_index:
+                target._next_index = index + 1
+            try:
+                await target.try_one(index, values)
+            except OutputError:
+                # 同单目标: 停止爆破, 命中留在目标的在途里
+                self._busy[target] -= 1
+                self.stop_flag = True
+                self._wake()
+                return
+            except Exception as e:
+                if self.config.verbose:
+                    print(f"\n{S.RED}[E] {target.config.url}: {e}{S.RESET}")
+            target._inflight.discard(index)
+            self._busy[target] -= 1
+    
+    async def _control_loop(self, interval: float = 0.2):
+        """各目标各自调窗口/写断点和指标; 窗口可能变大, 顺便唤醒空闲协程"""
+        while True:
+            await asyncio.sleep(interval)
+            for target in self.targets:
+                target._control_tick()
+            self._merge_targets()
+            self.stats.sample()
+            self._wake()
+    
+    def _merge_targets(self):
+        """汇总各目标计数器"""
+        stats = self.stats
+        targets = [target.stats for target in self.targets]
+        stats.total = sum(t.total for t in targets)
+        stats.completed = sum(t.completed for t in targets)
+        stats.success = sum(t.success for t in targets)
+        stats.errors = sum(t.errors for t in targets)
+        stats.retried = sum(t.retried for t in targets)
+        stats.pruned = sum(t.pruned for t in targets)
+        stats.skipped = sum(t.skipped for t in targets)
+        stats.deferred = sum(t.deferred for t in targets)
+        stats.refused = sum(t.refused for t in targets)
+        stats.deduped = sum(t.deduped for t in targets)
+        stats.window = sum(t.window for t in targets)
+        stats.paused = any(t.paused for t in targets)
 
 # ═══════════════════════════════════════════════════════════════════════════════
 #                              🎯 主程序
@@ -817,15 +4979,123 @@ def parse_args():
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     
-    parser.add_argument('-u', '--url', help='目标 URL')
+    parser.add_argument('-u', '--url', action='append', help='目标 URL (可多次指定, 多个时为多目标模式)')
+    parser.add_argument('--url-file', metavar='FILE', help='目标列表文件, 每行一个 URL (多目标模式)')
+    parser.add_argument('--host-threads', type=int, default=0,
+                        help='多目标模式每个目标的并发上限 (默认总并发按未结束的目标平分)')
     parser.add_argument('-m', '--method', choices=['GET', 'POST', 'JSON'], help='请求方法')
     parser.add_argument('-t', '--threads', type=int, help='并发数')
-    parser.add_argument('-d', '--dict', help='字典文件路径')
+    parser.add_argument('-d', '--dict', action='append', metavar='FILE',
+                        help='字典文件路径, 支持 .gz/.bz2/.xz; 多次指定时按顺序合并并去重')
+    parser.add_argument('--dedup', action='store_true', help='单个字典也按处理后的值去重')
+    parser.add_argument('--dedup-mem', type=int, default=64, metavar='MB',
+                        help='去重的内存上限 (超过后改用 Bloom 过滤器, 默认 64MB)')
+    parser.add_argument('--mask', help='PASS 改用掩码生成, hashcat 语法, 如 ?u?l?l?l?d?d (不再读字典)')
+    parser.add_argument('--mask-min', type=int, help='掩码递增模式的最短位数')
+    parser.add_argument('--rules', metavar='FILE', help='对字典套用规则文件 (hashcat 规则语法)')
+    parser.add_argument('-a', '--attack', choices=ATTACK_MODES, default='cluster_bomb',
+                        help='攻击模式: cluster_bomb (笛卡尔积) / pitchfork (按序配对) / '
+                             'battering_ram (同一值填所有位置) / sniper (每次只换一个位置)')
     parser.add_argument('--timeout', type=float, help='超时时间')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='自适应并发: 从小窗口起步, 按延迟/错误率调整, -t 为上限 (默认 -t 即实际并发)')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='进程数 (按组合编号分片, 并发平均分配)')
+    parser.add_argument('--transport', choices=sorted(TRANSPORTS), default='aiohttp',
+                        help='传输层: aiohttp (默认) / raw (精简 HTTP/1.1, 适合本地快速目标)')
+    parser.add_argument('--pipeline', type=int, default=1, help='raw 传输的 HTTP/1.1 流水线深度')
+    parser.add_argument('--rate', type=float, default=0, help='每秒请求上限 (0 = 不限)')
+    parser.add_argument('--max-deferred', type=int, default=20, metavar='N',
+                        help='单个 Payload 因熔断/限流 (429/503) 推迟重发的次数上限, 超过后记为错误 (0 = 不限)')
+    parser.add_argument('--max-defer-time', type=float, default=120.0, metavar='SEC',
+                        help='单个 Payload 等熔断/限流恢复的时间上限, 超过后记为错误 (0 = 不限)')
+    parser.add_argument('--metrics', metavar='FILE', help='定时导出分阶段耗时/计数的 JSON 快照')
+    parser.add_argument('--prom', metavar='FILE', help='定时导出 Prometheus 文本格式指标 (textfile collector)')
+    parser.add_argument('--no-cache', action='store_true', help='不使用字典处理结果缓存')
+    parser.add_argument('--no-cluster', action='store_true', help='不做响应分类 (省一点 CPU)')
+    parser.add_argument('--checkpoint', nargs='?', const='brute.ckpt.json', metavar='FILE',
+                        help='定时保存断点, 中断后可用 --resume 继续 (默认文件 brute.ckpt.json)')
+    parser.add_argument('--resume', action='store_true', help='从断点文件继续上次的爆破 (隐含 --checkpoint)')
+    parser.add_argument('--prune-on-hit', action='append', default=[], metavar='NAME',
+                        help='命中后跳过该位置同一个值的剩余组合并继续爆破, 如 --prune-on-hit USER')
+    parser.add_argument('--prune-signature', action='append', default=[], metavar='NAME=TEXT',
+                        help='响应含 TEXT 时跳过该位置同一个值的剩余组合, 如 --prune-signature USER=用户不存在')
+    parser.add_argument('--flag-format', action='append', default=[], metavar='PREFIX',
+                        help='额外的 Flag 前缀, 如 --flag-format DASCTF (可多次指定)')
+    parser.add_argument('--proc-workers', type=int, default=0, help='处理器链计算进程数 (大字典 + 哈希时使用)')
+    parser.add_argument('--progress', choices=['auto', 'tty', 'jsonl', 'quiet'], default='auto',
+                        help='进度输出: auto (终端用 tty, 否则 jsonl) / tty / jsonl (每行一个 JSON) / quiet')
+    parser.add_argument('-q', '--quiet', action='store_true', help='不渲染进度, 只输出最终结果 (同 --progress quiet)')
     parser.add_argument('-v', '--verbose', action='store_true', help='详细输出')
     
     return parser.parse_args()
 
+def print_tables(engine: BruteEngine):
+    """响应分类表, 多目标时再加每个目标的统计"""
+    for target, clusters in engine.cluster_tables():
+        UI.print_clusters(clusters, target=target)
+    if isinstance(engine, MultiTargetEngine):
+        UI.print_targets(engine.target_rows())
+
+@contextlib.contextmanager
+def stop_on_interrupt(engine: BruteEngine):
+    """
+    第一次 Ctrl-C 让引擎停发新请求、在途请求收尾后正常返回 (断点/结果/统计照常输出);
+    第二次恢复默认行为, 直接退出。
+    
+    asyncio.run 下 Ctrl-C 只会把主任务取消成 CancelledError, 外层的 except KeyboardInterrupt 接不到。
+    """
+    loop = asyncio.get_running_loop()
+    
+    def handler():
+        loop.remove_signal_handler(signal.SIGINT)
+        print(f"\n{S.YELLOW}[!] 正在停止, 等在途请求收尾 (再按一次 Ctrl-C 强制退出){S.RESET}", file=sys.stderr)
+        engine.interrupt()
+    
+    try:
+        loop.add_signal_handler(signal.SIGINT, handler)
+    except (NotImplementedError, RuntimeError):
+        yield   # 不支持 (Windows) 时保持默认行为
+        return
+    try:
+        yield
+    finally:
+        loop.remove_signal_handler(signal.SIGINT)
+
+async def run_plain(engine: BruteEngine, resume: bool):
+    """非终端运行: 不打印横幅和进度条; jsonl 模式下结果和统计也是 JSON 行"""
+    jsonl = engine.progress_mode == "jsonl"
+    stats = engine.stats
+    try:
+        with stop_on_interrupt(engine):
+            await engine.run(resume=resume)
+    except (ValueError, FileNotFoundError, OutputError) as e:
+        if jsonl:
+            UI.emit_json("error", message=str(e))
+        else:
+            print(f"[!] 错误: {e}", file=sys.stderr)
+        return
+    
+    targets = engine.target_rows() if isinstance(engine, MultiTargetEngine) else []
+    if jsonl:
+        for result in stats.results:
+            UI.emit_json("result", **result.to_dict())
+        for target, clusters in engine.cluster_tables():
+            fields = {"target": target} if target else {}
+            UI.emit_json("clusters", **fields, total=clusters.total, overflow=clusters.overflow,
+                         clusters=[UI.cluster_dict(cluster) for cluster in clusters.ranked()])
+        for row in targets:
+            UI.emit_json("target", **UI.target_dict(*row))
+        UI.emit_json("summary", total=stats.total, completed=stats.completed, success=stats.success,
+                     errors=stats.errors, retried=stats.retried, pruned=stats.pruned, skipped=stats.skipped,
+                     deferred=stats.deferred, refused=stats.refused, deduped=stats.deduped,
+                     interrupted=engine.interrupted, elapsed=round(stats.elapsed, 3), flags=stats.flags)
+        return
+    for result in stats.results:
+        UI.print_success(result)
+    UI.print_hidden_results(stats, engine.config.output_file)
+    print_tables(engine)
+    UI.print_summary(stats)
+
 async def main():
     args = parse_args()
     
@@ -835,7 +5105,7 @@ async def main():
     
     config = BruteConfig(
         # ═══════════ 目标 ═══════════
-        url = args.url or "http://47.109.105.62:37283/",
+        url = args.url[0] if args.url else "http://47.109.105.62:37283/",
         method = args.method or "POST",
         
         # ═══════════ 请求数据 ═══════════
@@ -854,7 +5124,10 @@ async def main():
             },
             "PASS": {
                 "type": "file",
-                "path": args.dict or "/Users/chenjianfang/Desktop/CISCN/WEB/ctf-web-solver/暴力破解/top50k.txt",
+                "path": args.dict[0] if args.dict else "/Users/chenjianfang/Desktop/CISCN/WEB/ctf-web-solver/暴力破解/top50k.txt",
+                # 多个字典按顺序合并, 按处理后的值去重 (单个字典默认不去重):
+                # "path": ["top50k.txt", "rockyou.txt.gz", "ctf.txt"],
+                # "dedup": True,
                 
                 # ═══════════ Payload 处理器 ═══════════
                 # 根据题目要求选择:
@@ -876,6 +5149,9 @@ async def main():
                     # P.base64_encode(),
                 ]
             }
+            # 其它生成型 Payload (不落盘, 总数直接算出):
+            # "PASS": {"type": "mask", "mask": "?d?d?d?d?d?d", "min_length": 4}
+            # "PASS": {"type": "rules", "path": "top1k.txt", "rules": [":", "c", "$1", "c$1$2$3", "sa@so0"]}
         },
         
         # ═══════════ 性能配置 ═══════════
@@ -889,23 +5165,88 @@ async def main():
         verbose = args.verbose,
     )
     
+    if args.no_cache:
+        config.cache_dir = None
+    if args.checkpoint or args.resume:
+        config.checkpoint_file = args.checkpoint or 'brute.ckpt.json'
+    config.process_workers = args.proc_workers
+    config.adaptive = args.adaptive
+    config.rate_limit = args.rate
+    config.max_deferred = args.max_deferred
+    config.max_defer_time = args.max_defer_time
+    config.transport = args.transport
+    config.pipeline_depth = args.pipeline
+    config.metrics_file = args.metrics
+    config.prometheus_file = args.prom
+    config.flag_formats += args.flag_format
+    config.progress = 'quiet' if args.quiet else args.progress
+    config.cluster = not args.no_cluster
+    urls = list(args.url or [])
+    if args.url_file:
+        with open(args.url_file, encoding='utf-8') as f:
+            urls += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if len(urls) > 1:
+        config.urls = list(dict.fromkeys(urls))
+    config.host_concurrency = args.host_threads
+    config.attack_mode = args.attack
+    if args.prune_on_hit:
+        # 按值剪枝意味着命中后继续跑其它值
+        config.prune_on_hit = args.prune_on_hit
+        config.auto_stop = False
+    for item in args.prune_signature:
+        name, sep, text = item.partition('=')
+        if not sep or not text:
+            print(f"{S.RED}[!] --prune-signature 格式应为 NAME=TEXT: {item}{S.RESET}")
+            return
+        config.prune_signatures.setdefault(name, []).append(text)
+    # 生成型 Payload: 沿用 PASS 的处理器链
+    pass_cfg = config.payloads["PASS"]
+    if args.dict and len(args.dict) > 1:
+        pass_cfg["path"] = args.dict
+    if args.dedup:
+        pass_cfg["dedup"] = True
+    pass_cfg.setdefault("dedup_memory_mb", args.dedup_mem)
+    if args.mask:
+        config.payloads["PASS"] = {"type": "mask", "mask": args.mask, "min_length": args.mask_min,
+                                   "processors": pass_cfg["processors"]}
+    elif args.rules:
+        config.payloads["PASS"] = {"type": "rules", "path": pass_cfg["path"], "rules_file": args.rules,
+                                   "dedup": pass_cfg.get("dedup"), "dedup_memory_mb": pass_cfg["dedup_memory_mb"],
+                                   "processors": pass_cfg["processors"]}
+    
     # ═══════════════════════════════════════════════════════════════════════════
     
+    # 创建引擎
+    if config.urls:
+        if args.workers > 1:
+            print(f"{S.YELLOW}[!] 多目标模式只用单进程, 忽略 -w {args.workers}{S.RESET}", file=sys.stderr)
+        engine = MultiTargetEngine(config)
+    elif args.workers > 1:
+        engine = ShardedEngine(config, args.workers)
+    else:
+        engine = BruteEngine(config)
+    
+    # jsonl / quiet 模式只输出机器可读的进度和最终结果
+    if engine.progress_mode != "tty":
+        await run_plain(engine, args.resume)
+        return
+    
     # 打印 UI
     UI.print_banner()
     UI.print_config(config)
     
-    # 创建引擎
-    engine = BruteEngine(config)
-    
     # 预览 Payload
     try:
-        payloads = engine.generate_payloads()
-        UI.print_payloads(config, len(payloads))
+        sources = engine.build_sources()
+        UI.print_payloads(config, engine.count_payloads(),
+                          {name: len(source) for name, source, _ in sources},
+                          {name: merged_wordlist(source) for name, source, _ in sources if merged_wordlist(source)},
+                          engine.dedup_savings(sources))
         
-        if payloads:
+        # 只取第一个组合作为示例
+        sample = next(engine.generate_payloads(), None)
+        if sample:
             print(f"{S.MAGENTA}[*] Payload 示例:{S.RESET}")
-            sample = payloads[0]
             for name, val in sample.items():
                 orig = val.get("original", val)
                 proc = val.get("processed", val)
@@ -918,25 +5259,38 @@ async def main():
         print(f"{S.RED}[!] 错误: {e}{S.RESET}")
         return
     
-    print(f"{S.GREEN}{S.BOLD}[*] 开始爆破...{S.RESET}\n")
+    if args.resume:
+        print(f"{S.GREEN}{S.BOLD}[*] 从断点继续: {config.checkpoint_file}{S.RESET}\n")
+    else:
+        print(f"{S.GREEN}{S.BOLD}[*] 开始爆破...{S.RESET}\n")
     
     try:
-        await engine.run()
-        
-        # 结果
-        if engine.stats.results:
-            for result in engine.stats.results:
-                UI.print_success(result)
-                print(f"\n{S.BLUE}[+] 响应内容:{S.RESET}")
-                print(f"{S.GRAY}{result.get('response', '')[:1000]}{S.RESET}")
-        else:
-            print(f"\n\n{S.RED}[-] 未找到有效结果{S.RESET}")
-        
-        UI.print_summary(engine.stats)
-        
-    except KeyboardInterrupt:
+        with stop_on_interrupt(engine):
+            await engine.run(resume=args.resume)
+    except (ValueError, OutputError) as e:
+        print(f"{S.RED}[!] 错误: {e}{S.RESET}")
+        if isinstance(e, OutputError) and config.checkpoint_file:
+            print(f"{S.YELLOW}[!] 断点已保存: {config.checkpoint_file}, 腾出空间后用 --resume 继续{S.RESET}")
+        return
+    
+    # 结果
+    if engine.stats.results:
+        for result in engine.stats.results:
+            UI.print_success(result)
+            print(f"\n{S.BLUE}[+] 响应内容:{S.RESET}")
+            print(f"{S.GRAY}{result.response[:1000]}{S.RESET}")
+        UI.print_hidden_results(engine.stats, config.output_file)
+    elif not engine.interrupted:
+        print(f"\n\n{S.RED}[-] 未找到有效结果{S.RESET}")
+    
+    if engine.interrupted:
         print(f"\n\n{S.YELLOW}[!] 用户中断{S.RESET}")
-        UI.print_summary(engine.stats)
+        if config.checkpoint_file:
+            print(f"{S.YELLOW}[!] 断点已保存: {config.checkpoint_file}, 用 --resume 继续{S.RESET}")
+        else:
+            print(f"{S.YELLOW}[!] 未开启断点, 下次需从头开始 (--checkpoint 开启){S.RESET}")
+    print_tables(engine)
+    UI.print_summary(engine.stats)
 
 if __name__ == "__main__":
     try: